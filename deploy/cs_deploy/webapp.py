@@ -78,6 +78,12 @@ class Manager:
         with open(Path("web-kubernetes") / "db-service.yaml") as f:
             self.db_service = yaml.safe_load(f.read())
 
+        with open(Path("web-kubernetes") / "redis-deployment.yaml") as f:
+            self.redis_deployment = yaml.safe_load(f.read())
+
+        with open(Path("web-kubernetes") / "redis-service.yaml") as f:
+            self.redis_service = yaml.safe_load(f.read())
+
     def build(self, dev=False):
         run(f"docker build -t webbase:latest -f Dockerfile.base ./")
         if dev:
@@ -102,6 +108,7 @@ class Manager:
     def config(self, update_db=False, dev=False):
         self.write_secret()
         self.write_web(dev=dev)
+        self.write_redis()
         if update_db:
             self.write_db()
         self.write_deployment_cleanup_job()
@@ -136,6 +143,13 @@ class Manager:
         self.write_config(self.db_deployment, filename="db-deployment.yaml")
         self.write_config(self.db_service, filename="db-service.yaml")
 
+    def write_redis(self):
+        """
+        Write the Redis deployment that the web pods share as their cache.
+        """
+        self.write_config(self.redis_deployment, filename="redis-deployment.yaml")
+        self.write_config(self.redis_service, filename="redis-service.yaml")
+
     def write_web(self, dev=False):
         web_obj = copy.deepcopy(self.web_deployment_template)
         web_configmap = copy.deepcopy(self.web_configmap)
@@ -147,6 +161,7 @@ class Manager:
             "DATABASE_URL",
             "DEFAULT_CLUSTER_USER",
             "DEFAULT_VIZ_HOST",
+            "REDIS_URL",
         ]:
             if webapp_config.get(var, None):
                 web_configmap["data"][var] = webapp_config[var]
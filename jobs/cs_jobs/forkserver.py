@@ -0,0 +1,185 @@
+"""
+Run each task in a forked child of a process that has already imported
+``cs_config`` and loaded the model's data.
+
+The child shares the parent's memory copy-on-write, so it starts without
+paying the import cost again, and anything the task changes in memory is
+thrown away when the child exits. Use this for models that are not safe to
+reuse across tasks in a single process.
+
+Forking a process that has other threads running, e.g. the event loop's
+executor or the heartbeat thread, can leave locks held in the child. So
+``preload`` starts a single threaded zygote process before any of those
+threads exist, and every task is forked from the zygote instead.
+"""
+import multiprocessing
+import os
+import sys
+import threading
+from multiprocessing.connection import Connection, wait
+from multiprocessing.reduction import recv_handle, send_handle
+
+from cs_jobs import progress
+from cs_jobs.task_wrapper import run_task
+
+try:
+    from cs_config import functions
+except ImportError:
+    functions = None
+
+# How often the zygote checks for children that have exited.
+REAP_INTERVAL = 0.1
+
+_lock = threading.Lock()
+_zygote = None
+_control = None
+
+
+def preload():
+    """
+    Import the model, let it load its data and start the zygote that tasks
+    are forked from. Call this before starting any threads. Projects can
+    define ``cs_config.functions.preload`` to warm caches, e.g. by reading
+    large data files into memory.
+    """
+    if functions is not None and hasattr(functions, "preload"):
+        print("preloading model data")
+        functions.preload()
+    start()
+
+
+def start():
+    global _zygote, _control
+    ctx = multiprocessing.get_context("fork")
+    _control, zygote_conn = ctx.Pipe()
+    _zygote = ctx.Process(target=_serve, args=(zygote_conn,), daemon=True)
+    _zygote.start()
+    zygote_conn.close()
+
+
+def stop():
+    global _zygote, _control
+    if _control is not None:
+        _control.close()
+    if _zygote is not None:
+        _zygote.join()
+    _zygote = _control = None
+
+
+def _exit_code(status):
+    # Same convention as multiprocessing: -N if killed by signal N.
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _serve(control):
+    """
+    Zygote main loop: fork a child for every task request and tell the task's
+    connection how the child exited once it has been reaped.
+    """
+    global _control
+    # Close the parent's end so that the zygote sees EOF when it is stopped.
+    _control.close()
+    _control = None
+    children = {}
+    while True:
+        if wait([control], timeout=REAP_INTERVAL):
+            try:
+                request = control.recv()
+                conn = Connection(recv_handle(control))
+            except EOFError:
+                break
+            pid = os.fork()
+            if pid == 0:
+                control.close()
+                for other in children.values():
+                    other.close()
+                code = 1
+                try:
+                    _child(conn, *request)
+                    code = 0
+                finally:
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    os._exit(code)
+            children[pid] = conn
+
+        while children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            conn = children.pop(pid)
+            try:
+                conn.send(("exit", _exit_code(status)))
+            except OSError:
+                # The task already got its result and stopped listening.
+                pass
+            conn.close()
+
+    for conn in children.values():
+        conn.close()
+
+
+def _child(conn, task_name, func, task_kwargs, profile):
+    send_lock = threading.Lock()
+
+    def send(message):
+        # Progress may be reported from the model's own threads.
+        with send_lock:
+            conn.send(message)
+
+    # Progress reports are relayed to the parent, which sends the heartbeats.
+    progress.start(lambda report: send(("progress", report)))
+    try:
+        send(("result", run_task(task_name, func, task_kwargs, profile)))
+    finally:
+        progress.stop()
+        conn.close()
+
+
+def _failed(task_name, traceback):
+    return {
+        "task_name": task_name,
+        "status": "FAIL",
+        "traceback": traceback,
+        "meta": {},
+    }
+
+
+def run_task_forked(task_name, func, task_kwargs, profile=False):
+    """
+    Same as ``run_task`` but in a child forked from the zygote. If the child
+    dies without returning a result, e.g. after a segfault or being killed
+    for using too much memory, a failed result is returned instead.
+    """
+    if _control is None:
+        raise RuntimeError("The fork server has not been started.")
+    recv_conn, send_conn = multiprocessing.Pipe(duplex=False)
+    try:
+        with _lock:
+            _control.send((task_name, func, task_kwargs, profile))
+            send_handle(_control, send_conn.fileno(), _zygote.pid)
+    except OSError:
+        recv_conn.close()
+        return _failed(task_name, "The fork server is not running.")
+    finally:
+        send_conn.close()
+
+    res = None
+    try:
+        # Read until the result arrives so a large result can't fill the
+        # pipe and block the child.
+        while res is None:
+            kind, data = recv_conn.recv()
+            if kind == "progress":
+                progress.report(data["fraction"], data["stage"])
+            elif kind == "result":
+                res = data
+            else:
+                res = _failed(task_name, f"Task process exited with code {data}.")
+    except EOFError:
+        res = _failed(task_name, "The fork server exited while running the task.")
+    finally:
+        recv_conn.close()
+    return res
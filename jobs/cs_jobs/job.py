@@ -1,8 +1,12 @@
 import argparse
 import asyncio
+import os
+import time
 
 import cs_storage
-from cs_jobs.task_wrapper import task_wrapper
+import httpx
+from cs_jobs.task_wrapper import run_task, task_wrapper
+from cs_jobs import forkserver, profiling, service, sharding
 
 try:
     from cs_config import functions
@@ -23,23 +27,192 @@ def parse(meta_param_dict, adjustment, errors_warnings):
 
 
 def sim(meta_param_dict, adjustment):
-    outputs = functions.run_model(meta_param_dict, adjustment)
+    if sharding.is_sharded():
+        outputs = sharding.run_sharded(meta_param_dict, adjustment)
+    else:
+        outputs = functions.run_model(meta_param_dict, adjustment)
     print("got result")
-    return cs_storage.serialize_to_json(outputs)
+    with profiling.phase("serialize"):
+        return cs_storage.serialize_to_json(outputs)
 
 
 routes = {"version": version, "defaults": defaults, "parse": parse, "sim": sim}
 
+# Routes that are cheap enough to be served from a long-lived process.
+service_routes = {"version": version, "defaults": defaults, "parse": parse}
+
+# Seconds to wait before polling again after the queue url fails.
+POLL_ERROR_BACKOFF = 5
+
+
+class WorkerState:
+    """
+    Progress of a ``--serve`` worker, reported by its health check.
+    """
+
+    def __init__(self, poll_timeout):
+        self.poll_timeout = poll_timeout
+        self.last_poll = time.time()
+        self.current_task = None
+        self.tasks_run = 0
+
+    def health(self):
+        # A worker is healthy while it runs a task or keeps polling for one.
+        stale = time.time() - self.last_poll > 3 * self.poll_timeout + 30
+        healthy = functions is not None and (self.current_task is not None or not stale)
+        return (
+            healthy,
+            {
+                "status": "ok" if healthy else "unhealthy",
+                "current_task": self.current_task,
+                "tasks_run": self.tasks_run,
+            },
+        )
+
+
+async def serve_queue(
+    queue_url,
+    poll_timeout=20,
+    max_tasks=None,
+    health_port=None,
+    runner=run_task,
+    profile=False,
+):
+    """
+    Run tasks pulled from ``queue_url`` until ``max_tasks`` have been run or
+    the process is stopped. The model package is imported once when this
+    module is loaded and reused for every task. Exiting after ``max_tasks``
+    lets the deployment replace the process before leaks add up.
+    """
+    state = WorkerState(poll_timeout)
+    if health_port:
+        service.serve_health(state.health, health_port)
+
+    # Token for the warm pool, mounted from the pool's secret.
+    pool_token = os.environ.get("POOL_TOKEN")
+    headers = {"Authorization": f"Token {pool_token}"} if pool_token else None
+
+    async with httpx.AsyncClient(timeout=poll_timeout + 10, headers=headers) as client:
+        while max_tasks is None or state.tasks_run < max_tasks:
+            state.last_poll = time.time()
+            try:
+                resp = await client.get(queue_url, params={"timeout": poll_timeout})
+                if resp.status_code == 204:
+                    continue
+                resp.raise_for_status()
+            except Exception as e:
+                print(f"Exception when polling queue url: {queue_url}")
+                print(f"Exception: {e}")
+                await asyncio.sleep(POLL_ERROR_BACKOFF)
+                continue
+
+            task = resp.json()
+            print("got task", task)
+            state.current_task = task["task_name"]
+            try:
+                await task_wrapper(
+                    task["callback_url"],
+                    task["task_name"],
+                    routes[task["task_name"]],
+                    runner=runner,
+                    profile=profile,
+                )
+            except Exception as e:
+                print(f"Exception when running task: {e}")
+            finally:
+                state.current_task = None
+                state.tasks_run += 1
+
+    print(f"ran {state.tasks_run} tasks, exiting.")
+
 
 def main(args: argparse.Namespace):
-    asyncio.run(
-        task_wrapper(args.callback_url, args.route_name, routes[args.route_name])
-    )
+    runner = run_task
+    if args.fork:
+        forkserver.preload()
+        runner = forkserver.run_task_forked
+
+    if args.http_port:
+        service.serve(service_routes, port=args.http_port, runner=runner)
+    elif args.serve:
+        asyncio.run(
+            serve_queue(
+                args.serve,
+                poll_timeout=args.poll_timeout,
+                max_tasks=args.max_tasks,
+                health_port=args.health_port,
+                runner=runner,
+                profile=args.profile,
+            )
+        )
+    else:
+        asyncio.run(
+            task_wrapper(
+                args.callback_url,
+                args.route_name,
+                routes[args.route_name],
+                profile=args.profile,
+            )
+        )
 
 
 def cli():
     parser = argparse.ArgumentParser(description="CLI for C/S jobs.")
-    parser.add_argument("--callback-url", required=True)
-    parser.add_argument("--route-name", required=True)
+    parser.add_argument("--callback-url", required=False)
+    parser.add_argument("--route-name", required=False)
+    parser.add_argument(
+        "--serve",
+        "--pool-url",
+        dest="serve",
+        required=False,
+        help=(
+            "Keep running and pull tasks from this queue url (e.g. a warm pool) "
+            "instead of running a single route."
+        ),
+    )
+    parser.add_argument(
+        "--max-tasks",
+        type=int,
+        required=False,
+        help="With --serve, exit after running this many tasks.",
+    )
+    parser.add_argument(
+        "--poll-timeout",
+        type=int,
+        default=20,
+        help="With --serve, seconds to wait for a task on each poll.",
+    )
+    parser.add_argument(
+        "--health-port",
+        type=int,
+        required=False,
+        help="With --serve, serve GET /health/ on this port.",
+    )
+    parser.add_argument(
+        "--http-port",
+        type=int,
+        required=False,
+        help="Serve the version, defaults, and parse routes over HTTP.",
+    )
+    parser.add_argument(
+        "--fork",
+        action="store_true",
+        help=(
+            "With --serve or --http-port, run each task in a forked child of a "
+            "process that has already imported the model."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile tasks and upload the results to the workers API.",
+    )
     args = parser.parse_args()
+    if not (args.serve or args.http_port) and not (
+        args.callback_url and args.route_name
+    ):
+        parser.error(
+            "--callback-url and --route-name are required without --serve "
+            "or --http-port"
+        )
     main(args)
@@ -0,0 +1,163 @@
+"""
+Opt-in profiling of model runs.
+
+When profiling is enabled for a task, the model function runs under
+cProfile and tracemalloc. A compact summary is added to the result's
+``meta["profile"]`` and the full cProfile stats are uploaded to the workers
+API as the job's ``profile.pstats`` artifact, which can be loaded with
+``pstats.Stats``.
+
+Profiling is enabled with ``cs-jobs --profile``, the ``CS_JOBS_PROFILE``
+environment variable, or per job through the workers API.
+"""
+import contextlib
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+ENABLED = os.environ.get("CS_JOBS_PROFILE", "").lower() in ("1", "true", "yes")
+
+TOP_N = int(os.environ.get("CS_JOBS_PROFILE_TOP_N", 20))
+
+_local = threading.local()
+
+
+def _cpu_time():
+    return time.process_time()
+
+
+class Profiler:
+    """
+    Collect per-phase wall and CPU times and, while ``profile`` is active,
+    cProfile stats and traced memory allocations.
+
+    Phases may be nested. Each phase is charged only for the time spent
+    outside of its nested phases, so phase times add up to the total.
+    """
+
+    def __init__(self, top_n=TOP_N):
+        self.top_n = top_n
+        self.phases = {}
+        self._stack = []
+        self.stats = None
+        self.peak_traced_memory = None
+        self.top_allocations = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        frame = {"wall": 0.0, "cpu": 0.0}
+        self._stack.append(frame)
+        wall_start, cpu_start = time.time(), _cpu_time()
+        try:
+            yield
+        finally:
+            wall = time.time() - wall_start
+            cpu = _cpu_time() - cpu_start
+            self._stack.pop()
+            totals = self.phases.setdefault(name, {"wall_time": 0.0, "cpu_time": 0.0})
+            totals["wall_time"] += wall - frame["wall"]
+            totals["cpu_time"] += cpu - frame["cpu"]
+            if self._stack:
+                self._stack[-1]["wall"] += wall
+                self._stack[-1]["cpu"] += cpu
+
+    @contextlib.contextmanager
+    def profile(self):
+        profiler = cProfile.Profile()
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self.peak_traced_memory = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            self.top_allocations = [
+                {"location": str(stat.traceback), "size": stat.size}
+                for stat in snapshot.statistics("lineno")[: self.top_n]
+            ]
+            self.stats = pstats.Stats(profiler, stream=io.StringIO())
+
+    def top_functions(self):
+        if self.stats is None:
+            return []
+        rows = []
+        for (filename, lineno, funcname), stat in self.stats.stats.items():
+            _, ncalls, tottime, cumtime, _ = stat
+            rows.append(
+                {
+                    "function": f"{filename}:{lineno}({funcname})",
+                    "calls": ncalls,
+                    "tottime": tottime,
+                    "cumtime": cumtime,
+                }
+            )
+        rows.sort(key=lambda row: row["cumtime"], reverse=True)
+        return rows[: self.top_n]
+
+    def summary(self):
+        return {
+            "phases": self.phases,
+            "top_functions": self.top_functions(),
+            "peak_traced_memory_bytes": self.peak_traced_memory,
+            "top_allocations": self.top_allocations,
+        }
+
+    def dump(self):
+        """
+        Return the cProfile stats in the format written by
+        ``pstats.Stats.dump_stats``.
+        """
+        if self.stats is None:
+            return None
+        return marshal.dumps(self.stats.stats)
+
+
+@contextlib.contextmanager
+def profiled(profiler):
+    """
+    Profile the ``compute`` phase with ``profiler``, or do nothing if it is
+    ``None``.
+    """
+    if profiler is None:
+        yield
+        return
+    with profiler.profile(), profiler.phase("compute"):
+        yield
+
+
+def start(profiler):
+    _local.profiler = profiler
+
+
+def stop():
+    _local.profiler = None
+
+
+def current():
+    return getattr(_local, "profiler", None)
+
+
+@contextlib.contextmanager
+def phase(name):
+    """
+    Time a phase of the running task, e.g. ``serialize``. Does nothing if the
+    task is not being profiled.
+    """
+    profiler = current()
+    if profiler is None:
+        yield
+    else:
+        with profiler.phase(name):
+            yield
@@ -0,0 +1,60 @@
+"""
+Progress reporting for model functions.
+
+A ``cs_config`` function can report how far along it is with::
+
+    from cs_jobs import progress
+
+    progress.report(0.25, "Running 2022 through 2025")
+
+Reports are sent to the workers API with the job's heartbeats and shown on
+the simulation's page. Calling ``report`` outside of a job does nothing.
+"""
+import threading
+import time
+
+_lock = threading.Lock()
+_listener = None
+_current = None
+
+
+def report(fraction=None, stage=None):
+    """
+    Report progress for the running task.
+
+    Parameters
+    ----------
+    fraction: float between 0 and 1, or None if unknown.
+    stage: short description of what the task is doing.
+    """
+    global _current
+    if fraction is not None:
+        fraction = min(max(float(fraction), 0.0), 1.0)
+    with _lock:
+        _current = {"fraction": fraction, "stage": stage, "reported_at": time.time()}
+        listener = _listener
+        snapshot = dict(_current)
+    if listener is not None:
+        listener(snapshot)
+
+
+def current():
+    with _lock:
+        return dict(_current) if _current is not None else None
+
+
+def start(listener=None):
+    """
+    Reset progress for a new task. ``listener`` is called with every report,
+    possibly from another thread.
+    """
+    global _current, _listener
+    with _lock:
+        _current = None
+        _listener = listener
+
+
+def stop():
+    global _listener
+    with _lock:
+        _listener = None
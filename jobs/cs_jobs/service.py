@@ -0,0 +1,87 @@
+"""
+Serve the lightweight routes (``version``, ``defaults``, ``parse``) over HTTP
+from a long-lived process so that ``cs_config`` is imported once and its data
+stays loaded in memory.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from cs_jobs.task_wrapper import run_task
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    def _respond(self, status, data):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class HealthHandler(JSONHandler):
+    # Returns (healthy, details).
+    check = None
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/health":
+            self._respond(404, {"detail": "Not found."})
+            return
+        healthy, details = type(self).check()
+        self._respond(200 if healthy else 503, details)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TaskHandler(JSONHandler):
+    routes = {}
+    runner = None
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self._respond(200, {"status": "ok"})
+        else:
+            self._respond(404, {"detail": "Not found."})
+
+    def do_POST(self):
+        route_name = self.path.strip("/")
+        if route_name not in self.routes:
+            self._respond(404, {"detail": f"Unknown route: {route_name}"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._respond(400, {"detail": "Invalid JSON."})
+            return
+
+        res = type(self).runner(
+            route_name, self.routes[route_name], body.get("task_kwargs")
+        )
+        self._respond(200, res)
+
+
+def serve(routes, port=8010, runner=run_task):
+    # Requests are handled one at a time since model code is not assumed to
+    # be thread safe. Scale by adding replicas.
+    handler = type(
+        "Handler", (TaskHandler,), {"routes": routes, "runner": staticmethod(runner)}
+    )
+    server = HTTPServer(("0.0.0.0", port), handler)
+    print(f"serving {', '.join(routes)} on port {port}")
+    server.serve_forever()
+
+
+def serve_health(check, port):
+    """
+    Serve ``GET /health/`` from a daemon thread. ``check`` returns a
+    ``(healthy, details)`` tuple and is called for every request.
+    """
+    handler = type("Handler", (HealthHandler,), {"check": staticmethod(check)})
+    server = HTTPServer(("0.0.0.0", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
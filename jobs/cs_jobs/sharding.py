@@ -0,0 +1,185 @@
+"""
+Sharded execution of simulations.
+
+A project can split a simulation into independent parts, e.g. one per
+year of a multi-year projection, by defining two functions next to
+``run_model`` in ``cs_config.functions``::
+
+    def split_tasks(meta_param_dict, adjustment):
+        # Return a list of keyword arguments for run_model, one per part.
+        return [
+            {"meta_param_dict": {**meta_param_dict, "year": year},
+             "adjustment": adjustment}
+            for year in range(2021, 2031)
+        ]
+
+    def combine_outputs(parts):
+        # Combine the run_model outputs of the parts, in order.
+        ...
+
+The parts are run by a backend chosen with ``CS_JOBS_SHARD_BACKEND``:
+
+- ``process`` (default): a pool of ``CS_JOBS_SHARD_WORKERS`` processes in the
+  job's pod, forked after the model has been imported. By default there is
+  one worker per CPU in the pod's CPU limit.
+- ``dask``: the Dask cluster at ``DASK_SCHEDULER_ADDRESS``, so the parts can
+  run on many pods.
+- ``serial``: one after another in the current process, e.g. for debugging.
+"""
+import concurrent.futures
+import math
+import multiprocessing
+import os
+
+from cs_jobs import progress
+
+try:
+    from cs_config import functions
+except ImportError:
+    functions = None
+
+
+def is_sharded():
+    return (
+        functions is not None
+        and hasattr(functions, "split_tasks")
+        and hasattr(functions, "combine_outputs")
+    )
+
+
+# The container's CPU limit, for cgroup v2 and v1.
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_CFS_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_CFS_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_limit():
+    """
+    Number of CPUs the container may use according to its cgroup CPU quota,
+    or ``None`` if it has no quota.
+    """
+    cpu_max = _read(CGROUP_CPU_MAX)
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+    else:
+        quota, period = _read(CGROUP_CFS_QUOTA), _read(CGROUP_CFS_PERIOD)
+    try:
+        quota, period = int(quota), int(period)
+    except (TypeError, ValueError):
+        # "max" or missing files: no quota.
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return max(math.ceil(quota / period), 1)
+
+
+def default_workers():
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    # The affinity mask lists all of the node's CPUs, but the pod may only
+    # use as many as its CPU limit.
+    limit = cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+
+def _run_part(kwargs):
+    return functions.run_model(**kwargs)
+
+
+def _init_worker():
+    # Workers inherit the task's progress listener, which is not usable from
+    # another process. Progress is reported by the parent as parts finish.
+    progress.stop()
+
+
+class SerialBackend:
+    def map(self, func, items):
+        for item in items:
+            yield func(item)
+
+    def close(self):
+        pass
+
+
+class ProcessPoolBackend:
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or default_workers()
+
+    def map(self, func, items):
+        # Fork so that the workers start with the model already imported.
+        ctx = multiprocessing.get_context("fork")
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=ctx, initializer=_init_worker
+        ) as executor:
+            yield from executor.map(func, items)
+
+    def close(self):
+        pass
+
+
+class DaskBackend:
+    def __init__(self, address=None):
+        from dask.distributed import Client
+
+        self.client = Client(address)
+
+    def map(self, func, items):
+        futures = self.client.map(func, items, pure=False)
+        for future in futures:
+            yield future.result()
+
+    def close(self):
+        self.client.close()
+
+
+BACKENDS = {
+    "serial": SerialBackend,
+    "process": ProcessPoolBackend,
+    "dask": DaskBackend,
+}
+
+
+def get_backend(name=None):
+    name = name or os.environ.get("CS_JOBS_SHARD_BACKEND", "process")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown shard backend: {name}")
+    if name == "process":
+        workers = os.environ.get("CS_JOBS_SHARD_WORKERS")
+        return ProcessPoolBackend(int(workers) if workers else None)
+    if name == "dask":
+        return DaskBackend(os.environ.get("DASK_SCHEDULER_ADDRESS"))
+    return BACKENDS[name]()
+
+
+def run_sharded(meta_param_dict, adjustment, backend=None):
+    """
+    Split a simulation with ``split_tasks``, run the parts with ``backend``,
+    and combine their outputs with ``combine_outputs``. A backend created
+    here is closed when the parts are done.
+    """
+    owned = backend is None
+    if owned:
+        backend = get_backend()
+    try:
+        parts = functions.split_tasks(meta_param_dict, adjustment)
+        print(f"running {len(parts)} parts with {backend.__class__.__name__}")
+        outputs = []
+        for i, output in enumerate(backend.map(_run_part, parts)):
+            outputs.append(output)
+            progress.report(
+                (i + 1) / len(parts), f"Finished {i + 1} of {len(parts)} parts"
+            )
+    finally:
+        if owned:
+            backend.close()
+    return functions.combine_outputs(outputs)
@@ -1,14 +1,109 @@
+import asyncio
+import functools
 import os
+import resource
+import threading
 import time
 import traceback
 
 import httpx
 
+from cs_jobs import profiling, progress
 
+_import_start = time.time()
 try:
     from cs_config import functions
 except ImportError as ie:
     pass
+# Time spent importing the model package, reported when profiling.
+IMPORT_SECONDS = time.time() - _import_start
+
+HEARTBEAT_INTERVAL = int(os.environ.get("HEARTBEAT_INTERVAL", 30))
+# Progress reports are sent early, but not more often than this.
+PROGRESS_INTERVAL = int(os.environ.get("PROGRESS_INTERVAL", 5))
+# How often the memory use of a running task is sampled.
+USAGE_SAMPLE_INTERVAL = float(os.environ.get("USAGE_SAMPLE_INTERVAL", 0.5))
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _descendants(pid):
+    pids = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        return []
+    for child in list(pids):
+        pids.extend(_descendants(child))
+    return pids
+
+
+class UsageMeter:
+    """
+    Measure the wall time, CPU time and peak memory of one task, including
+    the child processes that it starts, e.g. shards or forks.
+
+    ``ru_maxrss`` only covers the lifetime of a process, so on its own it
+    would report the largest earlier task for every task run by a
+    long-lived worker. Instead, the memory of the process and its
+    descendants is sampled while the task runs, and the high-water marks
+    are only used if they went up during the task.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or USAGE_SAMPLE_INTERVAL
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.peak_rss_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        pid = os.getpid()
+        rss = _rss_bytes(pid) + sum(_rss_bytes(child) for child in _descendants(pid))
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._self_start = resource.getrusage(resource.RUSAGE_SELF)
+        self._children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._wall_start = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_time = time.time() - self._wall_start
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        self_finish = resource.getrusage(resource.RUSAGE_SELF)
+        children_finish = resource.getrusage(resource.RUSAGE_CHILDREN)
+        for start, finish in (
+            (self._self_start, self_finish),
+            (self._children_start, children_finish),
+        ):
+            self.cpu_time += (finish.ru_utime + finish.ru_stime) - (
+                start.ru_utime + start.ru_stime
+            )
+            # In kilobytes on Linux.
+            if finish.ru_maxrss > start.ru_maxrss:
+                self.peak_rss_bytes = max(self.peak_rss_bytes, finish.ru_maxrss * 1024)
+        return False
 
 
 async def get_task_kwargs(callback_url, retries=5):
@@ -38,23 +133,28 @@ async def get_task_kwargs(callback_url, retries=5):
                 raise e
             wait_time = 2 ** retry
             print(f"Trying again in {wait_time} seconds.")
-            time.sleep(wait_time)
+            await asyncio.sleep(wait_time)
 
 
-async def task_wrapper(callback_url, task_name, func, task_kwargs=None):
-    print("async task", callback_url, func, task_kwargs)
+def run_task(task_name, func, task_kwargs, profile=False):
+    """
+    Run ``func`` with ``task_kwargs`` and build the result payload that is
+    posted back to the workers API.
+
+    If ``profile`` is true, a profiling summary is added to ``meta`` and the
+    raw cProfile stats are returned under ``profile_stats``.
+    """
     start = time.time()
+    usage = UsageMeter()
     traceback_str = None
     res = {
         "task_name": task_name,
     }
+    profiler = profiling.Profiler() if profile else None
+    profiling.start(profiler)
     try:
-        if task_kwargs is None:
-            print("getting task_kwargs")
-            resp = await get_task_kwargs(callback_url)
-            task_kwargs = resp.json()["inputs"]
-        print("got task_kwargs", task_kwargs)
-        outputs = func(**(task_kwargs or {}))
+        with usage, profiling.profiled(profiler):
+            outputs = func(**(task_kwargs or {}))
         res.update(
             {
                 "model_version": functions.get_version(),
@@ -64,12 +164,22 @@ async def task_wrapper(callback_url, task_name, func, task_kwargs=None):
         )
     except Exception:
         traceback_str = traceback.format_exc()
+    finally:
+        profiling.stop()
 
     finish = time.time()
 
     if "meta" not in res:
         res["meta"] = {}
     res["meta"]["task_times"] = [finish - start]
+    # Only covers the model run, unlike task_times, which the caller extends
+    # with fetching inputs and uploading results.
+    res["meta"]["compute_time"] = usage.wall_time
+    res["meta"]["cpu_time"] = usage.cpu_time
+    res["meta"]["peak_rss_bytes"] = usage.peak_rss_bytes
+    if profiler is not None:
+        res["meta"]["profile"] = profiler.summary()
+        res["profile_stats"] = profiler.dump()
 
     if traceback_str is None:
         res["status"] = "SUCCESS"
@@ -77,6 +187,110 @@ async def task_wrapper(callback_url, task_name, func, task_kwargs=None):
         res["status"] = "FAIL"
         res["traceback"] = traceback_str
 
+    return res
+
+
+def heartbeat_url(callback_url):
+    return f"{callback_url.rstrip('/')}/heartbeat/"
+
+
+async def send_heartbeats(callback_url, interval=HEARTBEAT_INTERVAL):
+    """
+    Tell the workers API that the job is still alive every ``interval``
+    seconds until cancelled. Each heartbeat carries the latest progress
+    report, and a new report triggers a heartbeat after at most
+    ``PROGRESS_INTERVAL`` seconds.
+    """
+    url = heartbeat_url(callback_url)
+    loop = asyncio.get_running_loop()
+    reported = asyncio.Event()
+    progress.start(lambda _: loop.call_soon_threadsafe(reported.set))
+    try:
+        async with httpx.AsyncClient() as client:
+            while True:
+                reported.clear()
+                try:
+                    resp = await client.post(
+                        url, json={"progress": progress.current()}, timeout=10
+                    )
+                    resp.raise_for_status()
+                except Exception as e:
+                    print(f"Exception when sending heartbeat: {e}")
+                await asyncio.sleep(min(PROGRESS_INTERVAL, interval))
+                try:
+                    await asyncio.wait_for(
+                        reported.wait(), timeout=max(interval - PROGRESS_INTERVAL, 0)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        progress.stop()
+
+
+async def upload_artifact(callback_url, name, content):
+    async with httpx.AsyncClient() as client:
+        resp = await client.post(
+            f"{callback_url.rstrip('/')}/artifacts/{name}/",
+            content=content,
+            headers={"Content-Type": "application/octet-stream"},
+            timeout=120,
+        )
+    resp.raise_for_status()
+
+
+async def task_wrapper(
+    callback_url, task_name, func, task_kwargs=None, runner=run_task, profile=False
+):
+    print("async task", callback_url, func, task_kwargs)
+    start = time.time()
+    profile = profile or profiling.ENABLED
+    try:
+        if task_kwargs is None:
+            print("getting task_kwargs")
+            resp = await get_task_kwargs(callback_url)
+            job = resp.json()
+            task_kwargs = job["inputs"]
+            profile = profile or bool(job.get("profile"))
+        print("got task_kwargs", task_kwargs)
+    except Exception:
+        res = {
+            "task_name": task_name,
+            "status": "FAIL",
+            "traceback": traceback.format_exc(),
+            "meta": {},
+        }
+    else:
+        # Run the model off of the event loop so that heartbeats keep going
+        # while it works.
+        heartbeats = asyncio.create_task(send_heartbeats(callback_url))
+        try:
+            loop = asyncio.get_running_loop()
+            res = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    runner, task_name, func, task_kwargs, profile=profile
+                ),
+            )
+        finally:
+            heartbeats.cancel()
+    fetch_time = time.time() - start - sum(res["meta"].get("task_times", []))
+
+    profile_stats = res.pop("profile_stats", None)
+    if "profile" in res["meta"]:
+        phases = res["meta"]["profile"]["phases"]
+        phases["fetch"] = {"wall_time": fetch_time}
+        phases["import"] = {"wall_time": IMPORT_SECONDS}
+        if profile_stats is not None:
+            upload_start = time.time()
+            try:
+                await upload_artifact(callback_url, "profile.pstats", profile_stats)
+                res["meta"]["profile"]["artifact"] = "profile.pstats"
+            except Exception as e:
+                print(f"Exception when uploading profile: {e}")
+            phases["upload"] = {"wall_time": time.time() - upload_start}
+
+    res["meta"]["task_times"] = [time.time() - start]
+
     print("saving results...")
     async with httpx.AsyncClient() as client:
         resp = await client.post(callback_url, json=res, timeout=120)
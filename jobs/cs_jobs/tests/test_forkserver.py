@@ -0,0 +1,76 @@
+import os
+import signal
+import threading
+
+import pytest
+
+from cs_jobs import forkserver, progress, task_wrapper
+
+
+class functions:
+    @staticmethod
+    def get_version():
+        return "1.0.0"
+
+
+def parent_pid():
+    return os.getppid()
+
+
+def report_progress(n_threads):
+    def report(i):
+        for j in range(100):
+            progress.report(j / 100, f"thread {i}")
+
+    threads = [threading.Thread(target=report, args=(i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return "x" * (1024 * 1024)
+
+
+def crash():
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+@pytest.fixture
+def zygote(monkeypatch):
+    monkeypatch.setattr(task_wrapper, "functions", functions, raising=False)
+    forkserver.start()
+    yield forkserver._zygote
+    forkserver.stop()
+
+
+def test_tasks_are_forked_from_zygote(zygote):
+    res = forkserver.run_task_forked("sim", parent_pid, {})
+    assert res["status"] == "SUCCESS"
+    assert res["outputs"] == zygote.pid != os.getpid()
+
+
+def test_progress_is_relayed(zygote):
+    reports = []
+    progress.start(reports.append)
+    try:
+        res = forkserver.run_task_forked("sim", report_progress, {"n_threads": 4})
+    finally:
+        progress.stop()
+
+    assert res["status"] == "SUCCESS"
+    assert res["outputs"] == "x" * (1024 * 1024)
+    assert len(reports) == 400
+    assert {r["stage"] for r in reports} == {f"thread {i}" for i in range(4)}
+
+
+def test_child_killed(zygote):
+    res = forkserver.run_task_forked("sim", crash, {})
+    assert res["status"] == "FAIL"
+    assert res["traceback"] == "Task process exited with code -9."
+
+    # The zygote keeps serving tasks.
+    assert forkserver.run_task_forked("sim", parent_pid, {})["status"] == "SUCCESS"
+
+
+def test_not_started():
+    with pytest.raises(RuntimeError):
+        forkserver.run_task_forked("sim", parent_pid, {})
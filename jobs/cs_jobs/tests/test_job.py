@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from cs_jobs import job
+
+QUEUE_URL = "http://api/pools/owner/title/v1/next/"
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    """
+    Serve ``responses`` from the queue url, one per poll, and record the tasks
+    that ``serve_queue`` runs.
+    """
+    responses = []
+    polls = []
+    ran = []
+
+    def handler(request):
+        polls.append(request)
+        if not responses:
+            return httpx.Response(204)
+        return responses.pop(0)
+
+    transport = httpx.MockTransport(handler)
+    client = httpx.AsyncClient
+
+    def mock_client(**kwargs):
+        return client(transport=transport, **kwargs)
+
+    async def mock_task_wrapper(callback_url, task_name, func, **kwargs):
+        ran.append((callback_url, task_name))
+        if task_name == "parse":
+            raise ValueError("task failed")
+
+    monkeypatch.setattr(job.httpx, "AsyncClient", mock_client)
+    monkeypatch.setattr(job, "task_wrapper", mock_task_wrapper)
+    monkeypatch.setattr(job, "POLL_ERROR_BACKOFF", 0)
+    return responses, polls, ran
+
+
+def task(task_name):
+    return httpx.Response(
+        200, json={"callback_url": f"http://api/{task_name}/", "task_name": task_name}
+    )
+
+
+def test_serve_queue_exits_after_max_tasks(queue):
+    responses, polls, ran = queue
+    responses.extend([httpx.Response(204), task("sim"), task("parse"), task("sim")])
+
+    asyncio.run(job.serve_queue(QUEUE_URL, poll_timeout=1, max_tasks=2))
+
+    # A 204 means there was no task, and a failed task still counts.
+    assert ran == [("http://api/sim/", "sim"), ("http://api/parse/", "parse")]
+    assert len(polls) == 3
+    assert polls[0].url.params["timeout"] == "1"
+    assert len(responses) == 1
+
+
+def test_serve_queue_backs_off_on_errors(queue, monkeypatch):
+    responses, polls, ran = queue
+    responses.extend([httpx.Response(500), httpx.Response(502), task("sim")])
+    sleeps = []
+    sleep = asyncio.sleep
+
+    async def mock_sleep(delay):
+        sleeps.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(job, "POLL_ERROR_BACKOFF", 5)
+    monkeypatch.setattr(job.asyncio, "sleep", mock_sleep)
+
+    asyncio.run(job.serve_queue(QUEUE_URL, poll_timeout=1, max_tasks=1))
+
+    assert sleeps == [5, 5]
+    assert ran == [("http://api/sim/", "sim")]
+
+
+def test_serve_queue_sends_pool_token(queue, monkeypatch):
+    responses, polls, ran = queue
+    responses.append(task("sim"))
+    monkeypatch.setenv("POOL_TOKEN", "secret")
+
+    asyncio.run(job.serve_queue(QUEUE_URL, poll_timeout=1, max_tasks=1))
+
+    assert polls[0].headers["Authorization"] == "Token secret"
+
+
+def test_health(monkeypatch):
+    monkeypatch.setattr(job, "functions", object())
+    state = job.WorkerState(poll_timeout=20)
+    healthy, status = state.health()
+    assert healthy
+    assert status == {"status": "ok", "current_task": None, "tasks_run": 0}
+
+    # Stopped polling for longer than three poll timeouts plus slack.
+    state.last_poll = time.time() - 91
+    healthy, status = state.health()
+    assert not healthy
+    assert status["status"] == "unhealthy"
+
+    # Long running tasks do not make the worker unhealthy.
+    state.current_task = "sim"
+    healthy, status = state.health()
+    assert healthy
+
+
+def test_health_without_model(monkeypatch):
+    monkeypatch.setattr(job, "functions", None)
+    healthy, status = job.WorkerState(poll_timeout=20).health()
+    assert not healthy
+    assert status["status"] == "unhealthy"
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from cs_jobs import progress, sharding
+
+
+class functions:
+    @staticmethod
+    def split_tasks(meta_param_dict, adjustment):
+        return [
+            {"meta_param_dict": {**meta_param_dict, "year": year}, "adjustment": {}}
+            for year in range(2021, 2025)
+        ]
+
+    @staticmethod
+    def run_model(meta_param_dict, adjustment):
+        progress.report(0.5, "running in a part")
+        return {"year": meta_param_dict["year"], "pid": os.getpid()}
+
+    @staticmethod
+    def combine_outputs(parts):
+        return parts
+
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(sharding, "functions", functions)
+
+
+class ClosingBackend(sharding.SerialBackend):
+    closed = False
+
+    def close(self):
+        type(self).closed = True
+
+
+@pytest.mark.parametrize("backend", ["serial", "process"])
+def test_run_sharded(model, monkeypatch, tmp_path, backend):
+    monkeypatch.setenv("CS_JOBS_SHARD_WORKERS", "2")
+    log = tmp_path / "progress.log"
+
+    def listener(report):
+        with open(log, "a") as f:
+            f.write(f"{os.getpid()} {report['stage']}\n")
+
+    progress.start(listener)
+    try:
+        outputs = sharding.run_sharded({}, {}, sharding.get_backend(backend))
+    finally:
+        progress.stop()
+
+    assert [o["year"] for o in outputs] == [2021, 2022, 2023, 2024]
+    pids = {o["pid"] for o in outputs}
+    if backend == "serial":
+        assert pids == {os.getpid()}
+    else:
+        assert os.getpid() not in pids
+
+    # Only the parent reports progress: workers don't call the listener
+    # they inherited from the parent.
+    lines = log.read_text().splitlines()
+    assert {line.split(" ")[0] for line in lines} == {str(os.getpid())}
+    assert lines[-1].endswith("Finished 4 of 4 parts")
+
+
+def test_run_sharded_closes_backend(model, monkeypatch):
+    monkeypatch.setitem(sharding.BACKENDS, "closing", ClosingBackend)
+    monkeypatch.setenv("CS_JOBS_SHARD_BACKEND", "closing")
+    assert len(sharding.run_sharded({}, {})) == 4
+    assert ClosingBackend.closed
+
+
+@pytest.mark.parametrize(
+    "cpu_max,expected",
+    [("max 100000", None), ("200000 100000", 2), ("50000 100000", 1)],
+)
+def test_cpu_limit(monkeypatch, tmp_path, cpu_max, expected):
+    path = tmp_path / "cpu.max"
+    path.write_text(cpu_max + "\n")
+    monkeypatch.setattr(sharding, "CGROUP_CPU_MAX", str(path))
+    assert sharding.cpu_limit() == expected
+
+
+def test_cpu_limit_cgroup_v1(monkeypatch, tmp_path):
+    (tmp_path / "quota").write_text("300000\n")
+    (tmp_path / "period").write_text("100000\n")
+    monkeypatch.setattr(sharding, "CGROUP_CPU_MAX", str(tmp_path / "missing"))
+    monkeypatch.setattr(sharding, "CGROUP_CFS_QUOTA", str(tmp_path / "quota"))
+    monkeypatch.setattr(sharding, "CGROUP_CFS_PERIOD", str(tmp_path / "period"))
+    assert sharding.cpu_limit() == 3
+
+
+def test_default_workers_uses_cpu_limit(monkeypatch):
+    monkeypatch.setattr(sharding.os, "sched_getaffinity", lambda pid: set(range(64)))
+    monkeypatch.setattr(sharding, "cpu_limit", lambda: 4)
+    assert sharding.default_workers() == 4
+    monkeypatch.setattr(sharding, "cpu_limit", lambda: None)
+    assert sharding.default_workers() == 64
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+import time
+
+from cs_jobs import task_wrapper
+from cs_jobs.task_wrapper import UsageMeter
+
+MB = 1024 * 1024
+
+
+def allocate(n_mb):
+    data = b"x" * (n_mb * MB)
+    time.sleep(0.2)
+    return len(data)
+
+
+def test_usage_meter_is_per_task():
+    with UsageMeter(interval=0.05) as big:
+        allocate(200)
+    with UsageMeter(interval=0.05) as small:
+        allocate(10)
+
+    assert big.peak_rss_bytes >= 200 * MB
+    # A later, smaller task does not report the earlier task's peak.
+    assert small.peak_rss_bytes < big.peak_rss_bytes - 100 * MB
+
+
+def test_usage_meter_counts_children():
+    script = "import time; data = b'x' * (150 * 1024 * 1024); time.sleep(0.3)"
+    with UsageMeter(interval=0.05) as usage:
+        subprocess.run([sys.executable, "-c", script], check=True)
+
+    assert usage.peak_rss_bytes >= 150 * MB
+    assert usage.cpu_time > 0
+
+
+def test_run_task_reports_usage(monkeypatch):
+    class functions:
+        @staticmethod
+        def get_version():
+            return "1.0.0"
+
+    monkeypatch.setattr(task_wrapper, "functions", functions, raising=False)
+    monkeypatch.setattr(task_wrapper, "USAGE_SAMPLE_INTERVAL", 0.05)
+    res = task_wrapper.run_task("sim", allocate, {"n_mb": 50})
+    assert res["status"] == "SUCCESS"
+    assert res["outputs"] == 50 * MB
+    assert res["meta"]["peak_rss_bytes"] >= 50 * MB
+    assert res["meta"]["cpu_time"] >= 0
+    assert 0 < res["meta"]["compute_time"] <= res["meta"]["task_times"][0]
@@ -1,40 +1,53 @@
 import argparse
 import json
+import os
+import threading
 
 
 class SecretNotFound(Exception):
     pass
 
 
-class Secrets:
-    def __init__(self, project):
-        self.project = project
+class Backend:
+    """
+    Storage for secret values. Backends are shared between ``Secrets``
+    instances, so implementations should hold on to expensive clients.
+    """
+
+    def get(self, project, name):
+        raise NotImplementedError()
+
+    def set(self, project, name, value):
+        raise NotImplementedError()
+
+    def delete(self, project, name):
+        raise NotImplementedError()
+
+
+class GoogleSecretManagerBackend(Backend):
+    def __init__(self):
         self.client = None
 
-    def set(self, name, value):
-        return self._set_secret(name, value)
+    def get(self, project, name):
+        from google.api_core import exceptions
 
-    def get(self, name):
-        return self._get_secret(name)
+        client = self._client()
 
-    def get_or_none(self, name):
         try:
-            return self.get(name)
-        except SecretNotFound:
-            return None
-
-    def list(self):
-        raise NotImplementedError()
+            response = client.access_secret_version(
+                request={"name": f"projects/{project}/secrets/{name}/versions/latest"}
+            )
 
-    def delete(self, name):
-        return self._delete_secret(name)
+            return response.payload.data.decode("utf-8")
+        except (exceptions.NotFound, exceptions.PermissionDenied):
+            raise SecretNotFound()
 
-    def _set_secret(self, name, value):
+    def set(self, project, name, value):
         client = self._client()
         try:
-            self._get_secret(name)
+            self.get(project, name)
         except SecretNotFound:
-            parent = f"projects/{self.project}"
+            parent = f"projects/{project}"
             client.create_secret(
                 request={
                     "parent": parent,
@@ -42,39 +55,22 @@ class Secrets:
                     "secret": {"replication": {"automatic": {}}},
                 }
             )
-        parent = client.secret_path(self.project, name)
         secret_bytes = value.encode("utf-8")
 
-        secret_parent = client.secret_path(self.project, name)
+        secret_parent = client.secret_path(project, name)
 
         return client.add_secret_version(
             request={"parent": secret_parent, "payload": {"data": secret_bytes}}
         )
 
-    def _get_secret(self, name):
-        from google.api_core import exceptions
-
-        client = self._client()
-
+    def delete(self, project, name):
         try:
-            response = client.access_secret_version(
-                request={
-                    "name": f"projects/{self.project}/secrets/{name}/versions/latest"
-                }
-            )
-
-            return response.payload.data.decode("utf-8")
-        except (exceptions.NotFound, exceptions.PermissionDenied):
-            raise SecretNotFound()
-
-    def _delete_secret(self, name):
-        try:
-            self._get_secret(name)
+            self.get(project, name)
         except SecretNotFound:
             return
 
         client = self._client()
-        name = client.secret_path(self.project, name)
+        name = client.secret_path(project, name)
         client.delete_secret(name)
 
     def _client(self):
@@ -86,3 +82,102 @@ class Secrets:
         self.client = secretmanager_v1.SecretManagerServiceClient()
 
         return self.client
+
+
+class LocalBackend(Backend):
+    """
+    Keeps secrets in memory and, if ``path`` is given, in a JSON file of the
+    form ``{project: {name: value}}``. Useful for local development and tests.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {}
+        if path is not None and os.path.exists(path):
+            with open(path, "r") as f:
+                self.data = json.loads(f.read())
+
+    def get(self, project, name):
+        with self.lock:
+            try:
+                return self.data[project][name]
+            except KeyError:
+                raise SecretNotFound()
+
+    def set(self, project, name, value):
+        with self.lock:
+            self.data.setdefault(project, {})[name] = value
+            self._save()
+
+    def delete(self, project, name):
+        with self.lock:
+            self.data.get(project, {}).pop(name, None)
+            self._save()
+
+    def _save(self):
+        if self.path is None:
+            return
+        with open(self.path, "w") as f:
+            f.write(json.dumps(self.data, indent=2))
+
+
+BACKENDS = {"google": GoogleSecretManagerBackend, "local": LocalBackend}
+
+_default_backend = None
+
+
+def get_backend():
+    """
+    Return the process-wide backend configured with ``CS_SECRETS_BACKEND``
+    (``google`` by default or ``local``). The local backend persists to
+    ``CS_SECRETS_PATH`` when it is set.
+    """
+    global _default_backend
+    if _default_backend is None:
+        kind = os.environ.get("CS_SECRETS_BACKEND", "google")
+        if kind not in BACKENDS:
+            raise ValueError(f"Unknown secrets backend: {kind}")
+        if kind == "local":
+            _default_backend = LocalBackend(os.environ.get("CS_SECRETS_PATH"))
+        else:
+            _default_backend = BACKENDS[kind]()
+    return _default_backend
+
+
+def set_backend(backend):
+    global _default_backend
+    _default_backend = backend
+
+
+class Secrets:
+    def __init__(self, project, backend=None):
+        self.project = project
+        self.backend = backend or get_backend()
+
+    def set(self, name, value):
+        return self._set_secret(name, value)
+
+    def get(self, name):
+        return self._get_secret(name)
+
+    def get_or_none(self, name):
+        try:
+            return self.get(name)
+        except SecretNotFound:
+            return None
+
+    def list(self):
+        raise NotImplementedError()
+
+    def delete(self, name):
+        return self._delete_secret(name)
+
+    def _set_secret(self, name, value):
+        return self.backend.set(self.project, name, value)
+
+    def _get_secret(self, name):
+        return self.backend.get(self.project, name)
+
+    def _delete_secret(self, name):
+        return self.backend.delete(self.project, name)
@@ -2,6 +2,7 @@ import { Field, ErrorMessage } from "formik";
 import React = require("react");
 import { Message } from ".";
 import { inputStyle } from "../constants";
+import { CheckboxField } from "../../fields";
 
 const PythonParamTools: React.FC<{}> = ({}) => {
   return (
@@ -21,6 +22,22 @@ const PythonParamTools: React.FC<{}> = ({}) => {
           <ErrorMessage name="exp_task_time" render={msg => <Message msg={msg} />} />
         </p>
       </div>
+      <p className="mt-3">
+        <label>
+          <Field
+            component={CheckboxField}
+            label="Inputs service: "
+            description="Keep a server running for this app's inputs."
+            name="inputs_service"
+            className="mt-1 d-inline-block mr-2"
+          />
+          <strong>Inputs Service:</strong>
+          <span className="ml-1">
+            Keep a server running that loads the default inputs and validates new
+            ones, instead of starting a new job for each request.
+          </span>
+        </label>
+      </p>
     </div>
   );
 };
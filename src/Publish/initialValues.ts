@@ -16,6 +16,7 @@ const initialValues: ProjectValues = {
   social_image_link: null,
   embed_background_color: "white",
   use_iframe_resizer: true,
+  inputs_service: false,
 };
 
 export { initialValues };
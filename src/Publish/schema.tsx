@@ -21,6 +21,7 @@ var Schema = yup.object().shape({
   is_public: yup.boolean(),
   social_image_link: yup.string().url(),
   use_iframe_resizer: yup.boolean(),
+  inputs_service: yup.boolean(),
 });
 
 export { Schema };
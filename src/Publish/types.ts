@@ -21,6 +21,7 @@ interface ProjectValues {
   social_image_link: string;
   embed_background_color: string;
   use_iframe_resizer: boolean;
+  inputs_service: boolean;
 }
 
 interface PublishProps {
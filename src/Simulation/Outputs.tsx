@@ -115,19 +115,27 @@ const OutputModal: React.FC<{
 const Pending: React.FC<{
   eta?: number;
   originalEta?: number;
+  progress?: number | null;
+  stage?: string | null;
   notify?: boolean;
   setNotify?: (notify: boolean) => void;
   showNotify?: boolean;
-}> = ({ eta, originalEta, notify, setNotify, showNotify }) => {
+}> = ({ eta, originalEta, progress, stage, notify, setNotify, showNotify }) => {
   let el;
   if (eta !== null && originalEta !== null) {
-    let percent = 100 * (1 - eta / originalEta);
+    // Prefer progress reported by the model over the estimate from the
+    // expected run time.
+    let percent =
+      progress !== null && progress !== undefined
+        ? Math.round(100 * progress)
+        : 100 * (1 - eta / originalEta);
     el = (
       <div>
         <Card.Title>
           <h3 className="text-center">
             Estimated time remaining: {moment.duration(eta, "seconds").humanize()}
           </h3>
+          {stage ? <p className="text-center text-muted">{stage}</p> : null}
           {showNotify ? (
             <div className="text-center">
               <CheckboxWidget value={notify} setValue={setNotify} message="Email me when ready." />
@@ -236,6 +244,8 @@ export default class OutputsComponent extends React.Component<OutputsProps, Outp
         <Pending
           eta={remoteSim.eta}
           originalEta={remoteSim.original_eta}
+          progress={remoteSim.progress}
+          stage={remoteSim.progress_stage}
           showNotify={RolePerms.hasWriteAccess(remoteSim)}
           notify={remoteSim.notify_on_completion}
           setNotify={this.props.setNotifyOnCompletion}
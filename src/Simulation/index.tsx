@@ -421,7 +421,7 @@ class SimTabs extends React.Component<
       api.getRemoteOutputs().then(initRem => {
         this.setState({ remoteSim: initRem });
         if (initRem.status === "PENDING") {
-          return this.pollOutputs(3000);
+          return this.pollOutputs(1000 * (initRem.poll_interval || 3));
         } else {
           api.getOutputs().then(initSim => {
             this.setState({ sim: initSim, notifyOnCompletion: false });
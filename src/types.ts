@@ -271,6 +271,10 @@ export interface Simulation<T> {
   outputs_version: string;
   owner: string;
   parent_sims: Array<MiniSimulation>;
+  poll_interval: number | null;
+  progress: number | null;
+  progress_stage: string | null;
+  progress_updated_at: Date | null;
   pending_permissions: Array<{
     grant_url: string;
     profile: string;
@@ -133,6 +133,7 @@ class SubmitSim:
             task_kwargs=data,
             tag=tag,
             path_prefix="/api/v1/jobs" if project.cluster.version == "v1" else "",
+            submitter=self.sim.owner.user.username,
         )
         print(f"job id: {self.submitted_id}")
 
@@ -150,6 +151,11 @@ class SubmitSim:
         future_offset = datetime.timedelta(seconds=sim.project.exp_task_time)
         expected_completion = cur_dt + future_offset
         sim.exp_comp_datetime = expected_completion
+        # Until the job reports progress, the ETA is based on the project's
+        # expected task time.
+        sim.progress = None
+        sim.progress_stage = None
+        sim.progress_updated_at = None
 
         sim.creation_date = cur_dt
         sim.save()
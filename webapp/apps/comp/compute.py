@@ -28,7 +28,9 @@ class Compute(object):
         response = requests.post(url, json=data, timeout=timeout, headers=headers)
         return response
 
-    def submit_job(self, project, task_name, task_kwargs, path_prefix="", tag=None):
+    def submit_job(
+        self, project, task_name, task_kwargs, path_prefix="", tag=None, submitter=None,
+    ):
         print(
             "submitting", task_name,
         )
@@ -36,11 +38,10 @@ class Compute(object):
         tag = tag or str(project.latest_tag)
         url = f"{cluster.url}{path_prefix}/{project.owner}/{project.title}/"
         print(url)
-        return self.submit(
-            tasks=dict(task_name=task_name, tag=tag, task_kwargs=task_kwargs),
-            url=url,
-            headers=cluster.headers(),
-        )
+        tasks = dict(task_name=task_name, tag=tag, task_kwargs=task_kwargs)
+        if submitter is not None:
+            tasks["submitter"] = submitter
+        return self.submit(tasks=tasks, url=url, headers=cluster.headers(),)
 
     def submit(self, tasks, url, headers):
         submitted = False
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.8 on 2026-10-19 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comp", "0030_auto_20211012_1327"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="simulation",
+            name="progress",
+            field=models.FloatField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="simulation",
+            name="progress_stage",
+            field=models.CharField(blank=True, default=None, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="simulation",
+            name="progress_updated_at",
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+    ]
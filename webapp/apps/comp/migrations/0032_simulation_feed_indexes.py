@@ -0,0 +1,27 @@
+# Generated by Django 3.2.8 on 2026-10-19 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comp", "0031_simulation_progress"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="simulation",
+            index=models.Index(
+                condition=models.Q(is_public=True),
+                fields=["creation_date", "id"],
+                name="sim_public_feed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="simulation",
+            index=models.Index(
+                fields=["owner", "creation_date", "id"], name="sim_owner_feed_idx"
+            ),
+        ),
+    ]
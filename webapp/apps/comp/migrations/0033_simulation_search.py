@@ -0,0 +1,56 @@
+# Generated by Django 3.2.8 on 2026-10-19 21:30
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comp", "0032_simulation_feed_indexes"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="simulation",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE comp_simulation SET search_vector =
+                setweight(to_tsvector('english', coalesce(title, '')), 'A')
+                || setweight(
+                    to_tsvector(
+                        'english',
+                        coalesce(
+                            (
+                                SELECT string_agg(text #>> '{}', ' ')
+                                FROM jsonb_path_query(readme, 'strict $.**.text') AS text
+                            ),
+                            ''
+                        )
+                    ),
+                    'B'
+                )
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="simulation",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="sim_search_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="simulation",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"], name="sim_title_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
@@ -7,22 +7,30 @@ import os
 from dataclasses import dataclass, field
 from typing import List, Union
 
+from django.apps import apps
 from django.core.exceptions import PermissionDenied
-from django.db import models
+from django.db import connection, models
 from django.db import IntegrityError, transaction
 from django.http import Http404
 from django.utils.functional import cached_property
 from django.utils import timezone
 from django.db.models import JSONField as JSONBField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.urls import reverse
 from django.utils import timezone
 from django.db import transaction
 
-from guardian.shortcuts import assign_perm, remove_perm, get_perms
+from guardian.shortcuts import (
+    assign_perm,
+    remove_perm,
+    get_perms,
+    get_objects_for_user,
+)
 
 from webapp.settings import HAS_USAGE_RESTRICTIONS, USE_STRIPE, FREE_PRIVATE_SIMS
 
-from webapp.apps.comp import utils
+from webapp.apps.comp import search, utils
 from webapp.apps.comp.exceptions import (
     ForkObjectException,
     PermissionExpiredException,
@@ -37,6 +45,9 @@ utc_tz = pytz.timezone("America/Sao_Paulo")
 
 ANON_BEFORE = timezone.make_aware(datetime.datetime(2020, 1, 16, 23, 59, 59), utc_tz)
 
+# Guards the fork tree queries against runaway recursion.
+MAX_FORK_DEPTH = 1000
+
 
 class JSONField(JSONBField):
     def db_type(self, connection):
@@ -170,6 +181,18 @@ class Inputs(models.Model):
         max_length=32,
     )
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            apps.get_model("users", "Project").objects.count_inputs(self.project_id, 1)
+
+    def delete(self, *args, **kwargs):
+        project_id = self.project_id
+        result = super().delete(*args, **kwargs)
+        apps.get_model("users", "Project").objects.count_inputs(project_id, -1)
+        return result
+
     @property
     def deserialized_inputs(self):
         """
@@ -217,17 +240,17 @@ class Inputs(models.Model):
         }
         return reverse("edit", kwargs=kwargs)
 
-    def has_admin_access(self, user):
-        return self.sim.has_admin_access(user)
+    def has_admin_access(self, user, checker=None):
+        return self.sim.has_admin_access(user, checker)
 
-    def has_write_access(self, user):
-        return self.sim.has_write_access(user)
+    def has_write_access(self, user, checker=None):
+        return self.sim.has_write_access(user, checker)
 
-    def has_read_access(self, user):
-        return self.sim.has_read_access(user)
+    def has_read_access(self, user, checker=None):
+        return self.sim.has_read_access(user, checker)
 
-    def role(self, user):
-        return self.sim.role(user)
+    def role(self, user, checker=None):
+        return self.sim.role(user, checker)
 
 
 class SimulationManager(models.Manager):
@@ -372,6 +395,78 @@ class SimulationManager(models.Manager):
     def public_sims(self):
         return self.filter(creation_date__gt=ANON_BEFORE, is_public=True)
 
+    def with_read_access(self, user, queryset=None):
+        """
+        Filter to the simulations that user has read access to in a single
+        query. This follows the same rules as ``Simulation.has_read_access``.
+        """
+        if queryset is None:
+            queryset = self.all()
+        ProjectAccess = apps.get_model("users", "ProjectAccess")
+        readable = models.Q(is_public=True)
+        if user and user.is_authenticated:
+            readable |= models.Q(
+                pk__in=get_objects_for_user(
+                    user,
+                    perms=[
+                        Simulation.READ[0],
+                        Simulation.WRITE[0],
+                        Simulation.ADMIN[0],
+                    ],
+                    klass=self.model,
+                    any_perm=True,
+                    accept_global_perms=False,
+                ).values("pk")
+            )
+        return queryset.filter(
+            readable, project__pk__in=ProjectAccess.objects.projects_for(user)
+        )
+
+    def ancestor_ids(self, sim):
+        """
+        Return the ids of the simulations that sim was forked from, nearest
+        first, with a recursive query.
+        """
+        table = self.model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH RECURSIVE ancestors(id, parent_sim_id, depth) AS (
+                    SELECT id, parent_sim_id, 0 FROM {table} WHERE id = %s
+                    UNION ALL
+                    SELECT s.id, s.parent_sim_id, a.depth + 1
+                    FROM {table} s JOIN ancestors a ON s.id = a.parent_sim_id
+                    WHERE a.depth < %s
+                )
+                SELECT id FROM ancestors WHERE depth > 0 ORDER BY depth
+                """,
+                [sim.pk, MAX_FORK_DEPTH],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def descendant_ids(self, sim):
+        """
+        Return ``(id, parent_sim_id)`` for every simulation forked from sim,
+        directly or indirectly, with a recursive query. Parents come before
+        their forks.
+        """
+        table = self.model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH RECURSIVE descendants(id, parent_sim_id, depth) AS (
+                    SELECT id, parent_sim_id, 1 FROM {table} WHERE parent_sim_id = %s
+                    UNION ALL
+                    SELECT s.id, s.parent_sim_id, d.depth + 1
+                    FROM {table} s JOIN descendants d ON s.parent_sim_id = d.id
+                    WHERE d.depth < %s
+                )
+                SELECT id, parent_sim_id FROM descendants ORDER BY depth, id
+                """,
+                [sim.pk, MAX_FORK_DEPTH],
+            )
+            return cursor.fetchall()
+
 
 class SimulationPermissions:
     READ = (
@@ -429,6 +524,12 @@ class Simulation(models.Model):
     run_cost = models.DecimalField(max_digits=9, decimal_places=4, default=0.0)
     creation_date = models.DateTimeField(default=timezone.now)
     exp_comp_datetime = models.DateTimeField(default=timezone.now)
+    # Latest progress reported by the running job.
+    progress = models.FloatField(blank=True, default=None, null=True)
+    progress_stage = models.CharField(
+        blank=True, default=None, null=True, max_length=255
+    )
+    progress_updated_at = models.DateTimeField(blank=True, default=None, null=True)
     job_id = models.UUIDField(blank=True, default=None, null=True)
     model_version = models.CharField(blank=True, default=None, null=True, max_length=50)
     webapp_vers = models.CharField(blank=True, default=None, null=True, max_length=50)
@@ -436,6 +537,9 @@ class Simulation(models.Model):
 
     is_public = models.BooleanField(default=True)
 
+    # Title and readme text for search. Updated by save.
+    search_vector = SearchVectorField(null=True, editable=False)
+
     status = models.CharField(
         choices=(
             ("STARTED", "Started"),
@@ -455,6 +559,21 @@ class Simulation(models.Model):
                 fields=["project", "model_pk"], name="unique_model_pk"
             )
         ]
+        indexes = [
+            # Keyset pagination of the simulation feeds.
+            models.Index(
+                fields=["creation_date", "id"],
+                condition=models.Q(is_public=True),
+                name="sim_public_feed_idx",
+            ),
+            models.Index(
+                fields=["owner", "creation_date", "id"], name="sim_owner_feed_idx"
+            ),
+            GinIndex(fields=["search_vector"], name="sim_search_idx"),
+            GinIndex(
+                fields=["title"], name="sim_title_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ]
         permissions = (
             SimulationPermissions.READ,
             SimulationPermissions.WRITE,
@@ -464,6 +583,60 @@ class Simulation(models.Model):
     def __str__(self):
         return f"{self.project}#{self.model_pk}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_search_text = instance._search_text()
+        instance._saved_counted = instance._counted()
+        instance._saved_usage_key = instance._usage_key()
+        return instance
+
+    def _search_text(self):
+        return (self.__dict__.get("title"), self.__dict__.get("readme"))
+
+    def _counted(self):
+        return (self.__dict__.get("project_id"), self.__dict__.get("owner_id"))
+
+    def _usage_key(self):
+        return (
+            self.__dict__.get("owner_id"),
+            self.__dict__.get("project_id"),
+            self.__dict__.get("is_public"),
+        )
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        counted = self._counted()
+        saved_counted = getattr(self, "_saved_counted", (None, None))
+        if saved_counted != counted:
+            Project = apps.get_model("users", "Project")
+            Project.objects.count_sim(*saved_counted, -1, exclude_pk=self.pk)
+            Project.objects.count_sim(*counted, 1, exclude_pk=self.pk)
+            self._saved_counted = counted
+        usage_key = self._usage_key()
+        saved_usage_key = getattr(self, "_saved_usage_key", (None, None, None))
+        if saved_usage_key != usage_key:
+            # The owners' cached usage lists recent models and private sims.
+            owners = {saved_usage_key[0], usage_key[0]} - {None}
+            apps.get_model("users", "Profile").objects.filter(pk__in=owners).update(
+                usage=None
+            )
+            self._saved_usage_key = usage_key
+        search_text = self._search_text()
+        if getattr(self, "_saved_search_text", None) != search_text:
+            search.update_vector(
+                self, (self.title, "A"), (search.readme_text(self.readme), "B")
+            )
+            self._saved_search_text = search_text
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        apps.get_model("users", "Project").objects.count_sim(
+            *getattr(self, "_saved_counted", self._counted()), -1, exclude_pk=pk
+        )
+        return result
+
     def get_absolute_url(self):
         kwargs = {
             "model_pk": self.model_pk,
@@ -529,6 +702,32 @@ class Simulation(models.Model):
     def compute_original_eta(self):
         return self.compute_eta(self.creation_date_aware)
 
+    def record_progress(self, fraction, stage, reference_time=None):
+        """
+        Store a progress report from the running job and re-estimate the
+        completion time from how long the job has taken so far.
+        """
+        if reference_time is None:
+            reference_time = timezone.now()
+        self.progress = fraction
+        self.progress_stage = stage
+        self.progress_updated_at = reference_time
+        if fraction:
+            elapsed = (reference_time - self.creation_date_aware).total_seconds()
+            remaining = elapsed * (1 - fraction) / fraction
+            self.exp_comp_datetime = reference_time + datetime.timedelta(
+                seconds=remaining
+            )
+
+    def compute_poll_interval(self):
+        """
+        Suggested number of seconds to wait before polling a pending
+        simulation again.
+        """
+        if self.status != "PENDING":
+            return None
+        return min(max(self.compute_eta() / 4, 2), 30)
+
     @property
     def creation_date_aware(self):
         if not timezone.is_aware(self.creation_date):
@@ -549,17 +748,58 @@ class Simulation(models.Model):
 
     def parent_sims(self, user=None):
         """
-        Recursively walk back up to the original simulation. All public simulations
+        Walk back up to the original simulation. All public simulations
         are included, and private simulations are only included if the user is
         provided and has read access.
         """
-        parent_sims = []
-        sim = self
-        while sim.parent_sim != None:
-            if sim.parent_sim.is_public or sim.parent_sim.has_read_access(user):
-                parent_sims.append(sim.parent_sim)
-            sim = sim.parent_sim
-        return parent_sims
+        if self.parent_sim_id is None:
+            return []
+        ancestor_ids = Simulation.objects.ancestor_ids(self)
+        ancestors = Simulation.objects.filter(pk__in=ancestor_ids)
+        visible = (
+            ancestors.filter(
+                models.Q(is_public=True)
+                | models.Q(
+                    pk__in=Simulation.objects.with_read_access(user, ancestors).values(
+                        "pk"
+                    )
+                )
+            )
+            .select_related("owner__user", "project__owner__user")
+            .prefetch_related("authors__user")
+        )
+        by_id = {sim.pk: sim for sim in visible}
+        return [by_id[pk] for pk in ancestor_ids if pk in by_id]
+
+    def fork_tree(self, user=None):
+        """
+        Return the simulations forked from this one that user has read access
+        to, as ``{simulation: [forks]}`` with the visible forks of each
+        simulation. Forks of a simulation that the user can't see are
+        attached to its nearest visible ancestor.
+        """
+        rows = Simulation.objects.descendant_ids(self)
+        visible = (
+            Simulation.objects.with_read_access(
+                user, Simulation.objects.filter(pk__in=[pk for pk, _ in rows])
+            )
+            .select_related("owner__user", "project__owner__user")
+            .prefetch_related("authors__user")
+        )
+        by_id = {sim.pk: sim for sim in visible}
+        tree = {self: []}
+        # Closest visible ancestor of each descendant, including itself.
+        nearest = {self.pk: self}
+        for pk, parent_pk in rows:
+            parent = nearest[parent_pk]
+            if pk in by_id:
+                sim = by_id[pk]
+                tree[parent].append(sim)
+                tree[sim] = []
+                nearest[pk] = sim
+            else:
+                nearest[pk] = parent
+        return tree
 
     def is_owner(self, user):
         return user == self.owner.user
@@ -607,30 +847,36 @@ class Simulation(models.Model):
     access to a specific simulation. Users can only have one of these permissions
     at a time, but users with a higher level permission inherit the read/write
     access from the lower level permissions, too.
+
+    Each method takes an optional guardian ``ObjectPermissionChecker`` for the
+    user, which loads the user's permissions on an object once and answers
+    repeated checks from memory. See ``webapp.apps.users.permissions``.
     """
 
-    def has_admin_access(self, user):
+    def has_admin_access(self, user, checker=None):
         if not user or not user.is_authenticated:
             return False
 
-        return user.has_perm(Simulation.ADMIN[0], self)
+        return (checker or user).has_perm(Simulation.ADMIN[0], self)
 
-    def has_write_access(self, user):
+    def has_write_access(self, user, checker=None):
         """
         Currently, this is just an alias for is_owner.
         """
         if not user or not user.is_authenticated:
             return False
 
-        return user.has_perm(Simulation.WRITE[0], self) or self.has_admin_access(user)
+        return (checker or user).has_perm(
+            Simulation.WRITE[0], self
+        ) or self.has_admin_access(user, checker)
 
-    def has_read_access(self, user):
+    def has_read_access(self, user, checker=None):
         """
         If the project is private, then users without access to the project cannot access
         sims created with it.
         """
         # Everyone with access to the project has access to this sim.
-        has_project_access = self.project.has_read_access(user)
+        has_project_access = self.project.has_read_access(user, checker)
         if self.is_public and has_project_access:
             return True
 
@@ -638,7 +884,8 @@ class Simulation(models.Model):
             return False
 
         return (
-            user.has_perm(Simulation.READ[0], self) or self.has_write_access(user)
+            (checker or user).has_perm(Simulation.READ[0], self)
+            or self.has_write_access(user, checker)
         ) and has_project_access
 
     def remove_permissions(self, user):
@@ -682,11 +929,14 @@ class Simulation(models.Model):
                 f"Received invalid role: {role}. Choices are read, write, or admin."
             )
 
-    def role(self, user):
+    def role(self, user, checker=None):
         if not user or not user.is_authenticated:
             return None
 
-        perms = get_perms(user, self)
+        if checker is not None:
+            perms = checker.get_perms(self)
+        else:
+            perms = get_perms(user, self)
         if not perms:
             return None
         elif perms == [Simulation.READ[0]]:
@@ -0,0 +1,95 @@
+import base64
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class SimulationKeysetPagination(BasePagination):
+    """
+    Keyset pagination for simulation feeds ordered by creation date.
+
+    The cursor holds the (creation_date, id) of the last simulation on the
+    page, and the next page starts right after it. Unlike page numbers, this
+    does not count the feed or skip over the earlier pages with an OFFSET,
+    so every page costs the same no matter how deep it is.
+
+    Feeds sorted by something other than creation date, e.g. project title,
+    fall back to page number pagination.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    orderings = {
+        ("-creation_date",): ("-creation_date", "-id"),
+        ("creation_date",): ("creation_date", "id"),
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+        ordering = self.orderings.get(tuple(queryset.query.order_by))
+        if ordering is None:
+            self.fallback = PageNumberPagination()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        queryset = queryset.order_by(*ordering)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            creation_date, pk = cursor
+            if ordering[0].startswith("-"):
+                queryset = queryset.filter(
+                    Q(creation_date__lt=creation_date)
+                    | Q(creation_date=creation_date, id__lt=pk),
+                    creation_date__lte=creation_date,
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(creation_date__gt=creation_date)
+                    | Q(creation_date=creation_date, id__gt=pk),
+                    creation_date__gte=creation_date,
+                )
+
+        results = list(queryset[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [("next", self.get_next_link()), ("previous", None), ("results", data),]
+            )
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(last.creation_date, last.id),
+        )
+
+    def encode_cursor(self, creation_date, pk):
+        value = f"{creation_date.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(value.encode("ascii")).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            value = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            creation_date, pk = value.split("|")
+            return datetime.fromisoformat(creation_date), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound("Invalid cursor.")
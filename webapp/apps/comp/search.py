@@ -0,0 +1,84 @@
+"""
+Ranked search over simulations and projects.
+
+Each searchable model has a ``search_vector`` column with a GIN index that
+is rebuilt when its text fields change, and a trigram index on its title so
+that partial words, e.g. while the user is still typing, match too.
+"""
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db.models import CharField, F, Q, Value
+from django.db.models.lookups import IContains
+
+CONFIG = "english"
+
+
+@CharField.register_lookup
+class ILike(IContains):
+    """
+    ``icontains`` written as ``ILIKE`` on the bare column. Django's
+    ``icontains`` compares ``UPPER()`` of the column instead, which the
+    trigram indexes on titles can't be used for.
+    """
+
+    lookup_name = "ilike"
+
+    def as_sql(self, compiler, connection):
+        lhs_sql, params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        params.extend(rhs_params)
+        return f"{lhs_sql} ILIKE {rhs_sql}", params
+
+
+def readme_text(nodes):
+    """
+    Return the text of a readme stored as a list of rich text editor nodes.
+    """
+    if not nodes:
+        return ""
+    if isinstance(nodes, str):
+        return nodes
+    if isinstance(nodes, dict):
+        nodes = [nodes]
+    parts = []
+    for node in nodes:
+        if not isinstance(node, dict):
+            continue
+        if "text" in node:
+            parts.append(str(node["text"]))
+        parts.append(readme_text(node.get("children")))
+    return " ".join(part for part in parts if part)
+
+
+def build_vector(*weighted_text):
+    """
+    Build a search vector from ``(text, weight)`` pairs, where weight is one
+    of "A", "B", "C", or "D" from most to least important.
+    """
+    vector = None
+    for text, weight in weighted_text:
+        part = SearchVector(Value(text or ""), weight=weight, config=CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def update_vector(instance, *weighted_text):
+    type(instance).objects.filter(pk=instance.pk).update(
+        search_vector=build_vector(*weighted_text)
+    )
+
+
+def search(queryset, term, title_field="title"):
+    """
+    Filter ``queryset`` to rows matching ``term`` and annotate them with a
+    ``search_rank``, highest for the best matches.
+    """
+    query = SearchQuery(term, search_type="websearch", config=CONFIG)
+    return queryset.annotate(
+        search_rank=SearchRank(F("search_vector"), query)
+        + TrigramSimilarity(title_field, term)
+    ).filter(Q(search_vector=query) | Q(**{f"{title_field}__ilike": term}))
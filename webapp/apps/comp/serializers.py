@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from guardian.shortcuts import get_users_with_perms
 
+from webapp.apps.users.permissions import get_permissions
 from webapp.apps.users.serializers import ProjectSerializer
 
 from .models import Inputs, Simulation, PendingPermission, ModelConfig
@@ -27,6 +28,20 @@ class OutputsSerializer(serializers.Serializer):
         return super().to_internal_value(data)
 
 
+class ProgressSerializer(serializers.Serializer):
+    """
+    Serialize progress reports relayed from running simulations.
+    """
+
+    job_id = serializers.UUIDField()
+    fraction = serializers.FloatField(
+        required=False, allow_null=True, min_value=0, max_value=1
+    )
+    stage = serializers.CharField(
+        required=False, allow_null=True, allow_blank=True, max_length=255
+    )
+
+
 class PendingPermissionSerializer(serializers.ModelSerializer):
     profile = serializers.StringRelatedField()
     grant_url = serializers.CharField(required=False, source="get_absolute_grant_url")
@@ -62,11 +77,8 @@ class MiniSimulationSerializer(serializers.ModelSerializer):
 
     def to_representation(self, obj):
         rep = super().to_representation(obj)
-        if self.context.get("request"):
-            user = self.context["request"].user
-        else:
-            user = None
-        rep["role"] = obj.role(user)
+        # List views prefetch the permissions for the whole page.
+        rep["role"] = get_permissions(self.context).role(obj)
         rep["authors"] = sorted(rep["authors"])
         return rep
 
@@ -197,11 +209,7 @@ class InputsSerializer(serializers.ModelSerializer):
 
     def to_representation(self, obj):
         rep = super().to_representation(obj)
-        if self.context.get("request"):
-            user = self.context["request"].user
-        else:
-            user = None
-        rep["role"] = obj.role(user)
+        rep["role"] = get_permissions(self.context).role(obj)
         rep["sim"]["authors"] = sorted(rep["sim"]["authors"])
         return rep
 
@@ -274,6 +282,7 @@ class SimulationSerializer(serializers.ModelSerializer):
     gui_url = serializers.CharField(source="get_absolute_url")
     eta = serializers.FloatField(source="compute_eta")
     original_eta = serializers.FloatField(source="compute_original_eta")
+    poll_interval = serializers.FloatField(source="compute_poll_interval")
     title = serializers.CharField(required=False)
     owner = serializers.StringRelatedField(source="get_owner", required=False)
     authors = serializers.StringRelatedField(source="get_authors", many=True)
@@ -289,12 +298,13 @@ class SimulationSerializer(serializers.ModelSerializer):
             user = self.context["request"].user
         else:
             user = None
+        permissions = get_permissions(self.context)
         rep["parent_sims"] = MiniSimulationSerializer(
             obj.parent_sims(user=user), many=True
         ).data
-        rep["role"] = obj.role(user)
+        rep["role"] = permissions.role(obj)
         rep["authors"] = sorted(rep["authors"])
-        if obj.has_admin_access(user):
+        if permissions.has_admin_access(obj):
             rep["pending_permissions"] = PendingPermissionSerializer(
                 instance=obj.pending_permissions.all(), many=True
             ).data
@@ -330,6 +340,10 @@ class SimulationSerializer(serializers.ModelSerializer):
             "owner",
             "outputs_version",
             # "parent_sims",
+            "poll_interval",
+            "progress",
+            "progress_stage",
+            "progress_updated_at",
             "project",
             "readme",
             # "role",
@@ -352,6 +366,10 @@ class SimulationSerializer(serializers.ModelSerializer):
             "owner",
             "outputs_version",
             # "parent_sims",
+            "poll_interval",
+            "progress",
+            "progress_stage",
+            "progress_updated_at",
             "project",
             # "role",
             "run_time",
@@ -8,6 +8,8 @@ import pytest
 import requests_mock
 
 from django.contrib import auth
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.test import Client
 from rest_framework.authtoken.models import Token
@@ -25,6 +27,7 @@ from webapp.apps.users.models import (
     create_profile_from_user,
 )
 from webapp.apps.users.tests.utils import gen_collabs, replace_owner
+from webapp.apps.comp.pagination import SimulationKeysetPagination
 from webapp.apps.comp.models import (
     Inputs,
     Simulation,
@@ -265,6 +268,20 @@ class RunMockModel(CoreTestMixin):
         self.mockcompute.sim = inputs.sim
         get_resp_pend = self.api_client.get(f"/{self.project}/api/v1/{model_pk}/")
         assert_status(202, get_resp_pend, "poll_simulation")
+        assert get_resp_pend.data["progress"] is None
+        assert get_resp_pend.data["poll_interval"] >= 2
+
+        resp = self.api_client.put(
+            "/outputs/api/progress/",
+            data={"job_id": inputs.sim.job_id, "fraction": 0.5, "stage": "Running"},
+            format="json",
+            **self.project.cluster.headers(),
+        )
+        assert_status(200, resp, "put_progress")
+        get_resp_pend = self.api_client.get(f"/{self.project}/api/v1/{model_pk}/")
+        assert_status(202, get_resp_pend, "poll_simulation")
+        assert get_resp_pend.data["progress"] == 0.5
+        assert get_resp_pend.data["progress_stage"] == "Running"
 
     def check_simulation_finished(self, model_pk: int):
         self.sim = Simulation.objects.get(project=self.project, model_pk=model_pk)
@@ -1538,6 +1555,119 @@ def test_list_sim_api(db, api_client, get_inputs, meta_param_dict):
     assert resp.data["results"][0]["model_pk"] == tester_sims[1].model_pk
 
 
+def test_list_sims_query_count(db, api_client, get_inputs, meta_param_dict):
+    """
+    The number of queries for a page of simulations does not depend on the
+    number of simulations on the page.
+    """
+    (user,) = gen_collabs(1, plan="pro")
+    (collab,) = gen_collabs(1)
+    _, _, tester_sims = _shuffled_sims(user, get_inputs, meta_param_dict)
+    tester_sims[0].authors.add(collab)
+    api_client.force_login(user.user)
+
+    with CaptureQueriesContext(connection) as queries:
+        resp = api_client.get("/api/v1/sims")
+    assert_status(200, resp, "list_sims")
+    assert len(resp.data["results"]) == 6
+
+    _, _, tester_sims = _shuffled_sims(user, get_inputs, meta_param_dict)
+    for sim in tester_sims:
+        sim.authors.add(collab)
+
+    with CaptureQueriesContext(connection) as more_queries:
+        resp = api_client.get("/api/v1/sims")
+    assert_status(200, resp, "list_sims")
+    assert len(resp.data["results"]) == 12
+    assert all(sim["role"] == "admin" for sim in resp.data["results"])
+    assert len(more_queries) == len(queries)
+
+
+def test_fork_tree_api(db, api_client, get_inputs, meta_param_dict):
+    (user,) = gen_collabs(1, plan="pro")
+    sims, _, _ = _shuffled_sims(user, get_inputs, meta_param_dict)
+    project = sims[0].project
+
+    resp = api_client.get(
+        f"/{project.owner.user.username}/{project.title}/api/v1/{sims[3].model_pk}/forks/"
+    )
+    assert_status(200, resp, "fork_tree")
+    assert [sim["model_pk"] for sim in resp.data["parent_sims"]] == [
+        sim.model_pk for sim in reversed(sims[:3])
+    ]
+    node, model_pks = resp.data["simulation"], []
+    while node is not None:
+        model_pks.append(node["model_pk"])
+        node = node["forks"][0] if node["forks"] else None
+    assert model_pks == [sim.model_pk for sim in sims[3:]]
+
+
+def test_search_sims(db, api_client, get_inputs, meta_param_dict):
+    (user,) = gen_collabs(1, plan="pro")
+    _, _, tester_sims = _shuffled_sims(user, get_inputs, meta_param_dict)
+    tester_sims[0].title = "Capital gains reform"
+    tester_sims[0].save()
+    tester_sims[1].readme = [
+        {"type": "paragraph", "children": [{"text": "Raising capital gains rates."}]}
+    ]
+    tester_sims[1].save()
+    api_client.force_login(user.user)
+
+    resp = api_client.get("/api/v1/sims", {"title": "capital gains"})
+    assert_status(200, resp, "search_sims")
+    # Title matches rank above readme matches.
+    assert [sim["model_pk"] for sim in resp.data["results"]] == [
+        tester_sims[0].model_pk,
+        tester_sims[1].model_pk,
+    ]
+
+    # Partial words match titles.
+    resp = api_client.get("/api/v1/sims", {"title": "refo"})
+    assert_status(200, resp, "search_sims")
+    assert [sim["model_pk"] for sim in resp.data["results"]] == [
+        tester_sims[0].model_pk
+    ]
+
+
+@pytest.mark.parametrize("ordering", ["-creation_date", "creation_date"])
+def test_list_sims_keyset_pagination(
+    db, api_client, get_inputs, meta_param_dict, monkeypatch, ordering
+):
+    monkeypatch.setattr(SimulationKeysetPagination, "page_size", 4)
+    (user,) = gen_collabs(1, plan="pro")
+    _, _, tester_sims = _shuffled_sims(user, get_inputs, meta_param_dict)
+    # Ties on creation_date are broken by id.
+    tie = tester_sims[0].creation_date
+    for sim in tester_sims[:3]:
+        sim.creation_date = tie
+        sim.save()
+    api_client.force_login(user.user)
+
+    model_pks = []
+    url = f"/api/v1/sims?ordering={ordering}"
+    while url is not None:
+        resp = api_client.get(url)
+        assert_status(200, resp, "list_sims")
+        assert "count" not in resp.data
+        model_pks += [sim["model_pk"] for sim in resp.data["results"]]
+        url = resp.data["next"]
+
+    exp = sorted(
+        tester_sims,
+        key=lambda sim: (sim.creation_date, sim.id),
+        reverse=ordering.startswith("-"),
+    )
+    assert model_pks == [sim.model_pk for sim in exp]
+
+    resp = api_client.get("/api/v1/sims?cursor=notacursor")
+    assert_status(404, resp, "invalid cursor")
+
+    # Other orderings use page numbers.
+    resp = api_client.get("/api/v1/sims?ordering=project__title")
+    assert_status(200, resp, "list_sims")
+    assert resp.data["count"] == len(tester_sims)
+
+
 @pytest.fixture(params=[True, False])
 def viz(request, db, viz_project, pro_profile, customer_pro_by_default):
     sponsor = Profile.objects.get(user__username="sponsor")
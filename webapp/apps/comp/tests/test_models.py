@@ -124,6 +124,35 @@ def test_private_parent_sims(db, shuffled_sims, profile):
     )
 
 
+def test_fork_tree(db, shuffled_sims, profile):
+    """Test forks are listed as a tree of the sims that the user can access"""
+
+    modeler = User.objects.get(username="modeler").profile
+    sims, modeler_sims, tester_sims = shuffled_sims
+
+    # Each sim was forked from the one before it.
+    tree = sims[0].fork_tree(user=None)
+    assert list(tree) == sims
+    for parent, child in zip(sims, sims[1:]):
+        assert tree[parent] == [child]
+    assert tree[sims[-1]] == []
+
+    for sim in sims:
+        sim.is_public = False
+        sim.save()
+
+    # Hidden sims are skipped over.
+    tree = sims[0].fork_tree(user=modeler.user)
+    assert list(tree) == modeler_sims
+    for parent, child in zip(modeler_sims, modeler_sims[1:]):
+        assert tree[parent] == [child]
+
+    tree = sims[0].fork_tree(user=profile.user)
+    assert list(tree) == [sims[0]] + tester_sims
+    for parent, child in zip([sims[0]] + tester_sims, tester_sims):
+        assert tree[parent] == [child]
+
+
 @pytest.mark.parametrize("is_public", [True, False])
 def test_sim_fork(db, get_inputs, meta_param_dict, is_public):
     (profile,) = gen_collabs(1, plan="pro")
@@ -12,6 +12,7 @@ from webapp.apps.comp.views import (
     DetailAPIView,
     RemoteDetailAPIView,
     ForkDetailAPIView,
+    ForkTreeAPIView,
     MyInputsAPIView,
     DetailMyInputsAPIView,
     NewSimulationAPIView,
@@ -29,6 +30,7 @@ from webapp.apps.comp.views import (
 # api/v1/inputs/ - view inputs, post meta parameters.
 # api/v1/<int:model_pk>/edit/ - view inputs from sim using model_pk.
 # api/v1/<int:model_pk>/ - get all data related to sim, including inputs and outputs.
+# api/v1/<int:model_pk>/forks/ - get the sims a sim was forked from and its forks.
 
 urlpatterns = [
     path("embed/<str:ea_name>/", EmbedView.as_view(), name="embed"),
@@ -54,6 +56,9 @@ urlpatterns = [
         ForkDetailAPIView.as_view(),
         name="fork_detail_api",
     ),
+    path(
+        "api/v1/<int:model_pk>/forks/", ForkTreeAPIView.as_view(), name="fork_tree_api",
+    ),
     path(
         "api/v1/<int:model_pk>/access/",
         SimulationAccessAPIView.as_view(),
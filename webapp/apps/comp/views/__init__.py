@@ -17,7 +17,9 @@ from .api import (
     DetailAPIView,
     RemoteDetailAPIView,
     ForkDetailAPIView,
+    ForkTreeAPIView,
     OutputsAPIView,
+    ProgressAPIView,
     DetailMyInputsAPIView,
     MyInputsAPIView,
     ModelConfigAPIView,
@@ -29,10 +29,14 @@ from webapp.apps.users.auth import ClusterAuthentication, ClientOAuth2Authentica
 from webapp.apps.users.models import (
     Project,
     Profile,
+    ProjectAccess,
     get_project_or_404,
-    projects_with_access,
 )
-from webapp.apps.users.permissions import RequiresActive, StrictRequiresActive
+from webapp.apps.users.permissions import (
+    RequiresActive,
+    StrictRequiresActive,
+    permissions_for,
+)
 
 from webapp.apps.comp.asyncsubmit import SubmitInputs, SubmitSim
 from webapp.apps.comp.compute import Compute, JobFailError
@@ -53,12 +57,15 @@ from webapp.apps.comp.models import (
     ModelConfig,
     ANON_BEFORE,
 )
+from webapp.apps.comp import search
+from webapp.apps.comp.pagination import SimulationKeysetPagination
 from webapp.apps.comp.parser import APIParser
 from webapp.apps.comp.serializers import (
     SimulationSerializer,
     MiniSimulationSerializer,
     InputsSerializer,
     OutputsSerializer,
+    ProgressSerializer,
     ModelConfigSerializer,
     AddAuthorsSerializer,
     SimAccessSerializer,
@@ -226,7 +233,7 @@ class BaseDetailAPIView(GetOutputsObjectMixin, APIView):
             self.object = self.get_object(
                 kwargs["model_pk"], kwargs["username"], kwargs["title"]
             )
-            if self.object.has_write_access(request.user):
+            if permissions_for(request).has_write_access(self.object):
                 serializer = MiniSimulationSerializer(
                     self.object, data=request.data, context={"request": request}
                 )
@@ -252,7 +259,7 @@ class BaseDetailAPIView(GetOutputsObjectMixin, APIView):
             kwargs["model_pk"], kwargs["username"], kwargs["title"]
         )
         print("got self.object", self.object)
-        if not self.object.has_write_access(request.user):
+        if not permissions_for(request).has_write_access(self.object):
             return Response(status=status.HTTP_403_FORBIDDEN)
         if self.object.status == "STARTED":
             return submit(request, status.HTTP_200_OK, self.object.project, self.object)
@@ -346,6 +353,47 @@ class ForkDetailAPIView(RequiresLoginPermissions, GetOutputsObjectMixin, APIView
         return Response(data, status=status.HTTP_201_CREATED)
 
 
+class ForkTreeAPIView(GetOutputsObjectMixin, APIView):
+    """
+    The simulations that a simulation was forked from and the tree of
+    simulations forked from it that the user can see.
+    """
+
+    model = Simulation
+    authentication_classes = (
+        SessionAuthentication,
+        BasicAuthentication,
+        TokenAuthentication,
+    )
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object(
+            kwargs["model_pk"], kwargs["username"], kwargs["title"]
+        )
+        parent_sims = self.object.parent_sims(user=request.user)
+        tree = self.object.fork_tree(user=request.user)
+
+        sims = list(tree)
+        permissions_for(request).prefetch(sims + parent_sims)
+        context = {"request": request}
+
+        nodes = dict(
+            zip(sims, MiniSimulationSerializer(sims, many=True, context=context).data)
+        )
+        for sim, forks in tree.items():
+            nodes[sim]["forks"] = [nodes[fork] for fork in forks]
+
+        return Response(
+            {
+                "parent_sims": MiniSimulationSerializer(
+                    parent_sims, many=True, context=context
+                ).data,
+                "simulation": nodes[self.object],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
 class NewSimulationAPIView(RequiresLoginPermissions, APIView):
     projects = Project.objects.all()
     authentication_classes = (
@@ -454,6 +502,40 @@ class OutputsAPIView(RecordOutputsMixin, APIView):
             return Response(ser.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ProgressAPIView(APIView):
+    """
+    API endpoint used by the workers to report the progress of a running
+    simulation.
+    """
+
+    authentication_classes = (
+        ClusterAuthentication,
+        ClientOAuth2Authentication,
+    )
+
+    def put(self, request, *args, **kwargs):
+        ser = ProgressSerializer(data=request.data)
+        if not ser.is_valid():
+            return Response(ser.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = ser.validated_data
+        sim = get_object_or_404(
+            Simulation.objects.select_related("project"), job_id=data["job_id"]
+        )
+        if not sim.project.has_write_access(request.user):
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+        if sim.status == "PENDING":
+            sim.record_progress(data.get("fraction"), data.get("stage"))
+            sim.save(
+                update_fields=[
+                    "progress",
+                    "progress_stage",
+                    "progress_updated_at",
+                    "exp_comp_datetime",
+                ]
+            )
+        return Response(status=status.HTTP_200_OK)
+
+
 class MyInputsAPIView(APIView):
     authentication_classes = (
         ClusterAuthentication,
@@ -748,18 +830,23 @@ class SimulationAccessAPIView(RequiresLoginPermissions, GetOutputsObjectMixin, A
 
 class FilterTitle:
     """
-    FilterTitle is a mixin for filtering simulations by title.
+    FilterTitle is a mixin for searching simulations by title and readme.
     """
 
     def filter_queryset(self, queryset):
         query_params = self.request.query_params
-        if query_params.get("title", None):
-            queryset = queryset.filter(title__icontains=query_params.get("title"))
+        term = query_params.get("title", None)
+        if term:
+            queryset = search.search(queryset, term)
         if query_params.get("title__notlike", None):
             queryset = queryset.filter(
                 ~Q(title__icontains=query_params.get("title__notlike"))
             )
-        return super().filter_queryset(queryset)
+        queryset = super().filter_queryset(queryset)
+        # Show the best matches first unless another ordering was asked for.
+        if term and not query_params.get("ordering", None):
+            queryset = queryset.order_by("-search_rank", "-creation_date")
+        return queryset
 
 
 class SimsAPIView(FilterTitle, generics.ListAPIView):
@@ -777,6 +864,23 @@ class SimsAPIView(FilterTitle, generics.ListAPIView):
 
     queryset = Simulation.objects.all()
     serializer_class = MiniSimulationSerializer
+    pagination_class = SimulationKeysetPagination
+
+    def filter_queryset(self, queryset):
+        # Load everything MiniSimulationSerializer needs for a page up front
+        # instead of one query per simulation.
+        return (
+            super()
+            .filter_queryset(queryset)
+            .select_related("owner__user", "project__owner__user")
+            .prefetch_related("authors__user")
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page:
+            permissions_for(self.request).prefetch(page)
+        return page
 
 
 class UserSimsAPIView(SimsAPIView):
@@ -791,7 +895,7 @@ class PublicSimsAPIView(SimsAPIView):
     def get_queryset(self):
         return self.queryset.filter(
             creation_date__gte=ANON_BEFORE,
-            project__pk__in=projects_with_access(self.request.user),
+            project__pk__in=ProjectAccess.objects.projects_for(self.request.user),
             status__in=["SUCCESS", "FAIL", "PENDING"],
         )
 
@@ -804,5 +908,6 @@ class ProfileSimsAPIView(SimsAPIView):
         username = self.request.parser_context["kwargs"].get("username", None)
         user = get_object_or_404(get_user_model(), username__iexact=username)
         return self.queryset.filter(
-            owner__user=user, project__pk__in=projects_with_access(self.request.user),
+            owner__user=user,
+            project__pk__in=ProjectAccess.objects.projects_for(self.request.user),
         )
@@ -5,7 +5,11 @@ from django.core.exceptions import PermissionDenied
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from webapp.apps.users.permissions import RequiresActive, RequiresPayment
+from webapp.apps.users.permissions import (
+    RequiresActive,
+    RequiresPayment,
+    permissions_for,
+)
 
 from webapp.settings import USE_STRIPE
 from webapp.apps.billing.utils import has_payment_method
@@ -86,9 +90,10 @@ class GetOutputsObjectMixin:
             project__title__iexact=title,
             project__owner__user__username__iexact=username,
         )
-        if not obj.has_read_access(self.request.user):
+        permissions = permissions_for(self.request)
+        if not permissions.has_read_access(obj):
             # Throw 404 on private apps to keep their names secret.
-            if not obj.project.has_read_access(self.request.user):
+            if not permissions.has_read_access(obj.project):
                 raise Http404()
             raise PermissionDenied()
         return obj
@@ -111,6 +116,13 @@ class RecordOutputsMixin:
             if isinstance(sim.traceback, str) and len(sim.traceback) > 8000:
                 sim.traceback = sim.traceback[:8000]
             sim.save()
+        if sim.owner is not None:
+            # The usage summary is only a cache, so failing to update it
+            # should not fail recording the results.
+            try:
+                sim.owner.refresh_usage()
+            except Exception as e:
+                print("unable to refresh usage for", sim.owner, e)
 
 
 class RequiresLoginPermissions:
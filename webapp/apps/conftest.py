@@ -12,6 +12,7 @@ import stripe
 import paramtools as pt
 
 from django import forms
+from django.core.cache import cache
 from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from django.utils.timezone import make_aware
@@ -116,6 +117,16 @@ def django_db_setup(django_db_setup, django_db_blocker):
                 Customer.get_or_construct(stripe_customer.id, u)
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Database changes are rolled back after each test, so nothing cached from
+    them should outlive the test.
+    """
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -1,19 +1,51 @@
-from webapp.apps.users.models import Project, projects_with_access
+from django.conf import settings
+from django.core.cache import cache
+
+from webapp.apps.users.models import (
+    Project,
+    project_list_version,
+    projects_with_access,
+)
+from webapp.apps.users.permissions import PermissionResolver, permissions_for
 from webapp.settings import DEBUG
 
+PROJECT_LIST_TIMEOUT = 60 * 60
+
 
 def project_list(request):
+    """
+    Projects for the navigation menu, cached per user until the listed
+    projects or the roles on them change. Without a shared cache the list is
+    built on every request.
+    """
     if request is not None:
         user = request.user
+        permissions = permissions_for(request)
     else:
         user = None
-    projects = projects_with_access(user, Project.objects.filter(listed=True)).order_by(
-        "owner__user__username", "title"
-    )
-    project_list = []
-    for project in projects:
-        if project.status == "running" or project.has_admin_access(request.user):
-            project_list.append(
-                (project.owner.user.username, project.title, project.app_url)
-            )
+        permissions = PermissionResolver(None)
+    if not settings.SHARED_CACHE:
+        return {"project_list": build_project_list(user, permissions), "debug": DEBUG}
+    user_key = user.pk if user and user.is_authenticated else "anon"
+    key = f"project_list:{project_list_version()}:{user_key}"
+    project_list = cache.get(key)
+    if project_list is None:
+        project_list = build_project_list(user, permissions)
+        cache.set(key, project_list, PROJECT_LIST_TIMEOUT)
     return {"project_list": project_list, "debug": DEBUG}
+
+
+def build_project_list(user, permissions):
+    projects = list(
+        projects_with_access(user, Project.objects.filter(listed=True))
+        .select_related("owner__user", "latest_tag")
+        .order_by("owner__user__username", "title")
+    )
+    permissions.prefetch(
+        [project for project in projects if project.status != "running"]
+    )
+    return [
+        (project.owner.user.username, project.title, project.app_url)
+        for project in projects
+        if project.status == "running" or permissions.has_admin_access(project)
+    ]
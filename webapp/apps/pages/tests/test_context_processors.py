@@ -1,11 +1,15 @@
-from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.test import RequestFactory
 
 import pytest
 
-from webapp.apps.users.models import Project
+from webapp.apps.users.models import Project, project_list_version
 from webapp.apps.pages.context_processors import project_list
 
+User = get_user_model()
+
 
 @pytest.mark.django_db
 def test_project_list():
@@ -29,3 +33,42 @@ def test_project_list():
     request.user = project.owner.user
     projs = project_list(request)
     assert mu in projs["project_list"]
+
+
+@pytest.mark.django_db
+def test_project_list_cache(django_assert_num_queries, settings):
+    settings.SHARED_CACHE = True
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+
+    projs = project_list(request)
+    # The list is cached until the projects or the roles on them change.
+    with django_assert_num_queries(0):
+        assert project_list(request) == projs
+
+    project = Project.objects.get(owner__user__username="hdoupe", title="Matchups")
+    mu = ("hdoupe", "Matchups", "/hdoupe/Matchups/")
+    project.listed = False
+    project.save()
+    assert mu not in project_list(request)["project_list"]
+
+    # Projects that are not running are only listed for their admins.
+    user = User.objects.get(username="modeler")
+    project.listed = True
+    project.latest_tag = None
+    project.save()
+    request.user = user
+    assert mu not in project_list(request)["project_list"]
+
+    project.assign_role("admin", user)
+    assert mu in project_list(request)["project_list"]
+
+
+@pytest.mark.django_db
+def test_project_list_without_shared_cache(settings):
+    settings.SHARED_CACHE = False
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+
+    project_list(request)
+    assert cache.get(f"project_list:{project_list_version()}:anon") is None
@@ -6,6 +6,7 @@ import pytest
 from django.contrib.auth import get_user_model, get_user
 from guardian.shortcuts import assign_perm, remove_perm
 
+from webapp.apps.comp import search
 from webapp.apps.comp.models import Simulation
 from webapp.apps.users.models import Project, Profile, Deployment, EmbedApproval, Tag
 from webapp.apps.users.serializers import ProjectSerializer, DeploymentSerializer
@@ -248,6 +249,31 @@ class TestPublishViews:
         act = set(proj["title"] for proj in resp.data["results"])
         assert exp == act
 
+    def test_search_projects(self, api_client):
+        project = Project.objects.get(title="Tax-Brain")
+        project.description = "Microsimulation of federal income taxes."
+        project.save()
+
+        resp = api_client.get("/apps/api/v1/?search=tax")
+        assert resp.status_code == 200
+        assert [proj["title"] for proj in resp.data["results"]] == ["Tax-Brain"]
+
+        resp = api_client.get("/apps/api/v1/?search=incomes")
+        assert resp.status_code == 200
+        assert [proj["title"] for proj in resp.data["results"]] == ["Tax-Brain"]
+
+        # Partial words match titles.
+        resp = api_client.get("/apps/api/v1/?search=used-for")
+        assert resp.status_code == 200
+        assert {proj["title"] for proj in resp.data["results"]} == {
+            "Used-for-testing",
+            "Used-for-testing-sponsored-apps",
+        }
+
+        # Titles are matched with ILIKE so that the trigram index can be used.
+        sql = str(search.search(Project.objects.all(), "tax").query)
+        assert '"users_project"."title" ILIKE' in sql
+
     def test_get_private_projects(self, api_client, pro_profile):
         project = Project.objects.get(title="Used-for-testing")
         project.is_public = False
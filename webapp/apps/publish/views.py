@@ -29,6 +29,7 @@ from rest_framework.pagination import PageNumberPagination
 # from webapp.settings import DEBUG
 
 from webapp.settings import USE_STRIPE
+from webapp.apps.comp import search
 from webapp.apps.users.auth import ClusterAuthentication, ClientOAuth2Authentication
 from webapp.apps.users.exceptions import PrivateAppException
 from webapp.apps.users.models import (
@@ -227,7 +228,11 @@ class ProjectAPIView(generics.ListAPIView):
         return User.objects.get(username="cs-api-user")
 
     def get_queryset(self):
-        return projects_with_access(self.request.user)
+        queryset = projects_with_access(self.request.user)
+        term = self.request.query_params.get("search", None)
+        if term:
+            queryset = search.search(queryset, term).order_by("-search_rank", "pk")
+        return queryset
 
     def post(self, request, *args, **kwargs):
         if request.user.is_authenticated:
@@ -361,7 +366,10 @@ class RecentModelsAPIView(generics.ListAPIView):
     n_recent = 7
 
     def get_queryset(self):
-        return self.request.user.profile.recent_models(limit=self.n_recent)
+        usage = self.request.user.profile.usage_summary()
+        ids = usage["recent_model_ids"][: self.n_recent]
+        projects = Project.objects.in_bulk(ids)
+        return [projects[pk] for pk in ids if pk in projects]
 
 
 class ModelsAPIView(generics.ListAPIView):
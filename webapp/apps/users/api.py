@@ -112,9 +112,10 @@ class AccessStatusAPI(GetProjectMixin, APIView):
         if kwargs:
             project = self.get_object(**kwargs)
             if plan["name"] == "free" and user.is_authenticated:
-                remaining_private_sims = user.profile.remaining_private_sims(
-                    project=project
-                )
+                name = str(project).lower()
+                remaining = user.profile.usage_summary()["remaining_private_sims"]
+                if name in remaining:
+                    remaining_private_sims = {name: remaining[name]}
             exp_cost, exp_time = project.exp_job_info(adjust=True)
             if user.is_authenticated and user.profile:
                 can_run = user.profile.can_run(project)
@@ -142,7 +143,9 @@ class AccessStatusAPI(GetProjectMixin, APIView):
             )
         else:
             if plan["name"] == "free" and user.is_authenticated:
-                remaining_private_sims = user.profile.remaining_private_sims()
+                remaining_private_sims = user.profile.usage_summary()[
+                    "remaining_private_sims"
+                ]
 
             return Response(
                 {
@@ -153,3 +156,22 @@ class AccessStatusAPI(GetProjectMixin, APIView):
                     "remaining_private_sims": remaining_private_sims,
                 }
             )
+
+
+class UsageAPI(APIView):
+    permission_classes = (StrictRequiresActive,)
+    authentication_classes = (
+        SessionAuthentication,
+        BasicAuthentication,
+        TokenAuthentication,
+    )
+
+    def get(self, request, *args, **kwargs):
+        profile = request.user.profile
+        return Response(
+            {
+                "username": request.user.username,
+                "usage": profile.usage_summary(),
+                "updated_at": profile.usage_updated_at,
+            }
+        )
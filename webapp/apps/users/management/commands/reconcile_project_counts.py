@@ -0,0 +1,18 @@
+"""
+Recompute the cached simulation, user, and inputs counts on each project.
+
+The counts are updated incrementally as simulations and inputs are saved and
+deleted, but bulk updates and cascading deletes skip those updates. Run this
+periodically to correct any drift.
+"""
+from django.core.management.base import BaseCommand
+
+from webapp.apps.users.models import Project
+
+
+class Command(BaseCommand):
+    help = "Reconcile the cached project counts"
+
+    def handle(self, *args, **options):
+        updated = Project.objects.reconcile_counts()
+        self.stdout.write(f"{updated} projects updated")
@@ -0,0 +1,15 @@
+"""
+Rebuild the project access table from the projects' visibility and the
+guardian permissions.
+"""
+from django.core.management.base import BaseCommand
+
+from webapp.apps.users.models import ProjectAccess
+
+
+class Command(BaseCommand):
+    help = "Rebuild the project access table"
+
+    def handle(self, *args, **options):
+        ProjectAccess.objects.rebuild()
+        self.stdout.write(f"{ProjectAccess.objects.count()} access rows")
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import webapp.apps.users.models
+
+
+def populate_project_access(apps, schema_editor):
+    ProjectAccess = apps.get_model("users", "ProjectAccess")
+    ProjectAccess.objects.bulk_create(
+        webapp.apps.users.models.project_access_rows(
+            apps.get_model("users", "Project"),
+            ProjectAccess,
+            apps.get_model("guardian", "UserObjectPermission"),
+            apps.get_model("contenttypes", "ContentType"),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("guardian", "0001_initial"),
+        ("users", "0032_auto_20211012_1335"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectAccess",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[
+                            ("read", "Read"),
+                            ("write", "Write"),
+                            ("admin", "Admin"),
+                        ],
+                        max_length=8,
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="access",
+                        to="users.project",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="project_access",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="projectaccess",
+            index=models.Index(
+                fields=["user", "project"], name="project_access_user_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="projectaccess",
+            constraint=models.UniqueConstraint(
+                fields=("project", "user"), name="unique_project_access"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="projectaccess",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(user__isnull=True),
+                fields=("project",),
+                name="unique_public_project_access",
+            ),
+        ),
+        migrations.RunPython(populate_project_access, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.8 on 2026-10-19 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0034_project_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="usage",
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="usage_updated_at",
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.8 on 2026-10-19 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("comp", "0033_simulation_search"),
+        ("users", "0035_profile_usage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="num_inputs",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="num_sims",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="num_users",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE users_project p SET
+                num_sims = (
+                    SELECT COUNT(*) FROM comp_simulation s WHERE s.project_id = p.id
+                ),
+                num_users = (
+                    SELECT COUNT(DISTINCT s.owner_id)
+                    FROM comp_simulation s WHERE s.project_id = p.id
+                ),
+                num_inputs = (
+                    SELECT COUNT(*) FROM comp_inputs i WHERE i.project_id = p.id
+                );
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.8 on 2026-10-20 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0036_project_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="inputs_service",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -2,16 +2,30 @@ from collections import defaultdict
 from datetime import timedelta, datetime
 import json
 import secrets
+import time
 import uuid
 
 import markdown
 import requests
 
 from django.db import models, transaction
-from django.db.models.functions import TruncMonth
-from django.db.models import F, Case, When, Sum, Max, Q, Count
+from django.db.models.functions import Coalesce, TruncMonth
+from django.db.models import (
+    F,
+    Case,
+    When,
+    Sum,
+    Max,
+    Q,
+    Count,
+    OuterRef,
+    Subquery,
+)
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import EmailMessage, send_mail
 from django.urls import reverse
 from django.utils.functional import cached_property
@@ -24,12 +38,11 @@ from guardian.shortcuts import (
     remove_perm,
     get_perms,
     get_users_with_perms,
-    get_objects_for_user,
 )
 
-from webapp.apps.comp import actions
+from webapp.apps.comp import actions, search
 from webapp.apps.comp.compute import SyncCompute, SyncProjects
-from webapp.apps.comp.models import Inputs, ANON_BEFORE
+from webapp.apps.comp.models import Inputs, Simulation, ANON_BEFORE
 from webapp.settings import (
     DEBUG,
     COMPUTE_PRICING,
@@ -87,12 +100,21 @@ class User(AbstractUser):
         return self.email
 
 
+# Bump when the fields in Profile.usage change.
+USAGE_SUMMARY_VERSION = 2
+USAGE_SUMMARY_MAX_AGE = timedelta(days=1)
+
+
 class Profile(models.Model):
     objects: models.Manager
     sims: models.QuerySet
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     is_active = models.BooleanField(default=False)
 
+    # Cached summary of the profile's usage. See usage_summary.
+    usage = models.JSONField(null=True, blank=True, default=None)
+    usage_updated_at = models.DateTimeField(null=True, blank=True, default=None)
+
     def remaining_private_sims(self, project=None):
         """Calculate number of remaining private simulations for user on free tier."""
         thirty_days_ago = timezone.now() - timedelta(days=30)
@@ -102,55 +124,86 @@ class Profile(models.Model):
         def remaining(c):
             return max(FREE_PRIVATE_SIMS - c, 0)
 
-        kwargs = dict(
-            sims__owner=self,
-            sims__is_public=False,
-            sims__creation_date__gte=thirty_days_ago,
+        sims = self.sims.filter(
+            project__isnull=False, is_public=False, creation_date__gte=thirty_days_ago,
         )
         if project is not None:
-            kwargs["sims__project"] = project
+            sims = sims.filter(project=project)
 
-        private_count = Count("sims", filter=Q(**kwargs))
-        res = Project.objects.annotate(private_count=private_count).filter(
-            private_count__gt=0
+        res = sims.values("project__owner__user__username", "project__title").annotate(
+            private_count=Count("pk")
         )
-        private_sims = {
-            str(project).lower(): remaining(project.private_count) for project in res
-        }
+        private_sims = {}
+        for row in res:
+            # Same as str(project).
+            name = f"{row['project__owner__user__username']}/{row['project__title']}"
+            private_sims[name.lower()] = remaining(row["private_count"])
 
         return private_sims
 
     def recent_models(self, limit):
-        return [
-            Project.objects.get(pk=project["project"])
-            for project in self.sims.values("project")
-            .annotate(recent_date=Max("creation_date"))
+        return list(
+            Project.objects.filter(sims__owner=self)
+            .annotate(recent_date=Max("sims__creation_date"))
             .order_by("-recent_date")[:limit]
-            if project["project"] is not None
-        ]
+        )
 
     def costs_breakdown(self, projects=None):
+        sims = self.sims.filter(Q(sponsor=self) | Q(sponsor__isnull=True))
         if projects is None:
-            projects = Project.objects.all()
-        agg = defaultdict(float)
-        for project in projects:
-            sims = (
-                self.sims.filter(sponsor=self) | self.sims.filter(sponsor__isnull=True)
-            ).filter(project=project)
-            res = (
-                sims.values(month=TruncMonth("creation_date"))
-                .annotate(
-                    effective=Case(
+            sims = sims.filter(project__isnull=False)
+        else:
+            sims = sims.filter(project__in=projects)
+        res = (
+            sims.values(month=TruncMonth("creation_date"))
+            .annotate(
+                effective__sum=Sum(
+                    Case(
                         When(run_cost=0.0, then=0.01),
                         default=F("run_cost"),
                         output_field=models.FloatField(),
                     )
                 )
-                .annotate(Sum("effective"))
             )
-            for month in res:
-                agg[month["month"]] += float(month["effective__sum"])
-        return {k.strftime("%B %Y"): v for k, v in sorted(agg.items())}
+            .order_by("month")
+        )
+        return {
+            row["month"].strftime("%B %Y"): float(row["effective__sum"]) for row in res
+        }
+
+    def refresh_usage(self):
+        """
+        Recompute the cached usage summary. This is called when one of the
+        profile's simulations finishes. Creating a simulation, or changing its
+        owner, project or visibility, clears the summary.
+        """
+        totals = self.sims.aggregate(count=Count("pk"), run_time=Sum("run_time"))
+        recent_models = self.recent_models(limit=10)
+        self.usage = {
+            "version": USAGE_SUMMARY_VERSION,
+            "sims": totals["count"],
+            "run_time": totals["run_time"] or 0,
+            "costs": self.costs_breakdown(),
+            "recent_models": [str(project) for project in recent_models],
+            "recent_model_ids": [project.pk for project in recent_models],
+            "remaining_private_sims": self.remaining_private_sims(),
+        }
+        self.usage_updated_at = timezone.now()
+        self.save(update_fields=["usage", "usage_updated_at"])
+
+    def usage_summary(self):
+        """
+        Return the cached usage summary, rebuilding it if it is missing, from
+        an older version or more than ``USAGE_SUMMARY_MAX_AGE`` old, e.g. so
+        that private simulations age out of the free tier's window.
+        """
+        if (
+            self.usage is None
+            or self.usage.get("version") != USAGE_SUMMARY_VERSION
+            or self.usage_updated_at < timezone.now() - USAGE_SUMMARY_MAX_AGE
+        ):
+            self.refresh_usage()
+        return self.usage
 
     def can_run(self, project):
         if not self.is_active:
@@ -296,14 +349,10 @@ def get_project_or_404(queryset, user=None, raise_http404=True, **kwargs):
         if user is None:
             return queryset.objects.get(is_public=True, **kwargs)
 
-        user_has_perms = get_objects_for_user(
-            user,
-            perms=["read_project", "write_project", "admin_project"],
-            klass=queryset,
-            any_perm=True,
-        )
+        if user.is_superuser:
+            return queryset.get(**kwargs)
 
-        return queryset.get(Q(is_public=True) | Q(pk__in=user_has_perms), **kwargs)
+        return queryset.get(pk__in=ProjectAccess.objects.projects_for(user), **kwargs)
 
     except Project.DoesNotExist as dne:
         if raise_http404:
@@ -315,20 +364,48 @@ def get_project_or_404(queryset, user=None, raise_http404=True, **kwargs):
 def projects_with_perms(user, queryset=None):
     if queryset is None:
         queryset = Project.objects.all()
-    return get_objects_for_user(
-        user,
-        perms=["read_project", "write_project", "admin_project"],
-        klass=queryset,
-        any_perm=True,
+    if not user or not user.is_authenticated:
+        return queryset.none()
+    if user.is_superuser:
+        return queryset
+    return queryset.filter(
+        pk__in=ProjectAccess.objects.filter(user=user).values("project_id")
     )
 
 
 def projects_with_access(user, queryset=None):
     if queryset is None:
         queryset = Project.objects.all()
-    return queryset.filter(
-        Q(is_public=True) | Q(pk__in=projects_with_perms(user, queryset))
-    )
+    if user and user.is_superuser:
+        return queryset
+    return queryset.filter(pk__in=ProjectAccess.objects.projects_for(user))
+
+
+PROJECT_LIST_VERSION_KEY = "project_list_version"
+
+
+def project_list_version():
+    """
+    Version of the listed projects and the roles on them. Cached project
+    lists are keyed by it, so changing it with ``invalidate_project_list``
+    rebuilds them.
+    """
+    return cache.get_or_set(PROJECT_LIST_VERSION_KEY, time.time_ns, timeout=None)
+
+
+def invalidate_project_list():
+    def bump():
+        try:
+            cache.incr(PROJECT_LIST_VERSION_KEY)
+        except ValueError:
+            # Start over from the clock so that a version that was evicted
+            # from the cache is never reused.
+            cache.set(PROJECT_LIST_VERSION_KEY, time.time_ns(), timeout=None)
+
+    bump()
+    # Bump it again once the change is visible to other requests, in case
+    # one of them rebuilt its list from the old data in the meantime.
+    transaction.on_commit(bump)
 
 
 class ProjectManager(models.Manager):
@@ -346,6 +423,71 @@ class ProjectManager(models.Manager):
         project.assign_role("write", project.cluster.service_account.user)
         return project
 
+    def count_sim(self, project_id, owner_id, delta, exclude_pk=None):
+        """
+        Add ``delta`` to the cached simulation count of a project when a
+        simulation owned by ``owner_id`` is added to it (1) or removed from
+        it (-1). The user count only changes when that simulation is the
+        owner's first or last one in the project.
+        """
+        if project_id is None:
+            return
+        updates = {"num_sims": F("num_sims") + delta}
+        if (
+            owner_id is not None
+            and not Simulation.objects.filter(project_id=project_id, owner_id=owner_id)
+            .exclude(pk=exclude_pk)
+            .exists()
+        ):
+            updates["num_users"] = F("num_users") + delta
+        self.filter(pk=project_id).update(**updates)
+
+    def count_inputs(self, project_id, delta):
+        if project_id is not None:
+            self.filter(pk=project_id).update(num_inputs=F("num_inputs") + delta)
+
+    def reconcile_counts(self):
+        """
+        Recompute the cached counts from the simulation and inputs tables,
+        fixing any drift from bulk updates and cascading deletes, which skip
+        the incremental updates. Returns the number of projects that were
+        out of date.
+        """
+        sims = Simulation.objects.filter(project=OuterRef("pk")).order_by()
+        counts = dict(
+            num_sims=Coalesce(
+                Subquery(sims.values("project").annotate(n=Count("pk")).values("n")), 0,
+            ),
+            num_users=Coalesce(
+                Subquery(
+                    sims.values("project")
+                    .annotate(n=Count("owner", distinct=True))
+                    .values("n")
+                ),
+                0,
+            ),
+            num_inputs=Coalesce(
+                Subquery(
+                    Inputs.objects.filter(project=OuterRef("pk"))
+                    .order_by()
+                    .values("project")
+                    .annotate(n=Count("pk"))
+                    .values("n")
+                ),
+                0,
+            ),
+        )
+        stale = (
+            self.annotate(**{f"actual_{name}": expr for name, expr in counts.items()})
+            .exclude(
+                num_sims=F("actual_num_sims"),
+                num_users=F("actual_num_users"),
+                num_inputs=F("actual_num_inputs"),
+            )
+            .values_list("pk", flat=True)
+        )
+        return self.filter(pk__in=list(stale)).update(**counts)
+
 
 def get_server_cost(cpu, memory):
     """Hourly compute costs"""
@@ -361,6 +503,8 @@ class Project(models.Model):
 
     SECS_IN_HOUR = 3600.0
 
+    COUNTS = ("num_sims", "num_users", "num_inputs")
+
     title = models.CharField(max_length=255)
     oneliner = models.CharField(max_length=10000)
     description = models.CharField(max_length=10000)
@@ -429,9 +573,81 @@ class Project(models.Model):
 
     use_iframe_resizer = models.BooleanField(default=True, null=True, blank=True)
 
+    # Serve the version, defaults, and parse tasks from a long-lived inputs
+    # service on the cluster instead of starting a job for each of them.
+    inputs_service = models.BooleanField(default=False)
+
+    # Title, oneliner, and description text for search. Updated by save.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Cached counts of the project's simulations, their distinct owners, and
+    # inputs. Kept up to date as simulations and inputs are saved and
+    # deleted, and reconciled periodically by reconcile_project_counts.
+    num_sims = models.IntegerField(default=0, editable=False)
+    num_users = models.IntegerField(default=0, editable=False)
+    num_inputs = models.IntegerField(default=0, editable=False)
+
     def __str__(self):
         return f"{self.owner}/{self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_is_public = instance.__dict__.get("is_public")
+        instance._saved_search_text = instance._search_text()
+        instance._saved_listing = instance._listing()
+        return instance
+
+    def _search_text(self):
+        return tuple(
+            self.__dict__.get(field) for field in ("title", "oneliner", "description")
+        )
+
+    def _listing(self):
+        """Fields that affect how the project is shown in project lists."""
+        return tuple(
+            self.__dict__.get(field)
+            for field in (
+                "title",
+                "owner_id",
+                "listed",
+                "latest_tag_id",
+                "repo_url",
+                "tech",
+                "callable_name",
+                "exp_task_time",
+            )
+        )
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # The counts are updated in place as sims are created, so the
+            # values loaded with this project may already be out of date.
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTS
+            ]
+        super().save(*args, **kwargs)
+        if getattr(self, "_saved_is_public", None) != self.is_public:
+            ProjectAccess.objects.set_public(self)
+            self._saved_is_public = self.is_public
+        search_text = self._search_text()
+        if getattr(self, "_saved_search_text", None) != search_text:
+            search.update_vector(
+                self, (self.title, "A"), (self.oneliner, "B"), (self.description, "C"),
+            )
+            self._saved_search_text = search_text
+        listing = self._listing()
+        if getattr(self, "_saved_listing", None) != listing:
+            invalidate_project_list()
+            self._saved_listing = listing
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_project_list()
+        return result
+
     @staticmethod
     def get_or_none(**kwargs):
         try:
@@ -522,17 +738,17 @@ class Project(models.Model):
 
     @property
     def number_runs(self):
-        return Inputs.objects.filter(project=self).count()
+        return self.num_inputs
 
     @property
     def safe_description(self):
         return mark_safe(markdown.markdown(self.description, extensions=["tables"]))
 
     def sim_count(self):
-        return self.sims.count()
+        return self.num_sims
 
     def user_count(self):
-        return self.sims.distinct("owner__user").count()
+        return self.num_users
 
     @cached_property
     def version(self):
@@ -591,49 +807,58 @@ class Project(models.Model):
     at a time, but users with a higher level permission inherit the read/write
     access from the lower level permissions, too.
 
-    This is similar to the permissions system used on the Simulation table. At
-    some point these implementations may be abstracted.
+    This is similar to the permissions system used on the Simulation table,
+    including the optional ``checker`` argument. At some point these
+    implementations may be abstracted.
     """
 
-    def has_admin_access(self, user):
+    def has_admin_access(self, user, checker=None):
         if not user or not user.is_authenticated:
             return False
 
-        return user.has_perm(Project.ADMIN[0], self)
+        return (checker or user).has_perm(Project.ADMIN[0], self)
 
-    def has_write_access(self, user):
+    def has_write_access(self, user, checker=None):
         if not user or not user.is_authenticated:
             return False
 
-        return user.has_perm(Project.WRITE[0], self) or self.has_admin_access(user)
+        return (checker or user).has_perm(
+            Project.WRITE[0], self
+        ) or self.has_admin_access(user, checker)
 
-    def has_read_access(self, user):
+    def has_read_access(self, user, checker=None):
         # Everyone has access to this sim.
         if self.is_public:
             return True
 
         if not user or not user.is_authenticated:
             return False
-        return user.has_perm(Project.READ[0], self) or self.has_write_access(user)
+        return (checker or user).has_perm(
+            Project.READ[0], self
+        ) or self.has_write_access(user, checker)
 
     def remove_permissions(self, user):
         for permission in get_perms(user, self):
             remove_perm(permission, user, self)
+        ProjectAccess.objects.set_role(self, user, None)
 
     def grant_admin_permissions(self, user):
         self.remove_permissions(user)
         self.add_collaborator_test()
         assign_perm(Project.ADMIN[0], user, self)
+        ProjectAccess.objects.set_role(self, user, "admin")
 
     def grant_write_permissions(self, user):
         self.remove_permissions(user)
         self.add_collaborator_test()
         assign_perm(Project.WRITE[0], user, self)
+        ProjectAccess.objects.set_role(self, user, "write")
 
     def grant_read_permissions(self, user):
         self.remove_permissions(user)
         self.add_collaborator_test()
         assign_perm(Project.READ[0], user, self)
+        ProjectAccess.objects.set_role(self, user, "read")
 
     @transaction.atomic
     def assign_role(self, role, user):
@@ -657,11 +882,14 @@ class Project(models.Model):
                 f"Received invalid role: {role}. Choices are read, write, or admin."
             )
 
-    def role(self, user):
+    def role(self, user, checker=None):
         if not user or not user.is_authenticated:
             return None
 
-        perms = get_perms(user, self)
+        if checker is not None:
+            perms = checker.get_perms(self)
+        else:
+            perms = get_perms(user, self)
         if not perms:
             return None
         elif perms == [Project.READ[0]]:
@@ -672,6 +900,14 @@ class Project(models.Model):
             return "admin"
 
     class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="project_search_idx"),
+            GinIndex(
+                fields=["title"],
+                name="project_title_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
         permissions = (
             ProjectPermissions.READ,
             ProjectPermissions.WRITE,
@@ -679,6 +915,137 @@ class Project(models.Model):
         )
 
 
+class ProjectAccessManager(models.Manager):
+    def projects_for(self, user):
+        """
+        Primary keys of the projects that ``user`` can see: public projects
+        and projects that the user has a role on. Superusers see every
+        project.
+        """
+        if user and user.is_superuser:
+            return Project.objects.values("pk")
+        q = Q(user__isnull=True)
+        if user and user.is_authenticated:
+            q |= Q(user=user)
+        return self.filter(q).values("project_id")
+
+    def set_role(self, project, user, role):
+        if role is None:
+            self.filter(project=project, user=user).delete()
+        else:
+            self.update_or_create(project=project, user=user, defaults={"role": role})
+        invalidate_project_list()
+
+    def set_public(self, project):
+        if project.is_public:
+            self.get_or_create(project=project, user=None, defaults={"role": "read"})
+        else:
+            self.filter(project=project, user__isnull=True).delete()
+        invalidate_project_list()
+
+    @transaction.atomic
+    def rebuild(self):
+        """
+        Rebuild the table from the projects' visibility and the guardian
+        permissions.
+        """
+        from django.contrib.contenttypes.models import ContentType
+        from guardian.models import UserObjectPermission
+
+        self.all().delete()
+        self.bulk_create(
+            project_access_rows(Project, self.model, UserObjectPermission, ContentType)
+        )
+        invalidate_project_list()
+
+
+PROJECT_ROLES = {
+    "read_project": "read",
+    "write_project": "write",
+    "admin_project": "admin",
+}
+ROLE_RANK = ["read", "write", "admin"]
+
+
+def project_access_rows(Project, ProjectAccess, UserObjectPermission, ContentType):
+    """
+    Build the ``ProjectAccess`` rows for every project: the highest role of
+    each user with a guardian permission on it and a public row if it is
+    public. The models are passed in so that migrations can use their
+    historical versions.
+    """
+    user_roles = {}
+    content_type = ContentType.objects.filter(
+        app_label="users", model="project"
+    ).first()
+    if content_type is not None:
+        perms = UserObjectPermission.objects.filter(
+            content_type=content_type, permission__codename__in=PROJECT_ROLES
+        ).values_list("object_pk", "user_id", "permission__codename")
+        for object_pk, user_id, codename in perms:
+            key = (int(object_pk), user_id)
+            role = PROJECT_ROLES[codename]
+            current = user_roles.get(key)
+            if current is None or ROLE_RANK.index(role) > ROLE_RANK.index(current):
+                user_roles[key] = role
+
+    project_ids = set(Project.objects.values_list("pk", flat=True))
+    return [
+        ProjectAccess(project_id=project_id, user_id=user_id, role=role)
+        for (project_id, user_id), role in user_roles.items()
+        if project_id in project_ids
+    ] + [
+        ProjectAccess(project_id=project_id, user=None, role="read")
+        for project_id in Project.objects.filter(is_public=True).values_list(
+            "pk", flat=True
+        )
+    ]
+
+
+class ProjectAccess(models.Model):
+    """
+    Denormalized copy of who can see each project, used to filter project
+    listings and look ups with a single indexed query instead of guardian's
+    permission joins. There is one row per user with a role on the project
+    and one row with no user if the project is public.
+
+    Rows are kept up to date by the ``Project`` methods that grant and
+    remove roles and by ``Project.save``. Use the ``sync_project_access``
+    command to rebuild the table.
+    """
+
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name="access"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name="project_access",
+    )
+    role = models.CharField(
+        choices=(("read", "Read"), ("write", "Write"), ("admin", "Admin")),
+        max_length=8,
+    )
+
+    objects = ProjectAccessManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "user"], name="unique_project_access"
+            ),
+            models.UniqueConstraint(
+                fields=["project"],
+                condition=Q(user__isnull=True),
+                name="unique_public_project_access",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "project"], name="project_access_user_idx")
+        ]
+
+
 class Build(models.Model):
     objects: models.Manager
 
@@ -1,3 +1,4 @@
+from guardian.core import ObjectPermissionChecker
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
 
@@ -24,3 +25,77 @@ class RequiresPayment(BasePermission):
             return True
         else:
             return bool(getattr(request.user, "customer", None))
+
+
+class PermissionResolver:
+    """
+    Answers a user's permission checks on simulations and projects for the
+    duration of a request.
+
+    The user's permissions on each object are loaded once by guardian's
+    ObjectPermissionChecker, or in bulk with ``prefetch``, and the results
+    of the access checks are memoized, so repeated checks, e.g. from a view
+    and then its serializer, do not query the database again. Because of
+    this, checks made after changing the user's permissions in the same
+    request should be made directly on the objects instead.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        if user and user.is_authenticated:
+            self.checker = ObjectPermissionChecker(user)
+        else:
+            self.checker = None
+        self._results = {}
+
+    def prefetch(self, objects):
+        """
+        Load the user's permissions on objects, which must all be of the same
+        model, in a single query.
+        """
+        objects = [obj for obj in objects if obj is not None]
+        if self.checker is not None and objects:
+            self.checker.prefetch_perms(objects)
+
+    def _resolve(self, method, obj):
+        key = (method, obj._meta.label, obj.pk)
+        if key not in self._results:
+            self._results[key] = getattr(obj, method)(self.user, self.checker)
+        return self._results[key]
+
+    def has_admin_access(self, obj):
+        return self._resolve("has_admin_access", obj)
+
+    def has_write_access(self, obj):
+        return self._resolve("has_write_access", obj)
+
+    def has_read_access(self, obj):
+        return self._resolve("has_read_access", obj)
+
+    def role(self, obj):
+        return self._resolve("role", obj)
+
+
+def permissions_for(request):
+    """
+    Return the PermissionResolver for the request's user, creating it on first
+    use. Works with Django and REST framework requests.
+    """
+    user = request.user
+    http_request = getattr(request, "_request", request)
+    resolver = getattr(http_request, "_permission_resolver", None)
+    if resolver is None or resolver.user is not user:
+        resolver = PermissionResolver(user)
+        http_request._permission_resolver = resolver
+    return resolver
+
+
+def get_permissions(context):
+    """
+    Return the PermissionResolver for a serializer's context: the request's
+    user, or no user if the serializer is used outside of a request.
+    """
+    request = context.get("request")
+    if request is None:
+        return PermissionResolver(None)
+    return permissions_for(request)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from webapp.apps.users.models import Build, Project, EmbedApproval, Deployment, Tag
+from webapp.apps.users.permissions import get_permissions
 
 
 class DeploymentSerializer(serializers.ModelSerializer):
@@ -41,18 +42,15 @@ class ProjectSerializer(serializers.ModelSerializer):
     social_image_link = serializers.URLField(required=False)
     embed_background_color = serializers.CharField(required=False)
     use_iframe_resizer = serializers.BooleanField(required=False)
+    inputs_service = serializers.BooleanField(required=False)
 
     # see to_representation
     # has_write_access = serializers.BooleanField(source="has_write_access")
 
     def to_representation(self, obj: Project):
         rep = super().to_representation(obj)
-        if self.context.get("request"):
-            user = self.context["request"].user
-        else:
-            user = None
-        rep["has_write_access"] = obj.has_write_access(user)
-        if not obj.has_write_access(user):
+        rep["has_write_access"] = get_permissions(self.context).has_write_access(obj)
+        if not rep["has_write_access"]:
             rep.pop("sim_count")
             rep.pop("user_count")
         return rep
@@ -93,6 +91,7 @@ class ProjectSerializer(serializers.ModelSerializer):
             "social_image_link",
             "embed_background_color",
             "use_iframe_resizer",
+            "inputs_service",
         )
         read_only = (
             "sim_count",
@@ -112,18 +111,15 @@ class ProjectWithVersionSerializer(serializers.ModelSerializer):
     social_image_link = serializers.URLField(required=False)
     embed_background_color = serializers.CharField(required=False)
     use_iframe_resizer = serializers.BooleanField(required=False)
+    inputs_service = serializers.BooleanField(required=False)
 
     # see to_representation
     # has_write_access = serializers.BooleanField(source="has_write_access")
 
     def to_representation(self, obj):
         rep = super().to_representation(obj)
-        if self.context.get("request"):
-            user = self.context["request"].user
-        else:
-            user = None
-        rep["has_write_access"] = obj.has_write_access(user)
-        if not obj.has_write_access(user):
+        rep["has_write_access"] = get_permissions(self.context).has_write_access(obj)
+        if not rep["has_write_access"]:
             rep.pop("sim_count")
             rep.pop("user_count")
         return rep
@@ -155,6 +151,7 @@ class ProjectWithVersionSerializer(serializers.ModelSerializer):
             "social_image_link",
             "embed_background_color",
             "use_iframe_resizer",
+            "inputs_service",
         )
         read_only = ("sim_count", "status", "user_count", "version", "latest_tag")
 
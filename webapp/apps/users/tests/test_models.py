@@ -3,19 +3,26 @@ import datetime
 import pytest
 
 from django.contrib.auth import get_user_model
+from django.http import Http404
 from guardian.shortcuts import assign_perm, remove_perm, get_perms, get_users_with_perms
 
 
 from webapp.apps.billing.models import Customer
 from webapp.apps.users.models import (
+    USAGE_SUMMARY_VERSION,
     Profile,
     Project,
+    ProjectAccess,
+    get_project_or_404,
     is_profile_active,
+    projects_with_access,
+    projects_with_perms,
     Deployment,
     DeploymentException,
     EmbedApproval,
 )
 from webapp.apps.users.exceptions import PrivateAppException
+from webapp.apps.users.permissions import PermissionResolver
 from webapp.apps.users.tests.utils import gen_collabs, replace_owner
 from webapp.apps.comp.models import Simulation, ANON_BEFORE
 
@@ -58,6 +65,80 @@ class TestUserModels:
         """See conftest for initial values in test_models"""
         assert profile.costs_breakdown() == {"February 2019": 1.0}
 
+    def test_profile_usage_summary(
+        self, test_models, profile, django_assert_max_num_queries
+    ):
+        """See conftest for initial values in test_models"""
+        # The summary takes a fixed number of queries.
+        with django_assert_max_num_queries(4):
+            summary = profile.usage_summary()
+        assert summary == {
+            "version": USAGE_SUMMARY_VERSION,
+            "sims": 2,
+            "run_time": 20,
+            "costs": {"February 2019": 1.0},
+            "recent_models": [str(test_models[0].project), str(test_models[1].project)],
+            "recent_model_ids": [test_models[0].project.pk, test_models[1].project.pk],
+            "remaining_private_sims": profile.remaining_private_sims(),
+        }
+        assert profile.usage_updated_at is not None
+
+        # Served from the cache until it is refreshed.
+        test_models[0].run_cost = 2
+        test_models[0].save()
+        with django_assert_max_num_queries(0):
+            assert profile.usage_summary()["costs"] == {"February 2019": 1.0}
+        profile.refresh_usage()
+        assert profile.usage_summary()["costs"] == {"February 2019": 2.0}
+
+        # Changing a sim's visibility clears the cached summary.
+        test_models[0].is_public = not test_models[0].is_public
+        test_models[0].save()
+        profile.refresh_from_db()
+        assert profile.usage is None
+
+    def test_project_counts(self, test_models, profile):
+        """See conftest for initial values in test_models"""
+        sim = test_models[0]
+        project = sim.project
+        project.refresh_from_db()
+        assert (project.sim_count(), project.user_count(), project.number_runs) == (
+            1,
+            1,
+            1,
+        )
+
+        modeler = User.objects.get(username="modeler").profile
+        sim.is_public = True
+        sim.save()
+        fork = Simulation.objects.fork(sim, profile.user)
+        project.refresh_from_db()
+        assert (project.sim_count(), project.user_count(), project.number_runs) == (
+            2,
+            1,
+            2,
+        )
+
+        # Saving a project does not overwrite the counts with stale values.
+        stale = Project.objects.get(pk=project.pk)
+        fork.owner = modeler
+        fork.save()
+        stale.save()
+        project.refresh_from_db()
+        assert (project.sim_count(), project.user_count()) == (2, 2)
+
+        fork.delete()
+        project.refresh_from_db()
+        assert (project.sim_count(), project.user_count()) == (1, 1)
+
+        # Bulk updates skip the counts until they are reconciled.
+        Simulation.objects.filter(pk=sim.pk).update(owner=modeler)
+        Project.objects.filter(pk=project.pk).update(num_sims=0, num_users=0)
+        assert Project.objects.reconcile_counts() == 1
+        project.refresh_from_db()
+        assert (project.sim_count(), project.user_count()) == (1, 1)
+        assert Project.objects.reconcile_counts() == 0
+
     def test_project_show_sponsor(self, test_models):
         """See conftest for initial values in test_models."""
         reg, sponsored = test_models
@@ -234,6 +315,79 @@ class TestProjectPermissionse:
         with pytest.raises(ValueError):
             project.assign_role("dne", collab.user)
 
+    def test_project_access_table(self, db, project, pro_profile):
+        collab = next(gen_collabs(1))
+        replace_owner(project, pro_profile)
+        project.is_public = False
+        project.save()
+
+        def visible(user):
+            return set(
+                projects_with_access(user, Project.objects.filter(pk=project.pk))
+            )
+
+        assert visible(project.owner.user) == {project}
+        assert visible(collab.user) == set()
+        assert visible(None) == set()
+
+        superuser = User.objects.create_superuser(
+            "superuser", "superuser@example.com", "password"
+        )
+        assert visible(superuser) == {project}
+        assert project in projects_with_perms(superuser)
+        assert get_project_or_404(Project.objects.all(), superuser, pk=project.pk)
+
+        project.assign_role("read", collab.user)
+        assert (
+            ProjectAccess.objects.get(project=project, user=collab.user).role == "read"
+        )
+        assert visible(collab.user) == {project}
+        assert get_project_or_404(Project.objects.all(), collab.user, pk=project.pk)
+
+        project.assign_role("write", collab.user)
+        assert (
+            ProjectAccess.objects.get(project=project, user=collab.user).role == "write"
+        )
+
+        project.assign_role(None, collab.user)
+        assert visible(collab.user) == set()
+        with pytest.raises(Http404):
+            get_project_or_404(Project.objects.all(), collab.user, pk=project.pk)
+
+        project.is_public = True
+        project.save()
+        assert visible(collab.user) == {project}
+        assert visible(None) == {project}
+
+        ProjectAccess.objects.all().delete()
+        ProjectAccess.objects.rebuild()
+        assert visible(collab.user) == {project}
+        assert (
+            ProjectAccess.objects.get(project=project, user=project.owner.user).role
+            == "admin"
+        )
+
+    def test_permission_resolver(
+        self, db, project, pro_profile, django_assert_num_queries
+    ):
+        collab = next(gen_collabs(1))
+        replace_owner(project, pro_profile)
+        project.is_public = False
+        project.save()
+        project.assign_role("write", collab.user)
+
+        resolver = PermissionResolver(collab.user)
+        assert resolver.has_write_access(project)
+        # Everything else is answered from memory.
+        with django_assert_num_queries(0):
+            assert resolver.has_read_access(project)
+            assert resolver.has_write_access(project)
+            assert not resolver.has_admin_access(project)
+            assert resolver.role(project) == "write"
+
+        assert not PermissionResolver(None).has_read_access(project)
+        assert PermissionResolver(project.owner.user).role(project) == "admin"
+
 
 class TestDeployments:
     def test_create_deployment_with_ea(self, db, profile, mock_post_to_cluster):
@@ -16,6 +16,7 @@ urlpatterns = [
     path("autocomplete", api.UsersAPIView.as_view(), name="query_users"),
     path("status/", api.AccessStatusAPI.as_view(), name="access_status"),
     path("me/", api.MeAPI.as_view(), name="me",),
+    path("usage/", api.UsageAPI.as_view(), name="usage"),
     path(
         "status/<str:username>/<str:title>/",
         api.AccessStatusAPI.as_view(),
@@ -78,6 +78,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "webapp.apps.comp",
@@ -170,6 +171,24 @@ DATABASES = {
     "TEST": dict(default_db_url(), **{"NAME": "testdb",}),
 }
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": os.environ.get("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Whether every web process uses the same cache. Caches that are invalidated
+# from another request, e.g. the navigation project list, are skipped
+# otherwise since each process would keep its own stale copy.
+SHARED_CACHE = bool(os.environ.get("REDIS_URL"))
+
 AUTHENTICATION_BACKENDS = (
     "django.contrib.auth.backends.ModelBackend",  # default
     "guardian.backends.ObjectPermissionBackend",
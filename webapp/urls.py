@@ -41,6 +41,11 @@ urlpatterns = [
         name="data__view",
     ),
     path("outputs/api/", compviews.OutputsAPIView.as_view(), name="outputs_api"),
+    path(
+        "outputs/api/progress/",
+        compviews.ProgressAPIView.as_view(),
+        name="progress_api",
+    ),
     path("inputs/api/", compviews.MyInputsAPIView.as_view(), name="myinputs_api"),
     path(
         "model-config/api/",
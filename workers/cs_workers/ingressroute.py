@@ -2,8 +2,8 @@ from kubernetes import client
 
 
 class IngressRouteApi:
-    def __init__(self,):
-        self.client = client.CustomObjectsApi()
+    def __init__(self, api_client=None):
+        self.client = client.CustomObjectsApi(api_client)
         self.group = "traefik.containo.us"
         self.version = "v1alpha1"
 
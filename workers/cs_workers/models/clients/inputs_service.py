@@ -0,0 +1,204 @@
+import sys
+import yaml
+
+from kubernetes import client as kclient
+
+from cs_workers.utils import clean
+from cs_workers.models.clients import kube
+from cs_workers.models.secrets import ModelSecrets
+
+PORT = 8010
+
+SERVICE_LABEL = "cs-inputs-service"
+
+
+class InputsService:
+    """
+    Long-lived deployment that serves a project's ``version``, ``defaults``
+    and ``parse`` routes over HTTP via ``cs-jobs --http-port``. It is only
+    exposed inside the cluster.
+    """
+
+    def __init__(
+        self,
+        project,
+        owner,
+        title,
+        tag,
+        model_config,
+        annotations=None,
+        replicas=1,
+        namespace="default",
+        cr="gcr.io",
+        incluster=True,
+        quiet=True,
+    ):
+        self.project = project
+        self.owner = owner
+        self.title = title
+        self.tag = tag
+        self.model_config = model_config
+        self.annotations = annotations or {}
+        self.replicas = replicas
+        self.namespace = namespace
+        self.cr = cr
+        self.quiet = quiet
+
+        self.incluster = incluster
+        self.deployment_api_client = kube.apps_api(self.incluster)
+        self.service_api_client = kube.core_api(self.incluster)
+
+    def env(self, owner, title, config):
+        safeowner = clean(owner)
+        safetitle = clean(title)
+        envs = [
+            kclient.V1EnvVar("OWNER", owner),
+            kclient.V1EnvVar("TITLE", title),
+            kclient.V1EnvVar("EXP_TASK_TIME", str(config["exp_task_time"])),
+        ]
+
+        for secret in ModelSecrets(
+            owner=owner, title=title, project=self.project
+        ).names():
+            envs.append(
+                kclient.V1EnvVar(
+                    name=secret,
+                    value_from=kclient.V1EnvVarSource(
+                        secret_key_ref=(
+                            kclient.V1SecretKeySelector(
+                                key=secret, name=f"{safeowner}-{safetitle}-secret"
+                            )
+                        )
+                    ),
+                )
+            )
+        return envs
+
+    def configure(self):
+        config = self.model_config
+        safeowner = clean(self.owner)
+        safetitle = clean(self.title)
+        name = self.full_name
+        labels = {"app": name, SERVICE_LABEL: "true"}
+
+        container = kclient.V1Container(
+            name=name,
+            image=f"{self.cr}/{self.project}/{safeowner}_{safetitle}_tasks:{self.tag}",
+            command=["cs-jobs", "--http-port", str(PORT)],
+            env=self.env(self.owner, self.title, config),
+            resources=kclient.V1ResourceRequirements(**config["resources"]),
+            ports=[kclient.V1ContainerPort(container_port=PORT)],
+            readiness_probe=kclient.V1Probe(
+                http_get=kclient.V1HTTPGetAction(path="/health/", port=PORT),
+                period_seconds=5,
+            ),
+        )
+        template = kclient.V1PodTemplateSpec(
+            metadata=kclient.V1ObjectMeta(labels=labels),
+            spec=kclient.V1PodSpec(
+                restart_policy="Always",
+                containers=[container],
+                node_selector={"component": "model"},
+            ),
+        )
+        spec = kclient.V1DeploymentSpec(
+            template=template,
+            selector=kclient.V1LabelSelector(match_labels={"app": name}),
+            replicas=self.replicas,
+        )
+        deployment = kclient.V1Deployment(
+            api_version="apps/v1",
+            kind="Deployment",
+            metadata=kclient.V1ObjectMeta(
+                name=name, labels=labels, annotations=self.annotations
+            ),
+            spec=spec,
+        )
+
+        service = kclient.V1Service(
+            api_version="v1",
+            kind="Service",
+            metadata=kclient.V1ObjectMeta(name=name, labels=labels),
+            spec=kclient.V1ServiceSpec(
+                selector={"app": name},
+                ports=[
+                    kclient.V1ServicePort(port=80, target_port=PORT, protocol="TCP")
+                ],
+                type="ClusterIP",
+            ),
+        )
+
+        if not self.quiet:
+            sys.stdout.write(yaml.dump(deployment.to_dict()))
+            sys.stdout.write("---\n")
+            sys.stdout.write(yaml.dump(service.to_dict()))
+
+        self.deployment, self.service = deployment, service
+
+    def deployment_from_cluster(self):
+        try:
+            return self.deployment_api_client.read_namespaced_deployment(
+                self.full_name, self.namespace
+            )
+        except kclient.rest.ApiException as e:
+            if e.reason != "Not Found":
+                raise e
+        return None
+
+    def service_from_cluster(self):
+        try:
+            return self.service_api_client.read_namespaced_service(
+                self.full_name, self.namespace
+            )
+        except kclient.rest.ApiException as e:
+            if e.reason != "Not Found":
+                raise e
+        return None
+
+    def ready(self):
+        deployment = self.deployment_from_cluster()
+        return deployment is not None and (deployment.status.ready_replicas or 0) > 0
+
+    def create(self):
+        if self.deployment_from_cluster() is None:
+            self.deployment_api_client.create_namespaced_deployment(
+                namespace=self.namespace, body=self.deployment
+            )
+        if self.service_from_cluster() is None:
+            self.service_api_client.create_namespaced_service(
+                namespace=self.namespace, body=self.service
+            )
+
+    def delete(self):
+        deleted = False
+        if self.deployment_from_cluster():
+            print(f"deleting deployment: {self.full_name}")
+            self.deployment_api_client.delete_namespaced_deployment(
+                namespace=self.namespace, name=self.full_name
+            )
+            deleted = True
+        if self.service_from_cluster():
+            print(f"deleting service: {self.full_name}")
+            self.service_api_client.delete_namespaced_service(
+                namespace=self.namespace, name=self.full_name
+            )
+            deleted = True
+        return deleted
+
+    @property
+    def url(self):
+        return f"http://{self.full_name}.{self.namespace}.svc.cluster.local"
+
+    @property
+    def full_name(self):
+        safeowner = clean(self.owner)
+        safetitle = clean(self.title)
+        return f"{safeowner}-{safetitle}-inputs-{clean(self.tag)}"
+
+
+def list_services(namespace="default", incluster=True):
+    return (
+        kube.apps_api(incluster)
+        .list_namespaced_deployment(namespace, label_selector=f"{SERVICE_LABEL}=true")
+        .items
+    )
@@ -4,9 +4,10 @@ import redis
 import uuid
 import yaml
 
-from kubernetes import client as kclient, config as kconfig
+from kubernetes import client as kclient
 
 from cs_workers.utils import clean, redis_conn_from_env
+from cs_workers.models.clients import kube
 from cs_workers.models.secrets import ModelSecrets
 
 redis_conn = dict(
@@ -31,6 +32,8 @@ class Job:
         incluster=True,
         quiet=True,
         namespace="default",
+        active_deadline_seconds=None,
+        ttl_seconds_after_finished=0,
     ):
         self.project = project
         self.owner = owner
@@ -41,13 +44,11 @@ class Job:
         self.cr = cr
         self.quiet = quiet
         self.namespace = namespace
+        self.active_deadline_seconds = active_deadline_seconds
+        self.ttl_seconds_after_finished = ttl_seconds_after_finished
 
         self.incluster = incluster
-        if self.incluster:
-            kconfig.load_incluster_config()
-        else:
-            kconfig.load_kube_config()
-        self.api_client = kclient.BatchV1Api()
+        self.api_client = kube.batch_api(self.incluster)
         self.job = self.configure(owner, title, tag, job_id, callback_url, route_name)
 
     def env(self, owner, title, config):
@@ -77,7 +78,7 @@ class Job:
 
         for secret in ModelSecrets(
             owner=owner, title=title, project=self.project
-        ).list():
+        ).names():
             envs.append(
                 kclient.V1EnvVar(
                     name=secret,
@@ -126,7 +127,10 @@ class Job:
         )
         # Create the specification of deployment
         spec = kclient.V1JobSpec(
-            template=template, backoff_limit=1, ttl_seconds_after_finished=0
+            template=template,
+            backoff_limit=1,
+            active_deadline_seconds=self.active_deadline_seconds,
+            ttl_seconds_after_finished=self.ttl_seconds_after_finished,
         )
         # Instantiate the job object
         job = kclient.V1Job(
@@ -0,0 +1,97 @@
+"""
+Process-level registry of Kubernetes API clients.
+
+Loading the cluster config and opening a TLS connection to the kube-apiserver
+is relatively expensive, so the workers API loads the config once per process
+and shares one ``ApiClient`` (and its urllib3 connection pool) between all of
+the typed API objects handed out here.
+"""
+import os
+import threading
+
+import redis
+from kubernetes import client as kclient, config as kconfig
+
+from cs_workers.ingressroute import IngressRouteApi
+
+POOL_MAXSIZE = int(os.environ.get("KUBE_CONNECTION_POOL_MAXSIZE", 16))
+
+_lock = threading.Lock()
+_api_clients = {}
+_apis = {}
+_redis_pools = {}
+
+
+def api_client(incluster=True):
+    """
+    Return the shared ``ApiClient`` for the in-cluster or local kube config.
+    """
+    api = _api_clients.get(incluster)
+    if api is not None:
+        return api
+
+    with _lock:
+        api = _api_clients.get(incluster)
+        if api is None:
+            configuration = kclient.Configuration()
+            if incluster:
+                kconfig.load_incluster_config(client_configuration=configuration)
+            else:
+                kconfig.load_kube_config(client_configuration=configuration)
+            configuration.connection_pool_maxsize = POOL_MAXSIZE
+            api = kclient.ApiClient(configuration)
+            _api_clients[incluster] = api
+    return api
+
+
+def _get_api(cls, incluster):
+    key = (cls, incluster)
+    api = _apis.get(key)
+    if api is None:
+        api = cls(api_client(incluster))
+        _apis[key] = api
+    return api
+
+
+def batch_api(incluster=True):
+    return _get_api(kclient.BatchV1Api, incluster)
+
+
+def apps_api(incluster=True):
+    return _get_api(kclient.AppsV1Api, incluster)
+
+
+def core_api(incluster=True):
+    return _get_api(kclient.CoreV1Api, incluster)
+
+
+def ingressroute_api(incluster=True):
+    return _get_api(IngressRouteApi, incluster)
+
+
+def redis_client(**conn):
+    """
+    Return a Redis client backed by a connection pool that is shared by all
+    callers using the same connection kwargs.
+    """
+    key = tuple(sorted(conn.items()))
+    with _lock:
+        pool = _redis_pools.get(key)
+        if pool is None:
+            pool = redis.ConnectionPool(**conn)
+            _redis_pools[key] = pool
+    return redis.Redis(connection_pool=pool)
+
+
+def reset():
+    """
+    Close and forget all shared clients. Mostly useful for tests.
+    """
+    with _lock:
+        for api in _api_clients.values():
+            api.close()
+        for pool in _redis_pools.values():
+            pool.disconnect()
+        _api_clients.clear()
+        _apis.clear()
+        _redis_pools.clear()
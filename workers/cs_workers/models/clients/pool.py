@@ -0,0 +1,233 @@
+import sys
+import yaml
+
+from kubernetes import client as kclient
+
+from cs_workers.utils import clean
+from cs_workers.models.clients import kube
+from cs_workers.models.secrets import ModelSecrets
+
+POOL_LABEL = "cs-warm-pool"
+
+HEALTH_PORT = 8011
+
+
+class WarmPool:
+    """
+    Deployment of idle task workers for one (project, tag). Each pod runs
+    ``cs-jobs --serve`` and pulls ``defaults``, ``parse`` and ``version``
+    tasks from the workers API instead of waiting for a new Job to start.
+    Workers exit after ``max_tasks`` tasks and are restarted by the
+    deployment. ``token`` authenticates the workers with the workers API and
+    is stored in a secret next to the deployment.
+    """
+
+    def __init__(
+        self,
+        project,
+        owner,
+        title,
+        tag,
+        model_config,
+        pool_url,
+        token,
+        max_tasks=None,
+        annotations=None,
+        namespace="default",
+        cr="gcr.io",
+        incluster=True,
+        quiet=True,
+    ):
+        self.project = project
+        self.owner = owner
+        self.title = title
+        self.tag = tag
+        self.model_config = model_config
+        self.pool_url = pool_url
+        self.token = token
+        self.max_tasks = max_tasks
+        self.annotations = annotations or {}
+        self.namespace = namespace
+        self.cr = cr
+        self.quiet = quiet
+
+        self.incluster = incluster
+        self.deployment_api_client = kube.apps_api(self.incluster)
+
+    def env(self, owner, title, config):
+        safeowner = clean(owner)
+        safetitle = clean(title)
+        envs = [
+            kclient.V1EnvVar("OWNER", owner),
+            kclient.V1EnvVar("TITLE", title),
+            kclient.V1EnvVar("EXP_TASK_TIME", str(config["exp_task_time"])),
+            kclient.V1EnvVar(
+                name="POOL_TOKEN",
+                value_from=kclient.V1EnvVarSource(
+                    secret_key_ref=kclient.V1SecretKeySelector(
+                        key="POOL_TOKEN", name=token_secret_name(self.full_name)
+                    )
+                ),
+            ),
+        ]
+
+        for secret in ModelSecrets(
+            owner=owner, title=title, project=self.project
+        ).names():
+            envs.append(
+                kclient.V1EnvVar(
+                    name=secret,
+                    value_from=kclient.V1EnvVarSource(
+                        secret_key_ref=(
+                            kclient.V1SecretKeySelector(
+                                key=secret, name=f"{safeowner}-{safetitle}-secret"
+                            )
+                        )
+                    ),
+                )
+            )
+        return envs
+
+    def configure(self, replicas=1):
+        config = self.model_config
+        safeowner = clean(self.owner)
+        safetitle = clean(self.title)
+        name = self.full_name
+        labels = {
+            "app": name,
+            POOL_LABEL: "true",
+            "owner": safeowner,
+            "title": safetitle,
+            "tag": clean(self.tag),
+        }
+
+        command = [
+            "cs-jobs",
+            "--serve",
+            self.pool_url,
+            "--health-port",
+            str(HEALTH_PORT),
+        ]
+        if self.max_tasks:
+            command += ["--max-tasks", str(self.max_tasks)]
+
+        container = kclient.V1Container(
+            name=name,
+            image=f"{self.cr}/{self.project}/{safeowner}_{safetitle}_tasks:{self.tag}",
+            command=command,
+            env=self.env(self.owner, self.title, config),
+            resources=kclient.V1ResourceRequirements(**config["resources"]),
+            ports=[kclient.V1ContainerPort(container_port=HEALTH_PORT)],
+            liveness_probe=kclient.V1Probe(
+                http_get=kclient.V1HTTPGetAction(path="/health/", port=HEALTH_PORT),
+                initial_delay_seconds=30,
+                period_seconds=30,
+                failure_threshold=3,
+            ),
+        )
+        template = kclient.V1PodTemplateSpec(
+            metadata=kclient.V1ObjectMeta(labels=labels),
+            spec=kclient.V1PodSpec(
+                restart_policy="Always",
+                containers=[container],
+                node_selector={"component": "model"},
+            ),
+        )
+        spec = kclient.V1DeploymentSpec(
+            template=template,
+            selector=kclient.V1LabelSelector(match_labels={"app": name}),
+            replicas=replicas,
+        )
+        self.deployment = kclient.V1Deployment(
+            api_version="apps/v1",
+            kind="Deployment",
+            metadata=kclient.V1ObjectMeta(
+                name=name, labels=labels, annotations=self.annotations
+            ),
+            spec=spec,
+        )
+
+        if not self.quiet:
+            sys.stdout.write(yaml.dump(self.deployment.to_dict()))
+
+        return self.deployment
+
+    def deployment_from_cluster(self):
+        try:
+            return self.deployment_api_client.read_namespaced_deployment(
+                self.full_name, self.namespace
+            )
+        except kclient.rest.ApiException as e:
+            if e.reason != "Not Found":
+                raise e
+        return None
+
+    def create_token_secret(self):
+        secret = kclient.V1Secret(
+            metadata=kclient.V1ObjectMeta(name=token_secret_name(self.full_name)),
+            string_data={"POOL_TOKEN": self.token},
+        )
+        try:
+            kube.core_api(self.incluster).create_namespaced_secret(
+                namespace=self.namespace, body=secret
+            )
+        except kclient.rest.ApiException as e:
+            if e.status != 409:
+                raise e
+
+    def scale(self, replicas):
+        """
+        Create the pool with ``replicas`` pods or resize the existing pool.
+        """
+        deployment = self.deployment_from_cluster()
+        if deployment is None:
+            self.create_token_secret()
+            self.configure(replicas=replicas)
+            return self.deployment_api_client.create_namespaced_deployment(
+                namespace=self.namespace, body=self.deployment
+            )
+        if deployment.spec.replicas == replicas:
+            return deployment
+        print(f"scaling pool {self.full_name} to {replicas}")
+        deployment.spec.replicas = replicas
+        return self.deployment_api_client.replace_namespaced_deployment(
+            name=self.full_name, namespace=self.namespace, body=deployment
+        )
+
+    def delete(self):
+        if self.deployment_from_cluster() is None:
+            return False
+        print(f"deleting pool: {self.full_name}")
+        self.deployment_api_client.delete_namespaced_deployment(
+            namespace=self.namespace, name=self.full_name
+        )
+        delete_token_secret(self.full_name, self.namespace, self.incluster)
+        return True
+
+    @property
+    def full_name(self):
+        safeowner = clean(self.owner)
+        safetitle = clean(self.title)
+        return f"{safeowner}-{safetitle}-pool-{clean(self.tag)}"
+
+
+def token_secret_name(pool_name):
+    return f"{pool_name}-token"
+
+
+def delete_token_secret(pool_name, namespace="default", incluster=True):
+    try:
+        kube.core_api(incluster).delete_namespaced_secret(
+            name=token_secret_name(pool_name), namespace=namespace
+        )
+    except kclient.rest.ApiException as e:
+        if e.status != 404:
+            raise e
+
+
+def list_pools(namespace="default", incluster=True):
+    return (
+        kube.apps_api(incluster)
+        .list_namespaced_deployment(namespace, label_selector=f"{POOL_LABEL}=true")
+        .items
+    )
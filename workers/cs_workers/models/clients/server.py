@@ -4,12 +4,13 @@ import redis
 import sys
 import yaml
 
-from kubernetes import client as kclient, config as kconfig
+from kubernetes import client as kclient
 
 
 from cs_workers.utils import clean, redis_conn_from_env
 from cs_workers.config import ModelConfig
-from cs_workers.ingressroute import IngressRouteApi, ingressroute_template
+from cs_workers.ingressroute import ingressroute_template
+from cs_workers.models.clients import kube
 from cs_workers.models.secrets import ModelSecrets
 
 PORT = 8010
@@ -54,16 +55,12 @@ class Server:
 
         self.incluster = incluster
         if rclient is None:
-            self.rclient = redis.Redis(**redis_conn)
+            self.rclient = kube.redis_client(**redis_conn)
         else:
             self.rclient = rclient
-        if self.incluster:
-            kconfig.load_incluster_config()
-        else:
-            kconfig.load_kube_config()
-        self.deployment_api_client = kclient.AppsV1Api()
-        self.service_api_client = kclient.CoreV1Api()
-        self.ir_api_client = IngressRouteApi()
+        self.deployment_api_client = kube.apps_api(self.incluster)
+        self.service_api_client = kube.core_api(self.incluster)
+        self.ir_api_client = kube.ingressroute_api(self.incluster)
 
     def env(self, owner, title, deployment_name, config):
         safeowner = clean(owner)
@@ -75,7 +72,7 @@ class Server:
 
         for secret in ModelSecrets(
             owner=owner, title=title, project=self.project
-        ).list():
+        ).names():
             envs.append(
                 kclient.V1EnvVar(
                     name=secret,
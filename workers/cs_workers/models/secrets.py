@@ -2,12 +2,17 @@ import argparse
 import json
 import os
 
-from cs_workers.utils import clean
+from cs_workers.utils import clean, TTLCache
 import cs_secrets
 
+# (project, owner, title) -> secret names. Creating a job only needs the names
+# of a project's secrets to mount them, so they are cached instead of fetched
+# from the secrets backend every time.
+_names_cache = TTLCache(ttl=int(os.environ.get("SECRETS_CACHE_TTL_SECONDS", 300)))
+
 
 class ModelSecrets(cs_secrets.Secrets):
-    def __init__(self, owner=None, title=None, name=None, project=None):
+    def __init__(self, owner=None, title=None, name=None, project=None, backend=None):
         if owner and title:
             self.owner = owner
             self.title = title
@@ -16,7 +21,11 @@ class ModelSecrets(cs_secrets.Secrets):
         self.project = project
         self.safe_owner = clean(self.owner)
         self.safe_title = clean(self.title)
-        super().__init__(project)
+        super().__init__(project, backend=backend)
+
+    @property
+    def cache_key(self):
+        return (self.project, self.owner, self.title)
 
     def set(self, name, value):
         secret_name = f"{self.safe_owner}_{self.safe_title}"
@@ -24,7 +33,6 @@ class ModelSecrets(cs_secrets.Secrets):
             secret_val = self.get()
         except cs_secrets.SecretNotFound:
             secret_val = {name: value}
-            return super().set(secret_name, json.dumps(secret_val))
         else:
             if secret_val is not None:
                 secret_val[name] = value
@@ -33,7 +41,9 @@ class ModelSecrets(cs_secrets.Secrets):
             if value is None:
                 secret_val.pop(name)
 
-        return super().set(secret_name, json.dumps(secret_val))
+        result = super().set(secret_name, json.dumps(secret_val))
+        _names_cache.delete(self.cache_key)
+        return result
 
     def get(self, name=None):
         secret_name = f"{self.safe_owner}_{self.safe_title}"
@@ -52,6 +62,16 @@ class ModelSecrets(cs_secrets.Secrets):
     def list(self):
         return self.get()
 
+    def names(self):
+        """
+        Names of the project's secrets, cached for ``SECRETS_CACHE_TTL_SECONDS``.
+        """
+        names = _names_cache.get(self.cache_key)
+        if names is None:
+            names = sorted(self.get())
+            _names_cache.set(self.cache_key, names)
+        return list(names)
+
     def delete(self, name):
         return self.set(name, None)
 
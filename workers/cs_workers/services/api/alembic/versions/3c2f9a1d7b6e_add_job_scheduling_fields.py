@@ -0,0 +1,34 @@
+"""Add job scheduling fields
+
+Revision ID: 3c2f9a1d7b6e
+Revises: fd47bf4df408
+Create Date: 2026-10-19 14:02:11.482913+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3c2f9a1d7b6e"
+down_revision = "fd47bf4df408"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("project_id", sa.Integer(), nullable=True))
+    op.add_column("jobs", sa.Column("admitted_at", sa.DateTime(), nullable=True))
+    op.add_column("jobs", sa.Column("submitter", sa.String(), nullable=True))
+    op.add_column("jobs", sa.Column("priority", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "jobs_project_id_fkey", "jobs", "projects", ["project_id"], ["id"]
+    )
+
+
+def downgrade():
+    op.drop_constraint("jobs_project_id_fkey", "jobs", type_="foreignkey")
+    op.drop_column("jobs", "priority")
+    op.drop_column("jobs", "submitter")
+    op.drop_column("jobs", "admitted_at")
+    op.drop_column("jobs", "project_id")
@@ -0,0 +1,24 @@
+"""Add outbox failed_at
+
+Revision ID: 4f2a9c7e1d85
+Revises: 6b2e8d4f1a37
+Create Date: 2026-10-20 11:47:05.318862+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4f2a9c7e1d85"
+down_revision = "6b2e8d4f1a37"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("outbox", sa.Column("failed_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("outbox", "failed_at")
@@ -0,0 +1,26 @@
+"""Add job launch attempts
+
+Revision ID: 6b2e8d4f1a37
+Revises: 9d1e7a4c3b62
+Create Date: 2026-10-20 09:12:31.204518+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6b2e8d4f1a37"
+down_revision = "9d1e7a4c3b62"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("launch_attempts", sa.Integer(), nullable=True))
+    op.add_column("jobs", sa.Column("next_launch_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("jobs", "next_launch_at")
+    op.drop_column("jobs", "launch_attempts")
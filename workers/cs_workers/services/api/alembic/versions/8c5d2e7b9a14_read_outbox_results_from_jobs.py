@@ -0,0 +1,73 @@
+"""Read outbox results from jobs
+
+Revision ID: 8c5d2e7b9a14
+Revises: 4f2a9c7e1d85
+Create Date: 2026-10-21 09:32:41.581203+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8c5d2e7b9a14"
+down_revision = "4f2a9c7e1d85"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("traceback", sa.String(), nullable=True))
+    op.add_column("jobs", sa.Column("meta", sa.JSON(), nullable=True))
+    op.add_column("jobs", sa.Column("version", sa.String(), nullable=True))
+    op.add_column("jobs", sa.Column("model_version", sa.String(), nullable=True))
+    # Copy the results of messages that have not been delivered yet.
+    op.execute(
+        """
+        UPDATE jobs SET
+            traceback = outbox.payload -> 'task' ->> 'traceback',
+            meta = outbox.payload -> 'task' -> 'meta',
+            version = outbox.payload -> 'task' ->> 'version',
+            model_version = outbox.payload -> 'task' ->> 'model_version'
+        FROM outbox
+        WHERE outbox.job_id = jobs.id AND outbox.delivered_at IS NULL
+        """
+    )
+    op.execute("DELETE FROM outbox WHERE delivered_at IS NOT NULL")
+    op.drop_index("ix_outbox_pending", table_name="outbox")
+    op.drop_column("outbox", "payload")
+    op.drop_column("outbox", "delivered_at")
+    op.create_index(
+        "ix_outbox_pending", "outbox", ["failed_at", "next_attempt_at"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_outbox_pending", table_name="outbox")
+    op.add_column("outbox", sa.Column("delivered_at", sa.DateTime(), nullable=True))
+    op.add_column("outbox", sa.Column("payload", sa.JSON(), nullable=True))
+    op.execute(
+        """
+        UPDATE outbox SET payload = json_build_object(
+            'task', json_build_object(
+                'task_name', jobs.name,
+                'status', jobs.status,
+                'outputs', jobs.outputs,
+                'traceback', jobs.traceback,
+                'meta', COALESCE(jobs.meta, '{}'::json),
+                'version', jobs.version,
+                'model_version', jobs.model_version
+            )
+        )
+        FROM jobs
+        WHERE outbox.job_id = jobs.id
+        """
+    )
+    op.alter_column("outbox", "payload", nullable=False)
+    op.create_index(
+        "ix_outbox_pending", "outbox", ["delivered_at", "next_attempt_at"], unique=False
+    )
+    op.drop_column("jobs", "model_version")
+    op.drop_column("jobs", "version")
+    op.drop_column("jobs", "meta")
+    op.drop_column("jobs", "traceback")
@@ -0,0 +1,24 @@
+"""Add project inputs service
+
+Revision ID: 8e41c7d02a95
+Revises: 3c2f9a1d7b6e
+Create Date: 2026-10-19 15:21:47.109384+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8e41c7d02a95"
+down_revision = "3c2f9a1d7b6e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("projects", sa.Column("inputs_service", sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("projects", "inputs_service")
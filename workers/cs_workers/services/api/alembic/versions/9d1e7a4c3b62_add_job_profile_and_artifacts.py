@@ -0,0 +1,40 @@
+"""Add job profile flag and artifacts
+
+Revision ID: 9d1e7a4c3b62
+Revises: e5a90c2b7f14
+Create Date: 2026-10-19 19:48:12.440918+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "9d1e7a4c3b62"
+down_revision = "e5a90c2b7f14"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("profile", sa.Boolean(), nullable=True))
+    op.create_table(
+        "job_artifacts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("content", sa.LargeBinary(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["job_id"], ["jobs.id"],),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("job_id", "name", name="unique_job_artifact"),
+    )
+    op.create_index(op.f("ix_job_artifacts_id"), "job_artifacts", ["id"], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f("ix_job_artifacts_id"), table_name="job_artifacts")
+    op.drop_table("job_artifacts")
+    op.drop_column("jobs", "profile")
@@ -0,0 +1,43 @@
+"""Add outbox table
+
+Revision ID: a7c4e9d3b158
+Revises: f19c3b7a5d42
+Create Date: 2026-10-19 18:12:07.203815+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "a7c4e9d3b158"
+down_revision = "f19c3b7a5d42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("delivered_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["job_id"], ["jobs.id"],),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_outbox_id"), "outbox", ["id"], unique=False)
+    op.create_index(
+        "ix_outbox_pending", "outbox", ["delivered_at", "next_attempt_at"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_outbox_pending", table_name="outbox")
+    op.drop_index(op.f("ix_outbox_id"), table_name="outbox")
+    op.drop_table("outbox")
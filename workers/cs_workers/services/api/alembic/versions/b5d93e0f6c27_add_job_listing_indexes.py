@@ -0,0 +1,31 @@
+"""Add job listing indexes
+
+Revision ID: b5d93e0f6c27
+Revises: 8e41c7d02a95
+Create Date: 2026-10-19 16:05:32.774120+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b5d93e0f6c27"
+down_revision = "8e41c7d02a95"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_jobs_user_id_created_at",
+        "jobs",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index("ix_jobs_status", "jobs", ["status"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_jobs_status", table_name="jobs")
+    op.drop_index("ix_jobs_user_id_created_at", table_name="jobs")
@@ -0,0 +1,24 @@
+"""Add job heartbeat
+
+Revision ID: c83b1f6e2d90
+Revises: a7c4e9d3b158
+Create Date: 2026-10-19 18:41:52.617340+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c83b1f6e2d90"
+down_revision = "a7c4e9d3b158"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("heartbeat_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("jobs", "heartbeat_at")
@@ -0,0 +1,56 @@
+"""Add job resource usage and recommendations
+
+Revision ID: d2a6f8b41e03
+Revises: b5d93e0f6c27
+Create Date: 2026-10-19 16:48:09.301557+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d2a6f8b41e03"
+down_revision = "b5d93e0f6c27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("peak_memory", sa.Float(), nullable=True))
+    op.add_column("jobs", sa.Column("cpu_time", sa.Float(), nullable=True))
+    op.add_column("jobs", sa.Column("wall_time", sa.Float(), nullable=True))
+    op.create_table(
+        "resource_recommendations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("tag", sa.String(), nullable=False),
+        sa.Column("task_name", sa.String(), nullable=False),
+        sa.Column("samples", sa.Integer(), nullable=False),
+        sa.Column("memory_p50", sa.Float(), nullable=True),
+        sa.Column("memory_p95", sa.Float(), nullable=True),
+        sa.Column("cpu_p50", sa.Float(), nullable=True),
+        sa.Column("cpu_p95", sa.Float(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"],),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "project_id", "tag", "task_name", name="unique_project_tag_task"
+        ),
+    )
+    op.create_index(
+        op.f("ix_resource_recommendations_id"),
+        "resource_recommendations",
+        ["id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f("ix_resource_recommendations_id"), table_name="resource_recommendations"
+    )
+    op.drop_table("resource_recommendations")
+    op.drop_column("jobs", "wall_time")
+    op.drop_column("jobs", "cpu_time")
+    op.drop_column("jobs", "peak_memory")
@@ -0,0 +1,24 @@
+"""Add job progress
+
+Revision ID: e5a90c2b7f14
+Revises: c83b1f6e2d90
+Create Date: 2026-10-19 19:05:33.981624+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e5a90c2b7f14"
+down_revision = "c83b1f6e2d90"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("progress", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("jobs", "progress")
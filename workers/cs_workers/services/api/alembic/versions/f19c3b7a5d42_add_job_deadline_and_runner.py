@@ -0,0 +1,26 @@
+"""Add job deadline and runner
+
+Revision ID: f19c3b7a5d42
+Revises: d2a6f8b41e03
+Create Date: 2026-10-19 17:30:44.518206+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f19c3b7a5d42"
+down_revision = "d2a6f8b41e03"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("jobs", sa.Column("deadline_at", sa.DateTime(), nullable=True))
+    op.add_column("jobs", sa.Column("runner", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("jobs", "runner")
+    op.drop_column("jobs", "deadline_at")
@@ -0,0 +1,60 @@
+"""
+Periodic maintenance: reconciling jobs with the cluster, launching queued
+jobs and reaping idle pools. It runs in its own process, separate from the
+API workers, along with the outbox dispatcher:
+
+    python -m cs_workers.services.api.background
+"""
+import asyncio
+
+from starlette.concurrency import run_in_threadpool
+
+from .database import SessionLocal
+from .settings import settings
+from . import inputs_service, outbox, pools, reconciler, resources, scheduler
+
+TASKS = [
+    reconciler.reconcile,
+    scheduler.launch_unclaimed,
+    scheduler.schedule,
+    pools.reap_idle,
+    inputs_service.reap_idle,
+    resources.maybe_refresh_recommendations,
+]
+
+
+async def run_once():
+    db = SessionLocal()
+    try:
+        for task in TASKS:
+            try:
+                if asyncio.iscoroutinefunction(task):
+                    await task(db)
+                else:
+                    await run_in_threadpool(task, db)
+            except Exception as e:
+                print("maintenance task failed", task.__name__, e)
+                db.rollback()
+    finally:
+        db.close()
+
+
+async def run_forever(interval):
+    while True:
+        await run_once()
+        await asyncio.sleep(interval)
+
+
+async def run_all():
+    await asyncio.gather(
+        run_forever(settings.MAINTENANCE_INTERVAL_SECONDS),
+        outbox.run_forever(settings.OUTBOX_POLL_SECONDS),
+    )
+
+
+def main():
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
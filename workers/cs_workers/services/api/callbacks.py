@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import httpx
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from . import models, outbox, resources, schemas, security
+
+
+def complete_job(
+    db: Session, instance: models.Job, task: schemas.TaskComplete, commit=True
+):
+    """
+    Store the result of a job and queue it for the outputs processor, which
+    writes the outputs and notifies the webapp. The result is delivered by the
+    outbox dispatcher after the job is committed. With ``commit=False``, the
+    caller commits. Does nothing if the job has already finished.
+    """
+    if instance.finished_at is not None:
+        return instance
+    instance.outputs = task.outputs
+    instance.traceback = task.traceback
+    instance.meta = task.meta
+    instance.version = task.version
+    instance.model_version = task.model_version
+    instance.status = task.status
+    instance.finished_at = datetime.utcnow()
+    resources.record_usage(instance, task)
+    outbox.enqueue(db, instance)
+
+    db.add(instance)
+    if commit:
+        db.commit()
+        db.refresh(instance)
+
+    return instance
+
+
+async def relay_progress(job_id, progress: schemas.JobProgress):
+    """
+    Forward a progress report to the webapp. Progress is best effort, so
+    failures are logged and dropped; the next heartbeat sends a newer report.
+    """
+    db = SessionLocal()
+    try:
+        instance = db.query(models.Job).filter(models.Job.id == job_id).one()
+        user = await security.ensure_cs_access_token(db, instance.user)
+        async with httpx.AsyncClient(timeout=10) as client:
+            resp = await client.put(
+                f"{user.url}/outputs/api/progress/",
+                json={"job_id": str(job_id), **progress.dict()},
+                headers={"Authorization": f"Bearer {user.access_token}"},
+            )
+            resp.raise_for_status()
+    except Exception as e:
+        print("unable to relay progress for job", job_id, e)
+    finally:
+        db.close()
@@ -1,3 +1,5 @@
+import hashlib
+import time
 from typing import Generator
 
 from fastapi import Depends, HTTPException, status
@@ -5,8 +7,10 @@ from fastapi.security import OAuth2PasswordBearer
 
 from jose import jwt
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
 
+from cs_workers.utils import TTLCache
 from . import models, schemas, security
 from .settings import settings
 from .database import SessionLocal, engine
@@ -24,10 +28,44 @@ def get_db() -> Generator:
         db.close()
 
 
+# Verified token -> user column values. Entries are dropped when the user
+# row changes (e.g. deactivation) and never outlive the token itself.
+user_cache = TTLCache(
+    ttl=settings.AUTH_CACHE_TTL_SECONDS, maxsize=settings.AUTH_CACHE_MAX_SIZE
+)
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _cache_user(token: str, user: models.User, expires_at: float):
+    values = {c.name: getattr(user, c.name) for c in models.User.__table__.columns}
+    user_cache.set(_token_key(token), values, ttl=expires_at - time.time())
+
+
+def _user_from_cache(db: Session, token: str):
+    values = user_cache.get(_token_key(token))
+    if values is None:
+        return None
+    user = models.User(**values)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def invalidate_cached_user(mapper, connection, target):
+    user_cache.delete_where(lambda values: values["id"] == target.id)
+
+
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
 ) -> models.User:
     print("get_current_user")
+    user = _user_from_cache(db, token)
+    if user is not None:
+        return user
     try:
         payload = jwt.decode(
             token, settings.API_SECRET_KEY, algorithms=[security.ALGORITHM]
@@ -41,6 +79,7 @@ def get_current_user(
     user = db.query(models.User).filter(models.User.id == token_data.sub).one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    _cache_user(token, user, payload["exp"])
     return user
 
 
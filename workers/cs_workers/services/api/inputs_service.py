@@ -0,0 +1,156 @@
+"""
+Per-project inputs services.
+
+Projects with ``inputs_service`` enabled, which is set from the project's
+settings in the webapp and sent with the project sync, run their ``version``,
+``defaults`` and ``parse`` routes in a long-lived deployment. Right after the job is
+created, the API proxies the task to it over HTTP instead of creating a Job.
+If the service is not ready yet, the task falls back to the regular
+scheduler path.
+"""
+from datetime import datetime, timedelta
+import os
+
+import httpx
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from cs_workers.models.clients import inputs_service
+from cs_workers.utils import TTLCache
+from . import callbacks, models, pools, scheduler, schemas, utils
+from .database import SessionLocal
+from .settings import settings
+
+incluster = os.environ.get("KUBERNETES_SERVICE_HOST", False) is not False
+
+PROJECT = os.environ.get("PROJECT")
+
+PROJECT_ID_ANNOTATION = pools.PROJECT_ID_ANNOTATION
+TAG_ANNOTATION = pools.TAG_ANNOTATION
+
+# (project id, tag) of services known to be ready.
+_ready = TTLCache(ttl=60, maxsize=512)
+
+
+def uses_service(project: models.Project, task_name: str):
+    return bool(project.inputs_service) and task_name in utils.INTERACTIVE_TASKS
+
+
+def service_client(project: models.Project, tag: str):
+    project_data = schemas.Project.from_orm(project).dict()
+    project_data["resources"] = dict(utils.INTERACTIVE_RESOURCES)
+    return inputs_service.InputsService(
+        PROJECT,
+        project.owner,
+        project.title,
+        tag=tag,
+        model_config=project_data,
+        annotations={PROJECT_ID_ANNOTATION: str(project.id), TAG_ANNOTATION: tag},
+        incluster=incluster,
+        namespace=settings.PROJECT_NAMESPACE,
+    )
+
+
+def ensure_service(project: models.Project, tag: str):
+    """
+    Start the service if needed and return it once it is ready to take
+    requests, else ``None``.
+    """
+    client = service_client(project, tag)
+    key = (project.id, tag)
+    if _ready.get(key):
+        return client
+    if client.deployment_from_cluster() is None:
+        client.configure()
+        client.create()
+        return None
+    if not client.ready():
+        return None
+    _ready.set(key, True)
+    return client
+
+
+async def run(db: Session, project: models.Project, instance: models.Job):
+    """
+    Run a job on the project's inputs service. Returns ``None`` if the service
+    is not available so that the caller can fall back to a regular job.
+    """
+    try:
+        client = await run_in_threadpool(ensure_service, project, instance.tag)
+    except Exception as e:
+        print("unable to start inputs service", e)
+        return None
+    if client is None:
+        return None
+
+    try:
+        async with httpx.AsyncClient(
+            timeout=settings.INPUTS_SERVICE_TIMEOUT
+        ) as http_client:
+            resp = await http_client.post(
+                f"{client.url}/{instance.name}/", json={"task_kwargs": instance.inputs},
+            )
+            resp.raise_for_status()
+    except httpx.HTTPError as e:
+        print("inputs service request failed", client.url, e)
+        _ready.delete((project.id, instance.tag))
+        return None
+
+    return schemas.TaskComplete(**resp.json())
+
+
+def _load_job(db: Session, job_id):
+    instance = db.query(models.Job).filter(models.Job.id == job_id).one()
+    return instance, instance.project
+
+
+def _finish_job(db: Session, instance: models.Job, result):
+    if result is not None:
+        callbacks.complete_job(db, instance, result)
+    else:
+        instance.status = "QUEUED"
+        db.add(instance)
+        db.commit()
+        scheduler.schedule(db)
+
+
+async def run_job(job_id):
+    """
+    Background task that proxies a job to its inputs service and stores the
+    result. Uses its own session since it runs after the response is sent.
+    Database and Kubernetes calls run in the threadpool.
+    """
+    db = SessionLocal()
+    try:
+        instance, project = await run_in_threadpool(_load_job, db, job_id)
+        result = await run(db, project, instance)
+        await run_in_threadpool(_finish_job, db, instance, result)
+    finally:
+        db.close()
+
+
+def reap_idle(db: Session):
+    """
+    Delete inputs services for tags that have not been used recently, e.g.
+    after a project has been updated to a new tag.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.INPUTS_SERVICE_IDLE_SECONDS)
+    reaped = []
+    for deployment in inputs_service.list_services(
+        settings.PROJECT_NAMESPACE, incluster
+    ):
+        annotations = deployment.metadata.annotations or {}
+        project_id = annotations.get(PROJECT_ID_ANNOTATION)
+        tag = annotations.get(TAG_ANNOTATION)
+        if project_id is None or tag is None:
+            continue
+        project = db.query(models.Project).get(int(project_id))
+        if project is None:
+            continue
+        last_used = pools.last_interactive_job_at(db, project.id, tag)
+        if project.inputs_service and last_used is not None and last_used >= cutoff:
+            continue
+        service_client(project, tag).delete()
+        _ready.delete((int(project_id), tag))
+        reaped.append(deployment.metadata.name)
+    return reaped
@@ -9,6 +9,8 @@ from sqlalchemy import (
     DateTime,
     JSON,
     Float,
+    Index,
+    LargeBinary,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -49,15 +51,44 @@ class Job(Base):
     __tablename__ = "jobs"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(Integer, ForeignKey("users.id"))
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
     name = Column(String)
     created_at = Column(DateTime)
+    admitted_at = Column(DateTime, nullable=True)
+    deadline_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    # Latest progress report: {"fraction": float or None, "stage": str or None}.
+    progress = Column(JSON, nullable=True)
+    profile = Column(Boolean(), default=False)
     finished_at = Column(DateTime)
     status = Column(String)
     inputs = Column(JSON)
     outputs = Column(JSON)
+    # The rest of the result reported by the job.
+    traceback = Column(String, nullable=True)
+    meta = Column(JSON, nullable=True)
+    version = Column(String, nullable=True)
+    model_version = Column(String, nullable=True)
     tag = Column(String)
+    submitter = Column(String, nullable=True)
+    # Where the job runs: "job", "pool", or "service".
+    runner = Column(String, nullable=True)
+    priority = Column(Integer, nullable=True)
+    # Failed attempts to launch the job and when to try again.
+    launch_attempts = Column(Integer, nullable=True, default=0)
+    next_launch_at = Column(DateTime, nullable=True)
+    # Resource usage reported by the job.
+    peak_memory = Column(Float, nullable=True)
+    cpu_time = Column(Float, nullable=True)
+    wall_time = Column(Float, nullable=True)
 
     user = relationship("User", back_populates="jobs")
+    project = relationship("Project")
+
+    __table_args__ = (
+        Index("ix_jobs_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_jobs_status", "status"),
+    )
 
     class Config:
         from_attributes=True
@@ -78,6 +109,7 @@ class Project(Base):
     memory = Column(Float)
     repo_tag = Column(String)
     repo_url = Column(String)
+    inputs_service = Column(Boolean(), default=False)
 
     user = relationship("User", back_populates="projects")
     builds = relationship("Build", back_populates="project")
@@ -93,6 +125,77 @@ class Project(Base):
         extra = "ignore"
 
 
+class ResourceRecommendation(Base):
+    __tablename__ = "resource_recommendations"
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    tag = Column(String, nullable=False)
+    task_name = Column(String, nullable=False)
+    samples = Column(Integer, nullable=False)
+    # Memory in GB, CPU in cores.
+    memory_p50 = Column(Float)
+    memory_p95 = Column(Float)
+    cpu_p50 = Column(Float)
+    cpu_p95 = Column(Float)
+    updated_at = Column(DateTime)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "project_id", "tag", "task_name", name="unique_project_tag_task",
+        ),
+    )
+
+    class Config:
+        from_attributes = True
+        extra = "ignore"
+
+
+class OutboxMessage(Base):
+    """
+    Job result waiting to be delivered to the outputs processor. Written in the
+    same transaction as the job's final status and deleted once delivered. The
+    result itself is read from the job when it is sent.
+    """
+
+    __tablename__ = "outbox"
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)
+    # Set when the message runs out of delivery attempts.
+    failed_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+
+    job = relationship("Job")
+
+    __table_args__ = (Index("ix_outbox_pending", "failed_at", "next_attempt_at"),)
+
+    class Config:
+        from_attributes = True
+        extra = "ignore"
+
+
+class JobArtifact(Base):
+    """
+    File uploaded by a job, e.g. its ``profile.pstats``.
+    """
+
+    __tablename__ = "job_artifacts"
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=False)
+    name = Column(String, nullable=False)
+    content = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (UniqueConstraint("job_id", "name", name="unique_job_artifact"),)
+
+    class Config:
+        from_attributes = True
+        extra = "ignore"
+
+
 class Build(Base):
     __tablename__ = "builds"
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,253 @@
+"""
+Durable delivery of job results to the outputs processor.
+
+``callbacks.complete_job`` stores an ``OutboxMessage`` in the same commit as
+the job's final status, so a result is never lost once the job's callback has
+returned. Messages only reference the job; the result is read from the job
+when it is sent. The dispatcher claims pending messages in batches, posts them
+with a bounded number of concurrent requests, deletes the ones that were
+delivered and retries failures with exponential backoff. After
+``OUTBOX_MAX_ATTEMPTS`` failures a message is marked failed and left in the
+table for inspection.
+
+``enqueue`` also sends a Postgres ``NOTIFY``, which is delivered when the
+message is committed and wakes up the dispatcher. The dispatcher runs in the
+maintenance process, see ``background``, and falls back to polling every
+``OUTBOX_POLL_SECONDS``.
+
+The database work, including saving refreshed access tokens, is done in the
+threadpool so that it does not block the event loop.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import psycopg2
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .database import SessionLocal
+from . import models, schemas, security
+from .settings import settings
+
+CHANNEL = "outbox"
+
+
+def enqueue(db: Session, instance: models.Job):
+    """
+    Add a message for ``instance`` to the session. The caller commits it.
+    """
+    now = datetime.utcnow()
+    message = models.OutboxMessage(
+        job_id=instance.id, created_at=now, attempts=0, next_attempt_at=now,
+    )
+    db.add(message)
+    db.execute(text(f"NOTIFY {CHANNEL}"))
+    return message
+
+
+def _listen():
+    conn = psycopg2.connect(str(settings.SQLALCHEMY_DATABASE_URI))
+    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    with conn.cursor() as cursor:
+        cursor.execute(f"LISTEN {CHANNEL}")
+    return conn
+
+
+def _watch(conn, wakeup: asyncio.Event):
+    """
+    Set ``wakeup`` whenever a notification arrives on ``conn``.
+    """
+    loop = asyncio.get_running_loop()
+
+    def on_notify():
+        try:
+            conn.poll()
+        except psycopg2.Error as e:
+            print("lost the outbox listener, polling instead", e)
+            loop.remove_reader(conn.fileno())
+            return
+        conn.notifies.clear()
+        wakeup.set()
+
+    loop.add_reader(conn.fileno(), on_notify)
+
+
+def payload(instance: models.Job):
+    """
+    The result of a finished job, as sent to the outputs processor.
+    """
+    task = schemas.TaskComplete(
+        task_name=instance.name,
+        status=instance.status,
+        outputs=instance.outputs,
+        traceback=instance.traceback,
+        meta=instance.meta or {},
+        version=instance.version,
+        model_version=instance.model_version,
+    )
+    return {"task": task.dict()}
+
+
+def backoff(attempts):
+    return min(settings.OUTBOX_MAX_BACKOFF_SECONDS, 5 * 2 ** max(attempts - 1, 0))
+
+
+def claim_batch(db: Session):
+    """
+    Lease up to ``OUTBOX_BATCH_SIZE`` pending messages. Other dispatchers skip
+    them until the lease runs out. Each message's job and user are loaded
+    before returning.
+    """
+    now = datetime.utcnow()
+    messages = (
+        db.query(models.OutboxMessage)
+        .filter(
+            models.OutboxMessage.failed_at.is_(None),
+            models.OutboxMessage.next_attempt_at <= now,
+        )
+        .order_by(models.OutboxMessage.created_at)
+        .limit(settings.OUTBOX_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    lease = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    for message in messages:
+        message.attempts += 1
+        message.next_attempt_at = lease
+        db.add(message)
+    db.commit()
+    for message in messages:
+        message.job.user
+    return messages
+
+
+def prepare(db: Session, messages, tokens, errors):
+    """
+    Save the access tokens that were fetched for the messages' users and build
+    the request of each message that has not failed yet. Returns a dict of
+    message id to (job id, body).
+    """
+    users = {message.job.user.id: message.job.user for message in messages}
+    for user_id, data in tokens.items():
+        if not isinstance(data, Exception):
+            security.save_cs_access_token(db, users[user_id], data)
+    requests = {}
+    for message in messages:
+        if message.id in errors:
+            continue
+        user = message.job.user
+        requests[message.id] = (
+            message.job_id,
+            {
+                "url": user.url,
+                "headers": {"Authorization": f"Bearer {user.access_token}"},
+                **payload(message.job),
+            },
+        )
+    return requests
+
+
+def record_results(db: Session, messages, errors):
+    """
+    Delete delivered messages, schedule retries for the rest and give up on
+    messages that have run out of attempts.
+    """
+    now = datetime.utcnow()
+    delivered = []
+    for message in messages:
+        error = errors.get(message.id)
+        if error is None:
+            db.delete(message)
+            delivered.append(message)
+        else:
+            message.last_error = str(error) or error.__class__.__name__
+            if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                print("giving up on outputs for job", message.job_id, error)
+                message.failed_at = now
+            else:
+                print("unable to deliver outputs for job", message.job_id, error)
+                message.next_attempt_at = now + timedelta(
+                    seconds=backoff(message.attempts)
+                )
+            db.add(message)
+    db.commit()
+    return delivered
+
+
+async def _post(client, job_id, body):
+    resp = await client.post(f"{settings.OUTPUTS_PROCESSOR_URL}/{job_id}/", json=body)
+    resp.raise_for_status()
+
+
+async def dispatch(db: Session):
+    """
+    Deliver one batch of messages. Returns the messages that were delivered.
+    """
+    messages = await run_in_threadpool(claim_batch, db)
+    if not messages:
+        return []
+
+    # claim_batch loaded the users, so this does not touch the database.
+    tokens = {}
+    errors = {}
+    for message in messages:
+        user = message.job.user
+        if user.id not in tokens and security.needs_cs_access_token(user):
+            try:
+                tokens[user.id] = await security.fetch_cs_access_token(user)
+            except Exception as e:
+                tokens[user.id] = e
+        if isinstance(tokens.get(user.id), Exception):
+            errors[message.id] = tokens[user.id]
+
+    requests = await run_in_threadpool(prepare, db, messages, tokens, errors)
+    semaphore = asyncio.Semaphore(settings.OUTBOX_CONCURRENCY)
+
+    async def deliver(client, message_id, job_id, body):
+        async with semaphore:
+            try:
+                await _post(client, job_id, body)
+            except Exception as e:
+                errors[message_id] = e
+
+    async with httpx.AsyncClient(timeout=settings.OUTBOX_TIMEOUT) as client:
+        await asyncio.gather(
+            *[
+                deliver(client, message_id, job_id, body)
+                for message_id, (job_id, body) in requests.items()
+            ]
+        )
+
+    return await run_in_threadpool(record_results, db, messages, errors)
+
+
+async def run_forever(interval):
+    """
+    Drain the outbox, waking up early whenever a message is committed.
+    """
+    wakeup = asyncio.Event()
+    try:
+        conn = await run_in_threadpool(_listen)
+        _watch(conn, wakeup)
+    except psycopg2.Error as e:
+        print("unable to listen for outbox messages, polling instead", e)
+    while True:
+        wakeup.clear()
+        db = SessionLocal()
+        try:
+            delivered = await dispatch(db)
+        except Exception as e:
+            print("outbox dispatch failed", e)
+            db.rollback()
+            delivered = []
+        finally:
+            db.close()
+
+        if len(delivered) >= settings.OUTBOX_BATCH_SIZE:
+            continue
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,183 @@
+"""
+Warm pools of pre-started workers for interactive tasks.
+
+Pooled jobs are stored with status ``POOLED`` and claimed by pool workers
+through ``GET /jobs/pool/{owner}/{title}/{tag}/next/``. Pool workers
+authenticate with a token that is only valid for their (project, tag) and is
+mounted into the pool's pods from a Kubernetes secret. Pools are scaled with
+recent demand for the (project, tag) and deleted once they have been idle for
+``WARM_POOL_IDLE_SECONDS``.
+"""
+from datetime import datetime, timedelta
+import hashlib
+import hmac
+import math
+import os
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from cs_workers.models.clients import kube, pool
+from cs_workers.utils import TTLCache
+from . import models, schemas, utils
+from .utils import INTERACTIVE_TASKS
+from .settings import settings
+
+incluster = os.environ.get("KUBERNETES_SERVICE_HOST", False) is not False
+
+PROJECT = os.environ.get("PROJECT")
+
+POOLED = "POOLED"
+
+PROJECT_ID_ANNOTATION = "compute.studio/project-id"
+TAG_ANNOTATION = "compute.studio/tag"
+
+# (project id, tag) -> replicas last requested, to avoid hitting the
+# kube-apiserver on every interactive task.
+_pool_sizes = TTLCache(ttl=30, maxsize=512)
+
+
+def pool_url(owner, title, tag):
+    return f"{utils.api_url()}/jobs/pool/{owner}/{title}/{tag}/next/"
+
+
+def pool_token(project: models.Project, tag: str) -> str:
+    message = f"pool:{project.id}:{tag}".encode()
+    return hmac.new(
+        settings.API_SECRET_KEY.encode(), message, hashlib.sha256
+    ).hexdigest()
+
+
+def authenticate(db: Session, owner: str, title: str, tag: str, token: str):
+    """
+    Return the project whose pool for ``tag`` owns ``token``, or ``None``.
+    """
+    if not token:
+        return None
+    projects = (
+        db.query(models.Project)
+        .filter(models.Project.owner == owner, models.Project.title == title)
+        .all()
+    )
+    for project in projects:
+        if hmac.compare_digest(pool_token(project, tag), token):
+            return project
+    return None
+
+
+def pool_client(project: models.Project, tag: str):
+    project_data = schemas.Project.from_orm(project).dict()
+    project_data["resources"] = dict(utils.INTERACTIVE_RESOURCES)
+    return pool.WarmPool(
+        PROJECT,
+        project.owner,
+        project.title,
+        tag=tag,
+        model_config=project_data,
+        pool_url=pool_url(project.owner, project.title, tag),
+        token=pool_token(project, tag),
+        max_tasks=settings.WARM_POOL_MAX_TASKS_PER_WORKER,
+        annotations={PROJECT_ID_ANNOTATION: str(project.id), TAG_ANNOTATION: tag},
+        incluster=incluster,
+        namespace=settings.PROJECT_NAMESPACE,
+    )
+
+
+def _interactive_jobs(db: Session, project_id, tag):
+    return db.query(models.Job).filter(
+        models.Job.project_id == project_id,
+        models.Job.tag == tag,
+        models.Job.name.in_(INTERACTIVE_TASKS),
+    )
+
+
+def recent_demand(db: Session, project_id, tag):
+    since = datetime.utcnow() - timedelta(
+        seconds=settings.WARM_POOL_DEMAND_WINDOW_SECONDS
+    )
+    return (
+        _interactive_jobs(db, project_id, tag)
+        .filter(models.Job.created_at >= since)
+        .count()
+    )
+
+
+def last_interactive_job_at(db: Session, project_id, tag):
+    return (
+        _interactive_jobs(db, project_id, tag)
+        .with_entities(func.max(models.Job.created_at))
+        .scalar()
+    )
+
+
+def desired_replicas(demand):
+    replicas = math.ceil(demand / settings.WARM_POOL_TASKS_PER_REPLICA)
+    return max(1, min(settings.WARM_POOL_MAX_REPLICAS, replicas))
+
+
+def ensure_pool(db: Session, project: models.Project, tag: str):
+    """
+    Make sure a pool is running for ``(project, tag)`` and sized for recent
+    demand.
+    """
+    replicas = desired_replicas(recent_demand(db, project.id, tag))
+    key = (project.id, tag)
+    if _pool_sizes.get(key) == replicas:
+        return replicas
+    pool_client(project, tag).scale(replicas)
+    _pool_sizes.set(key, replicas)
+    return replicas
+
+
+def claim(db: Session, project: models.Project, tag: str):
+    """
+    Claim the oldest pooled job for a project and tag, or return ``None``.
+    """
+    instance = (
+        db.query(models.Job)
+        .filter(
+            models.Job.project_id == project.id,
+            models.Job.tag == tag,
+            models.Job.status == POOLED,
+        )
+        .order_by(models.Job.created_at)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if instance is None:
+        db.commit()
+        return None
+    instance.status = "RUNNING"
+    db.add(instance)
+    db.commit()
+    db.refresh(instance)
+    return instance
+
+
+def reap_idle(db: Session):
+    """
+    Delete pools that have not received a task in ``WARM_POOL_IDLE_SECONDS``.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.WARM_POOL_IDLE_SECONDS)
+    reaped = []
+    for deployment in pool.list_pools(settings.PROJECT_NAMESPACE, incluster):
+        annotations = deployment.metadata.annotations or {}
+        project_id = annotations.get(PROJECT_ID_ANNOTATION)
+        tag = annotations.get(TAG_ANNOTATION)
+        last_used = None
+        if project_id is not None and tag is not None:
+            last_used = last_interactive_job_at(db, int(project_id), tag)
+        if last_used is not None and last_used >= cutoff:
+            continue
+
+        print(f"reaping idle pool: {deployment.metadata.name}")
+        kube.apps_api(incluster).delete_namespaced_deployment(
+            name=deployment.metadata.name, namespace=settings.PROJECT_NAMESPACE
+        )
+        pool.delete_token_secret(
+            deployment.metadata.name, settings.PROJECT_NAMESPACE, incluster
+        )
+        if project_id is not None:
+            _pool_sizes.delete((int(project_id), tag))
+        reaped.append(deployment.metadata.name)
+    return reaped
@@ -0,0 +1,175 @@
+"""
+Fail jobs that will never report back.
+
+A job whose pod crashes before it posts its results would otherwise stay
+``RUNNING`` forever, along with the simulation that is waiting on it. The
+reconciler compares active jobs with the state of their Kubernetes Jobs and
+fails the ones that are dead, past their deadline or no longer sending
+heartbeats through the normal completion path, so the webapp is told about
+the failure.
+"""
+from datetime import datetime, timedelta
+import os
+
+from sqlalchemy.orm import Session
+
+from cs_workers.models.clients import kube
+from . import callbacks, models, schemas, utils
+from .settings import settings
+
+incluster = os.environ.get("KUBERNETES_SERVICE_HOST", False) is not False
+
+ACTIVE_STATUSES = ("CREATED", "RUNNING", "POOLED")
+
+
+def _pod_termination_reasons(namespace):
+    """
+    Map job id -> termination reason of its most recent terminated container.
+    """
+    reasons = {}
+    pods = kube.core_api(incluster).list_namespaced_pod(
+        namespace, label_selector="job-id"
+    )
+    for pod in pods.items:
+        job_id = pod.metadata.labels["job-id"]
+        for status in pod.status.container_statuses or []:
+            terminated = status.state.terminated or (
+                status.last_state.terminated if status.last_state else None
+            )
+            if terminated is not None and terminated.exit_code != 0:
+                reason = terminated.reason or "Error"
+                reasons[job_id] = f"{reason} (exit code {terminated.exit_code})"
+    return reasons
+
+
+def _job_failure(k8s_job, pod_reasons):
+    """
+    Return why a Kubernetes Job failed, or ``None`` if it has not failed.
+    """
+    status = k8s_job.status
+    conditions = {c.type: c for c in status.conditions or []}
+    failed = conditions.get("Failed")
+    if failed is None or failed.status != "True":
+        if status.succeeded:
+            return "Job finished without reporting its results."
+        return None
+    reason = failed.reason or "Failed"
+    if failed.message:
+        reason += f": {failed.message}"
+    pod_reason = pod_reasons.get(k8s_job.metadata.name)
+    if pod_reason:
+        reason += f" Pod terminated with {pod_reason}."
+    return reason
+
+
+def _started_at(instance: models.Job):
+    return instance.admitted_at or instance.created_at
+
+
+def _deadline_at(instance: models.Job):
+    """
+    Jobs created before deadlines were added get one from when they were
+    created.
+    """
+    if instance.deadline_at is not None:
+        return instance.deadline_at
+    exp_task_time = instance.project.exp_task_time if instance.project else None
+    return _started_at(instance) + timedelta(
+        seconds=utils.job_deadline_seconds(instance.name, exp_task_time)
+    )
+
+
+def find_dead_jobs(db: Session):
+    """
+    Return (job, reason) pairs for active jobs that should be failed. Jobs
+    from before the scheduler, which have no ``admitted_at`` or ``runner``,
+    are treated as Kubernetes Jobs that started when they were created.
+    """
+    now = datetime.utcnow()
+    grace = timedelta(seconds=settings.RECONCILE_GRACE_SECONDS)
+    heartbeat_timeout = timedelta(seconds=settings.HEARTBEAT_TIMEOUT_SECONDS)
+    active = (
+        db.query(models.Job)
+        .filter(
+            models.Job.status.in_(ACTIVE_STATUSES),
+            models.Job.finished_at.is_(None),
+            models.Job.created_at.isnot(None) | models.Job.admitted_at.isnot(None),
+        )
+        .all()
+    )
+    if not active:
+        return []
+
+    k8s_jobs = None
+    pod_reasons = None
+    dead = []
+    for instance in active:
+        if _deadline_at(instance) + grace < now:
+            dead.append((instance, "Job exceeded its deadline."))
+            continue
+        if (
+            instance.heartbeat_at is not None
+            and instance.heartbeat_at + heartbeat_timeout < now
+        ):
+            dead.append((instance, "Job stopped sending heartbeats."))
+            continue
+        runner = instance.runner or "job"
+        if runner != "job" or _started_at(instance) + grace > now:
+            continue
+
+        if k8s_jobs is None:
+            namespace = settings.PROJECT_NAMESPACE
+            k8s_jobs = {
+                j.metadata.name: j
+                for j in kube.batch_api(incluster).list_namespaced_job(namespace).items
+            }
+            pod_reasons = _pod_termination_reasons(namespace)
+
+        k8s_job = k8s_jobs.get(str(instance.id))
+        if k8s_job is None:
+            dead.append((instance, "Job no longer exists in the cluster."))
+            continue
+        reason = _job_failure(k8s_job, pod_reasons)
+        if reason is not None:
+            dead.append((instance, reason))
+    return dead
+
+
+def _lock_unfinished(db: Session, instance: models.Job):
+    """
+    Lock and reload ``instance``. Returns ``None`` if the job has finished
+    since it was read or is locked by its own callback or another reconciler.
+    """
+    return (
+        db.query(models.Job)
+        .filter(models.Job.id == instance.id, models.Job.finished_at.is_(None))
+        .with_for_update(skip_locked=True)
+        .populate_existing()
+        .one_or_none()
+    )
+
+
+def reconcile(db: Session):
+    failed = []
+    for instance, reason in find_dead_jobs(db):
+        # find_dead_jobs does not lock the jobs, so they may have reported
+        # their results in the meantime.
+        instance = _lock_unfinished(db, instance)
+        if instance is None:
+            continue
+        print("failing job", instance.id, reason)
+        task = schemas.TaskComplete(
+            status="FAIL",
+            task_name=instance.name,
+            traceback=reason,
+            outputs=None,
+            meta={},
+        )
+        try:
+            callbacks.complete_job(db, instance, task)
+        except Exception as e:
+            print("unable to complete job", instance.id, e)
+            db.rollback()
+            continue
+        failed.append(instance)
+    return failed
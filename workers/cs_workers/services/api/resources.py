@@ -0,0 +1,142 @@
+"""
+Right-size resource requests from the usage that jobs report.
+
+Jobs report their peak RSS, CPU time and the wall time of the model run in
+``meta``. Those samples are aggregated into per-(project, tag, task)
+percentiles, and the percentiles are used to set resource requests for new
+jobs. Limits are left at the project's configured values so that an
+underestimate is not turned into an OOM kill.
+"""
+from datetime import datetime, timedelta
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .settings import settings
+
+# Never request less than this.
+MIN_MEMORY = 0.1
+MIN_CPU = 0.1
+
+_last_refresh = 0
+
+
+def record_usage(instance: models.Job, task: schemas.TaskComplete):
+    meta = task.meta or {}
+    if meta.get("peak_rss_bytes") is not None:
+        instance.peak_memory = meta["peak_rss_bytes"] / 1e9
+    if meta.get("cpu_time") is not None:
+        instance.cpu_time = meta["cpu_time"]
+    # CPU time only covers the model run, so compare it with the wall time
+    # of the model run. Older jobs only report the time of the whole task.
+    if meta.get("compute_time") is not None:
+        instance.wall_time = meta["compute_time"]
+    elif meta.get("task_times"):
+        instance.wall_time = sum(meta["task_times"])
+
+
+def refresh_recommendations(db: Session):
+    """
+    Recompute usage percentiles for every (project, tag, task) with jobs in
+    the last ``RESOURCE_WINDOW_DAYS``.
+    """
+    since = datetime.utcnow() - timedelta(days=settings.RESOURCE_WINDOW_DAYS)
+    cpu = models.Job.cpu_time / func.nullif(models.Job.wall_time, 0)
+    rows = (
+        db.query(
+            models.Job.project_id,
+            models.Job.tag,
+            models.Job.name,
+            func.count(models.Job.id),
+            func.percentile_cont(0.5).within_group(models.Job.peak_memory),
+            func.percentile_cont(0.95).within_group(models.Job.peak_memory),
+            func.percentile_cont(0.5).within_group(cpu),
+            func.percentile_cont(0.95).within_group(cpu),
+        )
+        .filter(
+            models.Job.project_id.isnot(None),
+            models.Job.peak_memory.isnot(None),
+            models.Job.finished_at >= since,
+        )
+        .group_by(models.Job.project_id, models.Job.tag, models.Job.name)
+        .all()
+    )
+
+    existing = {
+        (r.project_id, r.tag, r.task_name): r
+        for r in db.query(models.ResourceRecommendation).all()
+    }
+    now = datetime.utcnow()
+    for project_id, tag, name, samples, mem50, mem95, cpu50, cpu95 in rows:
+        rec = existing.get((project_id, tag, name))
+        if rec is None:
+            rec = models.ResourceRecommendation(
+                project_id=project_id, tag=tag, task_name=name
+            )
+        rec.samples = samples
+        rec.memory_p50, rec.memory_p95 = mem50, mem95
+        rec.cpu_p50, rec.cpu_p95 = cpu50, cpu95
+        rec.updated_at = now
+        db.add(rec)
+    db.commit()
+    return len(rows)
+
+
+def maybe_refresh_recommendations(db: Session):
+    global _last_refresh
+    if time.monotonic() - _last_refresh < settings.RESOURCE_REFRESH_SECONDS:
+        return None
+    _last_refresh = time.monotonic()
+    return refresh_recommendations(db)
+
+
+def get_recommendation(db: Session, project_id, tag, task_name):
+    """
+    Recommendation for the exact tag if it has enough samples, else the most
+    recently updated one for the project and task.
+    """
+    recs = (
+        db.query(models.ResourceRecommendation)
+        .filter(
+            models.ResourceRecommendation.project_id == project_id,
+            models.ResourceRecommendation.task_name == task_name,
+            models.ResourceRecommendation.samples >= settings.RESOURCE_MIN_SAMPLES,
+        )
+        .order_by(models.ResourceRecommendation.updated_at.desc())
+        .all()
+    )
+    for rec in recs:
+        if rec.tag == tag:
+            return rec
+    return recs[0] if recs else None
+
+
+def _parse_memory(value):
+    if isinstance(value, str) and value.endswith("G"):
+        return float(value[:-1])
+    return float(value)
+
+
+def apply_recommendation(db: Session, instance: models.Job, resources):
+    """
+    Set the requests in ``resources`` to the recommended values, capped at
+    the configured limits.
+    """
+    if not settings.RESOURCE_RECOMMENDATIONS_ENABLED:
+        return resources
+    rec = get_recommendation(db, instance.project_id, instance.tag, instance.name)
+    if rec is None:
+        return resources
+
+    requests = dict(resources["requests"])
+    limits = resources["limits"]
+    if rec.memory_p95 is not None:
+        memory = max(MIN_MEMORY, rec.memory_p95 * settings.RESOURCE_HEADROOM)
+        memory = min(memory, _parse_memory(limits["memory"]))
+        requests["memory"] = f"{round(memory, 2)}G"
+    if rec.cpu_p95 is not None:
+        cpu = max(MIN_CPU, rec.cpu_p95 * settings.RESOURCE_HEADROOM)
+        requests["cpu"] = round(min(cpu, float(limits["cpu"])), 2)
+    return dict(resources, requests=requests)
@@ -1,17 +1,39 @@
+import asyncio
+import base64
 from datetime import datetime
-import os
+import time
+from typing import List, Optional
+from urllib.parse import urlencode
+import uuid
 
-import httpx
-from fastapi import APIRouter, Depends, Body, HTTPException
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Body,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from cs_workers.models.clients import job
-from .. import utils, models, schemas, dependencies as deps, security, settings
-
-incluster = os.environ.get("KUBERNETES_SERVICE_HOST", False) is not False
-
-PROJECT = os.environ.get("PROJECT")
+from .. import (
+    callbacks,
+    dependencies as deps,
+    inputs_service,
+    models,
+    pools,
+    scheduler,
+    schemas,
+    utils,
+)
+from ..settings import settings
 
+MAX_PAGE_SIZE = 100
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
@@ -43,48 +65,295 @@ def job_callback(
 
 
 @router.post("/callback/{job_id}/", status_code=201, response_model=schemas.Job)
-async def finish_job(
+def finish_job(
     job_id: str,
     task: schemas.TaskComplete = Body(...),
     db: Session = Depends(deps.get_db),
 ):
     print("got data for ", job_id)
-    instance = db.query(models.Job).filter(models.Job.id == job_id).one_or_none()
+    # Locked so that the reconciler can't fail the job at the same time.
+    instance = (
+        db.query(models.Job)
+        .filter(models.Job.id == job_id)
+        .with_for_update()
+        .one_or_none()
+    )
     if instance is None:
         raise HTTPException(status_code=404, detail="Job not found.")
 
     if instance.finished_at:
         raise HTTPException(status_code=400, detail="Job already marked as complete.")
 
-    instance.outputs = task.outputs
-    instance.status = task.status
-    instance.finished_at = datetime.utcnow()
+    callbacks.complete_job(db, instance, task)
+
+    # Free capacity may let queued jobs through.
+    scheduler.schedule(db)
 
+    return instance
+
+
+@router.post("/callback/{job_id}/heartbeat/", status_code=200)
+def job_heartbeat(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    heartbeat: schemas.Heartbeat = Body(None),
+    db: Session = Depends(deps.get_db),
+):
+    """
+    Record that a job is still alive. Jobs post here periodically while their
+    task runs so that slow jobs can be told apart from dead ones. Progress
+    reports of simulations are passed on to the webapp.
+    """
+    instance = db.query(models.Job).filter(models.Job.id == job_id).one_or_none()
+    if instance is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if instance.finished_at:
+        raise HTTPException(status_code=400, detail="Job already marked as complete.")
+
+    instance.heartbeat_at = datetime.utcnow()
+    progress = heartbeat.progress if heartbeat is not None else None
+    changed = progress is not None and progress.dict() != instance.progress
+    if changed:
+        instance.progress = progress.dict()
     db.add(instance)
     db.commit()
-    db.refresh(instance)
 
-    user = instance.user
-    await security.ensure_cs_access_token(db, user)
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"http://outputs-processor/{job_id}/",
-            json={
-                "url": user.url,
-                "headers": {"Authorization": f"Bearer {user.access_token}"},
-                "task": task.dict(),
-            },
+    if changed and instance.name == "sim":
+        background_tasks.add_task(callbacks.relay_progress, instance.id, progress)
+    return {"status": instance.status}
+
+
+@router.post(
+    "/callback/{job_id}/artifacts/{name}/",
+    response_model=schemas.JobArtifact,
+    status_code=201,
+)
+async def upload_artifact(
+    job_id: str, name: str, request: Request, db: Session = Depends(deps.get_db),
+):
+    """
+    Store a file produced by a running job. Uploading the same name again
+    replaces the file. The body is read in chunks so that uploads over
+    ``MAX_ARTIFACT_BYTES`` are rejected without reading all of them.
+    """
+    too_large = HTTPException(status_code=413, detail="Artifact is too large.")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > settings.MAX_ARTIFACT_BYTES:
+        raise too_large
+
+    instance = await run_in_threadpool(_running_job, db, job_id)
+
+    content = bytearray()
+    async for chunk in request.stream():
+        content.extend(chunk)
+        if len(content) > settings.MAX_ARTIFACT_BYTES:
+            raise too_large
+
+    return await run_in_threadpool(_save_artifact, db, instance, name, bytes(content))
+
+
+def _running_job(db: Session, job_id: str):
+    instance = db.query(models.Job).filter(models.Job.id == job_id).one_or_none()
+    if instance is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if instance.finished_at:
+        raise HTTPException(status_code=400, detail="Job already marked as complete.")
+    return instance
+
+
+def _save_artifact(db: Session, instance: models.Job, name: str, content: bytes):
+    artifact = (
+        db.query(models.JobArtifact)
+        .filter(
+            models.JobArtifact.job_id == instance.id, models.JobArtifact.name == name
+        )
+        .one_or_none()
+    )
+    if artifact is None:
+        artifact = models.JobArtifact(job_id=instance.id, name=name)
+    artifact.content = content
+    artifact.size = len(content)
+    artifact.created_at = datetime.utcnow()
+    db.add(artifact)
+    db.commit()
+    db.refresh(artifact)
+    return artifact
+
+
+@router.get(
+    "/pool/{owner}/{title}/{tag}/next/",
+    response_model=schemas.PooledTask,
+    status_code=200,
+)
+async def next_pooled_task(
+    owner: str,
+    title: str,
+    tag: str,
+    timeout: float = 20,
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(deps.get_db),
+):
+    """
+    Long-poll endpoint used by warm pool workers. Returns 204 if no task was
+    queued for the pool before ``timeout`` seconds passed.
+
+    Workers authenticate with their pool's token, ``Authorization: Token
+    <token>``. Database calls run in the threadpool so that waiting workers
+    do not block the event loop.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    project = None
+    if scheme == "Token":
+        project = await run_in_threadpool(
+            pools.authenticate, db, owner, title, tag, token
         )
-        print(resp.text)
-        resp.raise_for_status()
+    if project is None:
+        raise HTTPException(status_code=401, detail="Invalid pool token.")
+
+    deadline = time.monotonic() + min(timeout, 60)
+    while True:
+        instance = await run_in_threadpool(pools.claim, db, project, tag)
+        if instance is not None:
+            return {
+                "job_id": instance.id,
+                "task_name": instance.name,
+                "callback_url": scheduler.callback_url(instance.id),
+            }
+        if time.monotonic() >= deadline:
+            return Response(status_code=204)
+        await asyncio.sleep(settings.WARM_POOL_POLL_SECONDS)
+
 
+def _encode_cursor(instance: models.Job) -> str:
+    value = f"{instance.created_at.isoformat()}|{instance.id}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, job_id = value.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+@router.get("/", response_model=schemas.PaginatedJobs, status_code=200)
+def list_jobs(
+    db: Session = Depends(deps.get_db),
+    user: schemas.UserInDB = Depends(deps.get_current_active_user),
+    status: Optional[str] = None,
+    name: Optional[str] = None,
+    tag: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    List jobs, newest first. Pages are keyset-paginated on (created_at, id),
+    so deep pages cost the same as the first one.
+    """
+    query = db.query(models.Job)
+    if not user.is_superuser:
+        query = query.filter(models.Job.user_id == user.id)
+    if status is not None:
+        query = query.filter(models.Job.status == status)
+    if name is not None:
+        query = query.filter(models.Job.name == name)
+    if tag is not None:
+        query = query.filter(models.Job.tag == tag)
+    if cursor is not None:
+        created_at, job_id = _decode_cursor(cursor)
+        query = query.filter(
+            tuple_(models.Job.created_at, models.Job.id) < tuple_(created_at, job_id)
+        )
+
+    results = (
+        query.order_by(models.Job.created_at.desc(), models.Job.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    next_page = None
+    if len(results) > limit:
+        results = results[:limit]
+        params = {"cursor": _encode_cursor(results[-1]), "limit": limit}
+        params.update(
+            {k: v for k, v in (("status", status), ("name", name), ("tag", tag)) if v}
+        )
+        next_page = f"{utils.api_url()}/jobs/?{urlencode(params)}"
+
+    return {"next": next_page, "results": results}
+
+
+@router.post("/status/", response_model=List[schemas.JobSummary], status_code=200)
+def bulk_job_status(
+    data: schemas.BulkJobStatus = Body(...),
+    db: Session = Depends(deps.get_db),
+    user: schemas.UserInDB = Depends(deps.get_current_active_user),
+):
+    """
+    Look up the status of many jobs at once. Unknown ids are left out of the
+    response.
+    """
+    if len(data.ids) > MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_PAGE_SIZE} ids may be requested."
+        )
+    query = db.query(models.Job).filter(models.Job.id.in_(data.ids))
+    if not user.is_superuser:
+        query = query.filter(models.Job.user_id == user.id)
+    return query.all()
+
+
+@router.get("/{job_id}/", response_model=schemas.Job, status_code=200)
+def get_job(
+    job_id: str,
+    db: Session = Depends(deps.get_db),
+    user: schemas.User = Depends(deps.get_current_active_user),
+):
+    instance = (
+        db.query(models.Job)
+        .filter(models.Job.id == job_id, models.Job.user_id == user.id)
+        .one_or_none()
+    )
+    if instance is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    instance.queue_position = scheduler.queue_position(db, instance)
     return instance
 
 
+@router.get("/{job_id}/artifacts/{name}/", status_code=200)
+def download_artifact(
+    job_id: str,
+    name: str,
+    db: Session = Depends(deps.get_db),
+    user: schemas.User = Depends(deps.get_current_active_user),
+):
+    artifact = (
+        db.query(models.JobArtifact)
+        .join(models.Job, models.JobArtifact.job_id == models.Job.id)
+        .filter(
+            models.Job.id == job_id,
+            models.Job.user_id == user.id,
+            models.JobArtifact.name == name,
+        )
+        .one_or_none()
+    )
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Artifact not found.")
+    return Response(
+        content=artifact.content,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
+
+
 @router.post("/{owner}/{title}/", response_model=schemas.Job, status_code=201)
 def create_job(
     owner: str,
     title: str,
+    background_tasks: BackgroundTasks,
     task: schemas.Task = Body(...),
     db: Session = Depends(deps.get_db),
     user: schemas.User = Depends(deps.get_current_active_user),
@@ -113,48 +382,35 @@ def create_job(
 
     instance = models.Job(
         user_id=user.id,
+        project_id=project.id,
         name=task_name,
         created_at=datetime.utcnow(),
         finished_at=None,
         inputs=task_kwargs,
         tag=tag,
-        status="CREATED",
+        submitter=task.submitter,
+        priority=scheduler.task_priority(task_name),
+        profile=bool(task.profile),
+        status="QUEUED",
     )
+    use_service = inputs_service.uses_service(project, task_name)
+    if use_service:
+        # Keep the scheduler from picking the job up while it is proxied.
+        instance.status = "RUNNING"
+        instance.runner = "service"
+        scheduler.set_admitted(instance, project)
     db.add(instance)
     db.commit()
     db.refresh(instance)
 
-    project_data = schemas.Project.from_orm(project).dict()
-
-    # Use lower memory target for these tasks.
-    if task_name in ("version", "defaults", "parse",):
-        project_data["resources"] = {
-            "requests": {"memory": "0.25G", "cpu": 0.7},
-            "limits": {"memory": "0.7G", "cpu": 1},
-        }
-    else:
-        utils.set_resource_requirements(project_data)
+    if use_service:
+        # Respond first so that the webapp has recorded the job id before the
+        # result is posted back to it.
+        background_tasks.add_task(inputs_service.run_job, instance.id)
+        return instance
 
-    if settings.settings.WORKERS_API_HOST:
-        url = f"https://{settings.settings.WORKERS_API_HOST}"
-    else:
-        url = f"http://api.{settings.settings.NAMESPACE}.svc.cluster.local"
-
-    url += settings.settings.API_PREFIX_STR
-
-    client = job.Job(
-        PROJECT,
-        owner,
-        title,
-        tag=tag,
-        model_config=project_data,
-        job_id=instance.id,
-        callback_url=f"{url}/jobs/callback/{instance.id}/",
-        route_name=task_name,
-        incluster=incluster,
-        namespace=settings.settings.PROJECT_NAMESPACE,
-    )
-
-    client.create()
+    scheduler.schedule(db)
 
+    db.refresh(instance)
+    instance.queue_position = scheduler.queue_position(db, instance)
     return instance
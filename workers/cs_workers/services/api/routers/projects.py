@@ -31,7 +31,9 @@ def sync_projects(
             orm_project = models.Project(**project_data, user_id=user.id)
         else:
             print("updating object from data", project_data)
-            for attr, val in project.dict().items():
+            # Fields the webapp does not send (e.g. inputs_service) keep the
+            # value that is already stored.
+            for attr, val in project.dict(exclude_unset=True).items():
                 print("setting", attr, val)
                 setattr(orm_project, attr, val)
         orm_projects.append(orm_project)
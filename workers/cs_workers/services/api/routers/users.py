@@ -68,6 +68,16 @@ async def ping(
     await security.ensure_cs_access_token(db, current_user)
 
 
+@router.get("/auth-cache/", response_model=schemas.CacheStats)
+def auth_cache_stats(
+    *, current_super_user: models.User = Depends(deps.get_current_active_superuser),
+):
+    """
+    Hit and miss counters for the verified token cache.
+    """
+    return deps.user_cache.stats()
+
+
 @router.post("/approve/", response_model=schemas.User)
 def approve_user(
     *,
@@ -0,0 +1,347 @@
+"""
+Admission scheduler for model jobs.
+
+Jobs are written to the database as ``QUEUED`` and only turned into
+Kubernetes Jobs once they are admitted. Interactive tasks (``version``,
+``defaults``, ``parse``) are always admitted right away. Bulk ``sim`` tasks
+are subject to global, per-project and per-submitter concurrency caps and are
+dequeued fair-share: the submitter with the fewest active jobs goes first,
+ties broken by age.
+
+Only as many queued rows as there is free capacity for are locked. Admitted
+jobs are marked ``ADMITTED`` and committed, which releases the locks, before
+the Kubernetes Jobs are created. The claim is a lease: if the launch never
+finishes, e.g. because the API process died, the job is queued again.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+import os
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from cs_workers.models.clients import job
+from . import callbacks, models, pools, resources, schemas, utils
+from .settings import settings
+
+incluster = os.environ.get("KUBERNETES_SERVICE_HOST", False) is not False
+
+PROJECT = os.environ.get("PROJECT")
+
+INTERACTIVE_TASKS = utils.INTERACTIVE_TASKS
+
+INTERACTIVE_PRIORITY = 0
+BULK_PRIORITY = 10
+
+ADMITTED = "ADMITTED"
+ACTIVE_STATUSES = (ADMITTED, "CREATED", "RUNNING")
+
+
+def task_priority(task_name: str) -> int:
+    if task_name in INTERACTIVE_TASKS:
+        return INTERACTIVE_PRIORITY
+    return BULK_PRIORITY
+
+
+def callback_url(job_id) -> str:
+    return f"{utils.api_url()}/jobs/callback/{job_id}/"
+
+
+def set_admitted(instance: models.Job, project: models.Project):
+    instance.admitted_at = datetime.utcnow()
+    instance.next_launch_at = None
+    instance.deadline_at = instance.admitted_at + timedelta(
+        seconds=utils.job_deadline_seconds(instance.name, project.exp_task_time)
+    )
+
+
+def launch(db: Session, instance: models.Job, commit=True, use_pool=True):
+    """
+    Create the Kubernetes Job for an admitted job and mark it as ``CREATED``.
+    Interactive tasks are handed to the project's warm pool instead when it
+    is enabled.
+    """
+    project = instance.project
+
+    if use_pool and settings.WARM_POOL_ENABLED and instance.name in INTERACTIVE_TASKS:
+        try:
+            pools.ensure_pool(db, project, instance.tag)
+        except Exception as e:
+            print("unable to scale warm pool, falling back to job", e)
+        else:
+            instance.status = pools.POOLED
+            instance.runner = "pool"
+            set_admitted(instance, project)
+            db.add(instance)
+            if commit:
+                db.commit()
+                db.refresh(instance)
+            return instance
+
+    project_data = schemas.Project.from_orm(project).dict()
+
+    if instance.name in INTERACTIVE_TASKS:
+        project_data["resources"] = dict(utils.INTERACTIVE_RESOURCES)
+    else:
+        utils.set_resource_requirements(project_data)
+    if "resources" in project_data:
+        project_data["resources"] = resources.apply_recommendation(
+            db, instance, project_data["resources"]
+        )
+
+    client = job.Job(
+        PROJECT,
+        project.owner,
+        project.title,
+        tag=instance.tag,
+        model_config=project_data,
+        job_id=instance.id,
+        callback_url=callback_url(instance.id),
+        route_name=instance.name,
+        incluster=incluster,
+        namespace=settings.PROJECT_NAMESPACE,
+        active_deadline_seconds=utils.job_deadline_seconds(
+            instance.name, project.exp_task_time
+        ),
+        ttl_seconds_after_finished=settings.JOB_TTL_SECONDS_AFTER_FINISHED,
+    )
+
+    client.create()
+
+    instance.status = "CREATED"
+    instance.runner = "job"
+    set_admitted(instance, project)
+    db.add(instance)
+    if commit:
+        db.commit()
+        db.refresh(instance)
+    return instance
+
+
+def launch_backoff(attempts):
+    return min(settings.SCHEDULER_MAX_LAUNCH_BACKOFF_SECONDS, 30 * 2 ** (attempts - 1))
+
+
+def launch_failed(
+    db: Session, instance: models.Job, error: Exception, status: str = "QUEUED"
+):
+    """
+    Record a failed launch. The job goes back to ``status`` and is retried
+    after a backoff, and it is failed once it has used up its attempts.
+    Returns ``True`` if the job was failed.
+    """
+    print("unable to launch job", instance.id, error)
+    instance.launch_attempts = (instance.launch_attempts or 0) + 1
+    if instance.launch_attempts < settings.SCHEDULER_MAX_LAUNCH_ATTEMPTS:
+        instance.status = status
+        instance.next_launch_at = datetime.utcnow() + timedelta(
+            seconds=launch_backoff(instance.launch_attempts)
+        )
+        db.add(instance)
+        return False
+
+    task = schemas.TaskComplete(
+        status="FAIL",
+        task_name=instance.name,
+        traceback=(
+            f"Job could not be started after {instance.launch_attempts} "
+            f"attempts: {error}"
+        ),
+        outputs=None,
+        meta={},
+    )
+    callbacks.complete_job(db, instance, task, commit=False)
+    return True
+
+
+def _claim(db: Session, instances):
+    """
+    Mark locked ``instances`` as admitted and commit, releasing the locks of
+    every row read in this transaction. Returns (job, previous status) pairs.
+    """
+    lease = datetime.utcnow() + timedelta(
+        seconds=settings.SCHEDULER_LAUNCH_LEASE_SECONDS
+    )
+    claimed = []
+    for instance in instances:
+        claimed.append((instance, instance.status))
+        instance.status = ADMITTED
+        instance.next_launch_at = lease
+        db.add(instance)
+    db.commit()
+    return claimed
+
+
+def _launch_all(db: Session, claimed, use_pool=True):
+    """
+    Launch jobs claimed with ``_claim``, committing after each one. A job
+    that cannot be launched goes back to its previous status.
+    """
+    launched = []
+    for instance, status in claimed:
+        try:
+            launched.append(launch(db, instance, commit=False, use_pool=use_pool))
+        except Exception as e:
+            launch_failed(db, instance, e, status=status)
+        db.commit()
+    return launched
+
+
+def requeue_expired(db: Session):
+    """
+    Queue jobs again whose launch lease ran out before they were launched.
+    The caller commits.
+    """
+    return (
+        db.query(models.Job)
+        .filter(
+            models.Job.status == ADMITTED,
+            models.Job.next_launch_at < datetime.utcnow(),
+        )
+        .update({models.Job.status: "QUEUED"}, synchronize_session=False)
+    )
+
+
+def _ready_to_launch():
+    return models.Job.next_launch_at.is_(None) | (
+        models.Job.next_launch_at <= datetime.utcnow()
+    )
+
+
+def _active_counts(db: Session, column):
+    rows = (
+        db.query(column, func.count(models.Job.id))
+        .filter(models.Job.status.in_(ACTIVE_STATUSES))
+        .group_by(column)
+        .all()
+    )
+    return Counter(dict(rows))
+
+
+def _queued():
+    return (models.Job.status == "QUEUED") & _ready_to_launch()
+
+
+def _bulk_candidates(db: Session, free: int):
+    """
+    Lock the oldest queued bulk jobs of each submitter. Nobody can be
+    admitted more than ``free`` jobs or the per-submitter cap, so later jobs
+    are not read.
+    """
+    window = min(free, settings.SCHEDULER_MAX_JOBS_PER_SUBMITTER)
+    rank = (
+        func.row_number()
+        .over(
+            partition_by=models.Job.submitter,
+            order_by=(models.Job.priority, models.Job.created_at),
+        )
+        .label("rank")
+    )
+    ranked = (
+        db.query(models.Job.id.label("id"), rank)
+        .filter(_queued(), models.Job.priority != INTERACTIVE_PRIORITY)
+        .subquery()
+    )
+    return (
+        db.query(models.Job)
+        .filter(
+            models.Job.id.in_(db.query(ranked.c.id).filter(ranked.c.rank <= window))
+        )
+        .order_by(models.Job.priority, models.Job.created_at)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def schedule(db: Session):
+    """
+    Admit as many queued jobs as the concurrency caps allow. Returns the list
+    of jobs that were launched.
+
+    Candidate rows are locked with ``SKIP LOCKED`` so that several API
+    replicas can run the scheduler concurrently without admitting the same
+    job twice.
+    """
+    requeue_expired(db)
+    active = _active_counts(db, models.Job.priority)
+    by_project = _active_counts(db, models.Job.project_id)
+    by_submitter = _active_counts(db, models.Job.submitter)
+    total_bulk = sum(n for p, n in active.items() if p != INTERACTIVE_PRIORITY)
+
+    admitted = (
+        db.query(models.Job)
+        .filter(_queued(), models.Job.priority == INTERACTIVE_PRIORITY)
+        .order_by(models.Job.created_at)
+        .limit(settings.SCHEDULER_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    free = settings.SCHEDULER_MAX_ACTIVE_JOBS - total_bulk
+    pending = _bulk_candidates(db, free) if free > 0 else []
+
+    while pending and total_bulk < settings.SCHEDULER_MAX_ACTIVE_JOBS:
+        # Fair share: favor the submitter with the fewest active jobs.
+        eligible = [
+            instance
+            for instance in pending
+            if by_project[instance.project_id] < settings.SCHEDULER_MAX_JOBS_PER_PROJECT
+            and (
+                instance.submitter is None
+                or by_submitter[instance.submitter]
+                < settings.SCHEDULER_MAX_JOBS_PER_SUBMITTER
+            )
+        ]
+        if not eligible:
+            break
+        instance = min(
+            eligible,
+            key=lambda j: (j.priority, by_submitter[j.submitter], j.created_at),
+        )
+        pending.remove(instance)
+        admitted.append(instance)
+        by_project[instance.project_id] += 1
+        by_submitter[instance.submitter] += 1
+        total_bulk += 1
+
+    return _launch_all(db, _claim(db, admitted))
+
+
+def queue_position(db: Session, instance: models.Job):
+    """
+    Number of queued jobs that will be considered before ``instance``, or
+    ``None`` if the job is no longer queued.
+    """
+    if instance.status != "QUEUED":
+        return None
+    return (
+        db.query(func.count(models.Job.id))
+        .filter(
+            models.Job.status == "QUEUED",
+            (models.Job.priority < instance.priority)
+            | (
+                (models.Job.priority == instance.priority)
+                & (models.Job.created_at < instance.created_at)
+            ),
+        )
+        .scalar()
+    )
+
+
+def launch_unclaimed(db: Session):
+    """
+    Start regular Jobs for pooled tasks that no pool worker has picked up in
+    time, e.g. because the pool is still starting or cannot be scheduled.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.WARM_POOL_CLAIM_TIMEOUT)
+    unclaimed = (
+        db.query(models.Job)
+        .filter(
+            models.Job.status == pools.POOLED,
+            models.Job.admitted_at < cutoff,
+            _ready_to_launch(),
+        )
+        .limit(settings.SCHEDULER_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    return _launch_all(db, _claim(db, unclaimed), use_pool=False)
@@ -12,6 +12,15 @@ from sqlalchemy.sql.sqltypes import (
 )  # pylint: disable=no-name-in-module
 
 
+class JobProgress(BaseModel):
+    fraction: Optional[float]
+    stage: Optional[str]
+
+
+class Heartbeat(BaseModel):
+    progress: Optional[JobProgress]
+
+
 class JobBase(BaseModel):
     user_id: int
     created_at: datetime
@@ -23,6 +32,13 @@ class JobBase(BaseModel):
     outputs: Optional[Dict]
     traceback: Optional[str]
     tag: str
+    submitter: Optional[str]
+    priority: Optional[int]
+    launch_attempts: Optional[int]
+    admitted_at: Optional[datetime]
+    heartbeat_at: Optional[datetime]
+    progress: Optional[JobProgress]
+    profile: Optional[bool]
 
 
 class JobCreate(JobBase):
@@ -31,11 +47,48 @@ class JobCreate(JobBase):
 
 class Job(JobBase):
     id: uuid.UUID
+    queue_position: Optional[int]
+
+    class Config:
+        orm_mode = True
+
+
+class JobSummary(BaseModel):
+    id: uuid.UUID
+    name: str
+    tag: str
+    status: str
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+
+class PaginatedJobs(BaseModel):
+    next: Optional[str]
+    results: List[JobSummary]
+
+
+class BulkJobStatus(BaseModel):
+    ids: List[uuid.UUID]
+
+
+class JobArtifact(BaseModel):
+    name: str
+    size: int
+    created_at: datetime
 
     class Config:
         orm_mode = True
 
 
+class PooledTask(BaseModel):
+    job_id: uuid.UUID
+    task_name: str
+    callback_url: str
+
+
 class TaskComplete(BaseModel):
     model_version: Optional[str]
     outputs: Optional[Dict]
@@ -51,6 +104,11 @@ class Task(BaseModel):
     task_name: str
     task_kwargs: Dict  # Dict[str, str]
     tag: str
+    # Username of the person who requested the task. Used for fair-share
+    # scheduling.
+    submitter: Optional[str]
+    # Run the task under the profiler and keep the profile as an artifact.
+    profile: Optional[bool] = False
 
 
 # Shared properties
@@ -103,6 +161,15 @@ class TokenPayload(BaseModel):
     sub: Optional[int] = None
 
 
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    ttl: int
+    hits: int
+    misses: int
+    evictions: int
+
+
 class CSOauthResponse(BaseModel):
     access_token: str
     expires_in: int
@@ -121,6 +188,8 @@ class ProjectSync(BaseModel):
     memory: float
     repo_tag: Optional[str]
     repo_url: Optional[str]
+    # Serve defaults, parse, and version from a long-lived deployment.
+    inputs_service: Optional[bool] = False
 
 
 class Project(ProjectSync):
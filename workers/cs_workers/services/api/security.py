@@ -40,30 +40,42 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-async def ensure_cs_access_token(db: Session, user: models.User):
+def needs_cs_access_token(user: models.User):
     missing_token = user.access_token is None
     is_expired = (
         user.access_token_expires_at is not None
         and user.access_token_expires_at < (datetime.utcnow() - timedelta(seconds=60))
     )
-    if missing_token or is_expired:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{user.url}/o/token/",
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": user.client_id,
-                    "client_secret": user.client_secret,
-                },
-            )
-            if resp.status_code != 200:
-                raise HTTPException(status_code=400, detail=resp.text)
-            data = schemas.CSOauthResponse(**resp.json())
-            user.access_token = data.access_token
-            user.access_token_expires_at = datetime.utcnow() + timedelta(
-                seconds=data.expires_in
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+    return missing_token or is_expired
+
+
+async def fetch_cs_access_token(user: models.User) -> schemas.CSOauthResponse:
+    async with httpx.AsyncClient() as client:
+        resp = await client.post(
+            f"{user.url}/o/token/",
+            data={
+                "grant_type": "client_credentials",
+                "client_id": user.client_id,
+                "client_secret": user.client_secret,
+            },
+        )
+        if resp.status_code != 200:
+            raise HTTPException(status_code=400, detail=resp.text)
+        return schemas.CSOauthResponse(**resp.json())
+
+
+def save_cs_access_token(db: Session, user: models.User, data: schemas.CSOauthResponse):
+    user.access_token = data.access_token
+    user.access_token_expires_at = datetime.utcnow() + timedelta(
+        seconds=data.expires_in
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+
+async def ensure_cs_access_token(db: Session, user: models.User):
+    if needs_cs_access_token(user):
+        data = await fetch_cs_access_token(user)
+        save_cs_access_token(db, user, data)
     return user
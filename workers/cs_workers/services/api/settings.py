@@ -13,6 +13,9 @@ class Settings(BaseSettings):
     API_SECRET_KEY: Optional[str]
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Verified tokens are cached in-process to skip the users table lookup.
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_SIZE: int = 1024
 
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = [
         "http://10.0.0.137:5000",
@@ -80,6 +83,77 @@ class Settings(BaseSettings):
             path=f"/{values.get('DB_NAME')}",
         )
 
+    # Concurrency caps for bulk (sim) jobs. Interactive tasks are not capped.
+    SCHEDULER_MAX_ACTIVE_JOBS: int = 100
+    SCHEDULER_MAX_JOBS_PER_PROJECT: int = 50
+    SCHEDULER_MAX_JOBS_PER_SUBMITTER: int = 10
+    # Jobs that cannot be launched are retried with exponential backoff and
+    # failed after this many attempts.
+    SCHEDULER_MAX_LAUNCH_ATTEMPTS: int = 5
+    SCHEDULER_MAX_LAUNCH_BACKOFF_SECONDS: int = 10 * 60
+    # Most interactive or unclaimed pooled jobs launched per scheduler run.
+    SCHEDULER_BATCH_SIZE: int = 50
+    # Admitted jobs that have not been launched after this long are queued
+    # again.
+    SCHEDULER_LAUNCH_LEASE_SECONDS: int = 2 * 60
+
+    # Warm pools of idle workers for defaults, parse and version tasks.
+    WARM_POOL_ENABLED: bool = False
+    WARM_POOL_MAX_REPLICAS: int = 3
+    # Number of interactive tasks per demand window that one pod can absorb.
+    WARM_POOL_TASKS_PER_REPLICA: int = 30
+    WARM_POOL_DEMAND_WINDOW_SECONDS: int = 600
+    WARM_POOL_IDLE_SECONDS: int = 1800
+    WARM_POOL_CLAIM_TIMEOUT: int = 120
+    WARM_POOL_POLL_SECONDS: float = 0.5
+    # Pool workers are recycled after running this many tasks.
+    WARM_POOL_MAX_TASKS_PER_WORKER: int = 500
+
+    # Per-project inputs services.
+    INPUTS_SERVICE_TIMEOUT: float = 60
+    INPUTS_SERVICE_IDLE_SECONDS: int = 60 * 60 * 24
+
+    # Resource requests derived from the usage that jobs report.
+    RESOURCE_RECOMMENDATIONS_ENABLED: bool = True
+    RESOURCE_MIN_SAMPLES: int = 10
+    RESOURCE_WINDOW_DAYS: int = 14
+    RESOURCE_HEADROOM: float = 1.2
+    RESOURCE_REFRESH_SECONDS: int = 60 * 60
+
+    # Jobs are failed once they run past their deadline. Sim deadlines are a
+    # multiple of the project's expected task time.
+    INTERACTIVE_JOB_DEADLINE_SECONDS: int = 10 * 60
+    MIN_JOB_DEADLINE_SECONDS: int = 30 * 60
+    JOB_DEADLINE_MULTIPLIER: float = 10
+    # Finished Kubernetes Jobs are kept this long so that the reconciler can
+    # read why they failed.
+    JOB_TTL_SECONDS_AFTER_FINISHED: int = 10 * 60
+    # How long a job may be missing from the cluster before it is failed.
+    RECONCILE_GRACE_SECONDS: int = 5 * 60
+    # Running jobs send a heartbeat every 30 seconds. A job that has sent
+    # heartbeats before and then stops for this long is failed.
+    HEARTBEAT_TIMEOUT_SECONDS: int = 5 * 60
+    # Largest file, e.g. a profile, that a job may upload.
+    MAX_ARTIFACT_BYTES: int = 50 * 1024 * 1024
+
+    # How often the maintenance process, ``python -m
+    # cs_workers.services.api.background``, runs.
+    MAINTENANCE_INTERVAL_SECONDS: int = 60
+
+    # Delivery of job results to the outputs processor. The dispatcher is
+    # woken up when results are committed and polls every OUTBOX_POLL_SECONDS
+    # in case a notification was missed.
+    OUTPUTS_PROCESSOR_URL: str = "http://outputs-processor"
+    OUTBOX_POLL_SECONDS: int = 5
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_CONCURRENCY: int = 10
+    OUTBOX_TIMEOUT: int = 30
+    # A claimed message is retried after this long if its dispatcher dies.
+    OUTBOX_LEASE_SECONDS: int = 2 * 60
+    OUTBOX_MAX_BACKOFF_SECONDS: int = 10 * 60
+    # Messages are marked failed after this many delivery attempts.
+    OUTBOX_MAX_ATTEMPTS: int = 20
+
     GITHUB_TOKEN: Optional[str]
     GITHUB_BUILD_BRANCH: Optional[str]
 
@@ -151,3 +151,20 @@ def superuser(db):
     db.commit()
     db.refresh(user_)
     yield user_
+
+
+@pytest.fixture(scope="function")
+def project(db, user):
+    project = models.Project(
+        user_id=user.id,
+        owner="test",
+        title="test-app",
+        tech="python-paramtools",
+        exp_task_time=10,
+        cpu=1,
+        memory=2,
+    )
+    db.add(project)
+    db.commit()
+    db.refresh(project)
+    return project
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+from .utils import get_access_token
+from ..settings import settings
+from ..routers import jobs as jobs_router
+from .. import models, schemas
+
+
+def create_jobs(db, user, n, **kwargs):
+    now = datetime.utcnow()
+    jobs = []
+    for i in range(n):
+        job = models.Job(
+            user_id=user.id,
+            name=kwargs.get("name", "sim"),
+            created_at=now + timedelta(seconds=i),
+            inputs={},
+            tag=kwargs.get("tag", "v1"),
+            status=kwargs.get("status", "SUCCESS"),
+        )
+        db.add(job)
+        jobs.append(job)
+    db.commit()
+    for job in jobs:
+        db.refresh(job)
+    return jobs
+
+
+def test_job_schema_progress():
+    # JobBase refers to JobProgress, which must be defined first.
+    assert jobs_router.router is not None
+    job = schemas.JobBase(
+        user_id=1,
+        created_at=datetime.utcnow(),
+        name="sim",
+        status="RUNNING",
+        tag="v1",
+        progress={"fraction": 0.5, "stage": "Running 2022"},
+    )
+    assert job.progress == schemas.JobProgress(fraction=0.5, stage="Running 2022")
+
+
+class TestJobs:
+    def test_list_jobs(self, db, client, user):
+        access_token = get_access_token(client, user)
+        headers = {"Authorization": f"Bearer {access_token}"}
+        jobs = create_jobs(db, user, 5)
+        create_jobs(db, user, 2, status="FAIL")
+
+        resp = client.get(
+            f"{settings.API_PREFIX_STR}/jobs/",
+            params={"status": "SUCCESS", "limit": 2},
+            headers=headers,
+        )
+        assert resp.status_code == 200, resp.text
+        seen = []
+        while True:
+            data = resp.json()
+            seen += [job["id"] for job in data["results"]]
+            if data["next"] is None:
+                break
+            cursor = data["next"].split("cursor=")[1].split("&")[0]
+            resp = client.get(
+                f"{settings.API_PREFIX_STR}/jobs/",
+                params={"status": "SUCCESS", "limit": 2, "cursor": cursor},
+                headers=headers,
+            )
+            assert resp.status_code == 200, resp.text
+
+        assert seen == [str(job.id) for job in reversed(jobs)]
+
+    def test_bulk_status(self, db, client, user):
+        access_token = get_access_token(client, user)
+        headers = {"Authorization": f"Bearer {access_token}"}
+        jobs = create_jobs(db, user, 3, status="RUNNING")
+
+        resp = client.post(
+            f"{settings.API_PREFIX_STR}/jobs/status/",
+            json={"ids": [str(job.id) for job in jobs[:2]]},
+            headers=headers,
+        )
+        assert resp.status_code == 200, resp.text
+        assert {job["id"] for job in resp.json()} == {str(job.id) for job in jobs[:2]}
+        assert all(job["status"] == "RUNNING" for job in resp.json())
+
+    def test_artifacts(self, db, client, user):
+        access_token = get_access_token(client, user)
+        headers = {"Authorization": f"Bearer {access_token}"}
+        (job,) = create_jobs(db, user, 1, status="RUNNING")
+
+        resp = client.post(
+            f"{settings.API_PREFIX_STR}/jobs/callback/{job.id}/artifacts/profile.pstats/",
+            data=b"profile data",
+        )
+        assert resp.status_code == 201, resp.text
+        assert resp.json()["size"] == len(b"profile data")
+
+        url = f"{settings.API_PREFIX_STR}/jobs/{job.id}/artifacts/profile.pstats/"
+        assert client.get(url).status_code == 401
+        resp = client.get(url, headers=headers)
+        assert resp.status_code == 200, resp.text
+        assert resp.content == b"profile data"
+
+    def test_artifact_too_large(self, db, client, user, monkeypatch):
+        (job,) = create_jobs(db, user, 1, status="RUNNING")
+        url = f"{settings.API_PREFIX_STR}/jobs/callback/{job.id}/artifacts/profile.pstats/"
+        monkeypatch.setattr(settings, "MAX_ARTIFACT_BYTES", 10)
+
+        # Rejected from its Content-Length header.
+        resp = client.post(url, data=b"x" * 11)
+        assert resp.status_code == 413, resp.text
+
+        # Rejected while streaming when there is no Content-Length header.
+        def chunks():
+            for _ in range(3):
+                yield b"x" * 5
+
+        resp = client.post(url, data=chunks())
+        assert resp.status_code == 413, resp.text
+        assert db.query(models.JobArtifact).count() == 0
+
+    def test_heartbeat_progress(self, db, client, user):
+        access_token = get_access_token(client, user)
+        headers = {"Authorization": f"Bearer {access_token}"}
+        (job,) = create_jobs(db, user, 1, name="parse", status="RUNNING")
+
+        progress = {"fraction": 0.25, "stage": "Validating"}
+        resp = client.post(
+            f"{settings.API_PREFIX_STR}/jobs/callback/{job.id}/heartbeat/",
+            json={"progress": progress},
+        )
+        assert resp.status_code == 200, resp.text
+
+        resp = client.get(f"{settings.API_PREFIX_STR}/jobs/{job.id}/", headers=headers)
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["progress"] == progress
+        assert resp.json()["heartbeat_at"] is not None
@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime
+
+from .. import callbacks, models, outbox, schemas, security
+
+
+class TestOutbox:
+    def test_complete_job_and_dispatch(self, db, user, project, monkeypatch):
+        instance = models.Job(
+            user_id=user.id,
+            project_id=project.id,
+            name="sim",
+            created_at=datetime.utcnow(),
+            inputs={},
+            tag="v1",
+            status="RUNNING",
+        )
+        db.add(instance)
+        db.commit()
+        db.refresh(instance)
+
+        task = schemas.TaskComplete(
+            status="SUCCESS",
+            task_name="sim",
+            outputs={"hello": "world"},
+            meta={"task_times": [1.0]},
+            version="v1",
+        )
+        callbacks.complete_job(db, instance, task)
+
+        message = db.query(models.OutboxMessage).one()
+        assert message.job_id == instance.id
+        assert outbox.payload(instance) == {"task": task.dict()}
+
+        async def fetch_token(user):
+            return schemas.CSOauthResponse(
+                access_token="token", expires_in=3600, token_type="Bearer", scope=""
+            )
+
+        posted = []
+
+        async def post(client, job_id, body):
+            posted.append(job_id)
+            assert body["headers"] == {"Authorization": "Bearer token"}
+            assert body["task"] == task.dict()
+            if len(posted) == 1:
+                raise ValueError("outputs processor is down")
+
+        monkeypatch.setattr(security, "fetch_cs_access_token", fetch_token)
+        monkeypatch.setattr(outbox, "_post", post)
+
+        assert asyncio.run(outbox.dispatch(db)) == []
+        db.refresh(message)
+        assert message.attempts == 1
+        assert message.last_error == "outputs processor is down"
+        assert message.next_attempt_at > datetime.utcnow()
+
+        # Not due for a retry yet.
+        assert asyncio.run(outbox.dispatch(db)) == []
+        assert posted == [instance.id]
+
+        message.next_attempt_at = datetime.utcnow()
+        db.add(message)
+        db.commit()
+        message_id = message.id
+        assert [m.id for m in asyncio.run(outbox.dispatch(db))] == [message_id]
+        assert posted == [instance.id, instance.id]
+        # Delivered messages are deleted.
+        assert db.query(models.OutboxMessage).count() == 0
+
+    def test_dead_letter(self, db, user, project, monkeypatch):
+        instance = models.Job(
+            user_id=user.id,
+            project_id=project.id,
+            name="sim",
+            created_at=datetime.utcnow(),
+            inputs={},
+            tag="v1",
+            status="RUNNING",
+        )
+        db.add(instance)
+        db.commit()
+        db.refresh(instance)
+        task = schemas.TaskComplete(
+            status="SUCCESS", task_name="sim", outputs={"hello": "world"}, meta={}
+        )
+        callbacks.complete_job(db, instance, task)
+        message = db.query(models.OutboxMessage).one()
+
+        async def fetch_token(user):
+            return schemas.CSOauthResponse(
+                access_token="token", expires_in=3600, token_type="Bearer", scope=""
+            )
+
+        async def post(client, job_id, body):
+            raise ValueError("outputs processor is down")
+
+        monkeypatch.setattr(security, "fetch_cs_access_token", fetch_token)
+        monkeypatch.setattr(outbox, "_post", post)
+        monkeypatch.setattr(outbox.settings, "OUTBOX_MAX_ATTEMPTS", 2)
+
+        assert asyncio.run(outbox.dispatch(db)) == []
+        db.refresh(message)
+        assert message.failed_at is None
+        message.next_attempt_at = datetime.utcnow()
+        db.add(message)
+        db.commit()
+
+        assert asyncio.run(outbox.dispatch(db)) == []
+        db.refresh(message)
+        assert message.attempts == 2
+        assert message.failed_at is not None
+        assert message.last_error == "outputs processor is down"
+
+        # Failed messages are not claimed again.
+        assert outbox.claim_batch(db) == []
@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from .. import callbacks, models, reconciler, schemas
+
+
+def make_job(db, user, project, deadline_at, runner="pool", started_at=None):
+    now = started_at or datetime.utcnow()
+    instance = models.Job(
+        user_id=user.id,
+        project_id=project.id,
+        name="parse",
+        created_at=now,
+        admitted_at=now,
+        deadline_at=deadline_at,
+        inputs={},
+        tag="v1",
+        runner=runner,
+        status="RUNNING",
+    )
+    db.add(instance)
+    db.commit()
+    db.refresh(instance)
+    return instance
+
+
+class TestReconciler:
+    def test_deadline_exceeded(self, db, user, project):
+        now = datetime.utcnow()
+        stuck = make_job(db, user, project, now - timedelta(days=1))
+        make_job(db, user, project, now + timedelta(minutes=10))
+
+        dead = reconciler.find_dead_jobs(db)
+        assert [(instance.id, reason) for instance, reason in dead] == [
+            (stuck.id, "Job exceeded its deadline.")
+        ]
+
+    def test_heartbeat_timeout(self, db, user, project):
+        now = datetime.utcnow()
+        silent = make_job(db, user, project, now + timedelta(hours=1))
+        silent.heartbeat_at = now - timedelta(hours=1)
+        alive = make_job(db, user, project, now + timedelta(hours=1))
+        alive.heartbeat_at = now
+        db.add_all([silent, alive])
+        db.commit()
+
+        dead = reconciler.find_dead_jobs(db)
+        assert [(instance.id, reason) for instance, reason in dead] == [
+            (silent.id, "Job stopped sending heartbeats.")
+        ]
+
+
+def k8s_job(name, failed=False):
+    conditions = []
+    if failed:
+        conditions.append(
+            SimpleNamespace(
+                type="Failed",
+                status="True",
+                reason="BackoffLimitExceeded",
+                message="Job has reached the specified backoff limit",
+            )
+        )
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=name),
+        status=SimpleNamespace(conditions=conditions, succeeded=None),
+    )
+
+
+def oom_killed_pod(job_id):
+    terminated = SimpleNamespace(reason="OOMKilled", exit_code=137)
+    return SimpleNamespace(
+        metadata=SimpleNamespace(labels={"job-id": job_id}),
+        status=SimpleNamespace(
+            container_statuses=[
+                SimpleNamespace(
+                    state=SimpleNamespace(terminated=terminated), last_state=None
+                )
+            ]
+        ),
+    )
+
+
+def mock_cluster(monkeypatch, jobs=(), pods=()):
+    batch_api = SimpleNamespace(
+        list_namespaced_job=lambda namespace: SimpleNamespace(items=list(jobs))
+    )
+    core_api = SimpleNamespace(
+        list_namespaced_pod=lambda namespace, label_selector: SimpleNamespace(
+            items=list(pods)
+        )
+    )
+    monkeypatch.setattr(reconciler.kube, "batch_api", lambda incluster: batch_api)
+    monkeypatch.setattr(reconciler.kube, "core_api", lambda incluster: core_api)
+
+
+class TestReconcilerCluster:
+    def started(self, db, user, project):
+        now = datetime.utcnow()
+        return make_job(
+            db,
+            user,
+            project,
+            now + timedelta(hours=1),
+            runner="job",
+            started_at=now - timedelta(hours=1),
+        )
+
+    def test_job_missing(self, db, user, project, monkeypatch):
+        missing = self.started(db, user, project)
+        running = self.started(db, user, project)
+        mock_cluster(monkeypatch, jobs=[k8s_job(str(running.id))])
+
+        dead = reconciler.find_dead_jobs(db)
+        assert [(instance.id, reason) for instance, reason in dead] == [
+            (missing.id, "Job no longer exists in the cluster.")
+        ]
+
+    def test_pod_failed(self, db, user, project, monkeypatch):
+        failed = self.started(db, user, project)
+        mock_cluster(
+            monkeypatch,
+            jobs=[k8s_job(str(failed.id), failed=True)],
+            pods=[oom_killed_pod(str(failed.id))],
+        )
+
+        dead = reconciler.find_dead_jobs(db)
+        assert [(instance.id, reason) for instance, reason in dead] == [
+            (
+                failed.id,
+                "BackoffLimitExceeded: Job has reached the specified backoff "
+                "limit Pod terminated with OOMKilled (exit code 137).",
+            )
+        ]
+
+    def test_job_from_before_admission(self, db, user, project, monkeypatch):
+        legacy = make_job(db, user, project, None)
+        legacy.created_at = datetime.utcnow() - timedelta(days=2)
+        legacy.admitted_at = None
+        legacy.runner = None
+        db.add(legacy)
+        db.commit()
+        mock_cluster(monkeypatch)
+
+        dead = reconciler.find_dead_jobs(db)
+        assert [(instance.id, reason) for instance, reason in dead] == [
+            (legacy.id, "Job exceeded its deadline.")
+        ]
+
+    def test_job_finishes_during_reconcile(self, db, user, project, monkeypatch):
+        finished = self.started(db, user, project)
+        mock_cluster(monkeypatch)
+        find_dead_jobs = reconciler.find_dead_jobs
+
+        def finish_after_query(db):
+            dead = find_dead_jobs(db)
+            task = schemas.TaskComplete(
+                status="SUCCESS", task_name="parse", outputs={}, meta={}
+            )
+            callbacks.complete_job(db, finished, task)
+            return dead
+
+        monkeypatch.setattr(reconciler, "find_dead_jobs", finish_after_query)
+
+        assert reconciler.reconcile(db) == []
+        db.refresh(finished)
+        assert finished.status == "SUCCESS"
+        assert (
+            db.query(models.OutboxMessage)
+            .filter(models.OutboxMessage.job_id == finished.id)
+            .count()
+            == 1
+        )
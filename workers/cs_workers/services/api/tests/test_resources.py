@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from .. import models, resources, schemas
+from ..settings import settings
+
+
+class TestResources:
+    def test_recommendation(self, db, user, project, monkeypatch):
+        monkeypatch.setattr(settings, "RESOURCE_MIN_SAMPLES", 5)
+        for i in range(10):
+            db.add(
+                models.Job(
+                    user_id=user.id,
+                    project_id=project.id,
+                    name="sim",
+                    tag="v1",
+                    status="SUCCESS",
+                    created_at=datetime.utcnow(),
+                    finished_at=datetime.utcnow(),
+                    peak_memory=1.0,
+                    cpu_time=5.0,
+                    wall_time=10.0,
+                )
+            )
+        db.commit()
+
+        assert resources.refresh_recommendations(db) == 1
+
+        instance = models.Job(project_id=project.id, name="sim", tag="v2")
+        adjusted = resources.apply_recommendation(
+            db,
+            instance,
+            {
+                "requests": {"memory": "2.0G", "cpu": 1.0},
+                "limits": {"memory": "3G", "cpu": 1.0},
+            },
+        )
+        assert adjusted["requests"] == {"memory": "1.2G", "cpu": 0.6}
+        assert adjusted["limits"] == {"memory": "3G", "cpu": 1.0}
+
+        instance = models.Job(project_id=project.id, name="parse", tag="v1")
+        resources_ = {"requests": {"memory": "1G"}, "limits": {"memory": "1G"}}
+        assert resources.apply_recommendation(db, instance, resources_) is resources_
+
+    def test_record_usage(self):
+        instance = models.Job(name="sim")
+        task = schemas.TaskComplete(
+            status="SUCCESS",
+            task_name="sim",
+            meta={"task_times": [30.0], "compute_time": 20.0, "cpu_time": 10.0},
+        )
+        resources.record_usage(instance, task)
+        assert instance.cpu_time == 10.0
+        assert instance.wall_time == 20.0
+
+        # Older jobs only report the time of the whole task.
+        del task.meta["compute_time"]
+        resources.record_usage(instance, task)
+        assert instance.wall_time == 30.0
@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from .. import models, outbox, pools, scheduler
+from ..settings import settings
+
+
+class MockJob:
+    created = []
+
+    def __init__(self, *args, job_id=None, **kwargs):
+        self.job_id = job_id
+
+    def create(self):
+        MockJob.created.append(self.job_id)
+
+
+@pytest.fixture(scope="function")
+def mock_job(monkeypatch):
+    MockJob.created = []
+    monkeypatch.setattr(scheduler.job, "Job", MockJob)
+    return MockJob
+
+
+def queue_job(db, user, project, name, submitter=None, offset=0):
+    instance = models.Job(
+        user_id=user.id,
+        project_id=project.id,
+        name=name,
+        created_at=datetime.utcnow() + timedelta(seconds=offset),
+        inputs={},
+        tag="v1",
+        submitter=submitter,
+        priority=scheduler.task_priority(name),
+        status="QUEUED",
+    )
+    db.add(instance)
+    db.commit()
+    db.refresh(instance)
+    return instance
+
+
+class TestScheduler:
+    def test_fair_share(self, db, user, project, mock_job, monkeypatch):
+        monkeypatch.setattr(settings, "SCHEDULER_MAX_ACTIVE_JOBS", 3)
+        monkeypatch.setattr(settings, "SCHEDULER_MAX_JOBS_PER_SUBMITTER", 2)
+
+        sweep = [
+            queue_job(db, user, project, "sim", submitter="bulk", offset=i)
+            for i in range(5)
+        ]
+        other = queue_job(db, user, project, "sim", submitter="other", offset=10)
+        parse = queue_job(db, user, project, "parse", offset=20)
+
+        launched = scheduler.schedule(db)
+
+        assert set(mock_job.created) == {
+            parse.id,
+            sweep[0].id,
+            sweep[1].id,
+            other.id,
+        }
+        assert len(launched) == 4
+        assert scheduler.queue_position(db, parse) is None
+        assert scheduler.queue_position(db, sweep[2]) == 0
+        assert scheduler.queue_position(db, sweep[4]) == 2
+
+        # Finishing a job frees a slot for the next queued job.
+        sweep[0].status = "SUCCESS"
+        db.add(sweep[0])
+        db.commit()
+        launched = scheduler.schedule(db)
+        assert [j.id for j in launched] == [sweep[2].id]
+
+    def test_launch_failure(self, db, user, project, monkeypatch):
+        monkeypatch.setattr(settings, "SCHEDULER_MAX_LAUNCH_ATTEMPTS", 2)
+
+        class FailingJob(MockJob):
+            def create(self):
+                raise Exception("quota exceeded")
+
+        monkeypatch.setattr(scheduler.job, "Job", FailingJob)
+        sim = queue_job(db, user, project, "sim", submitter="test")
+
+        assert scheduler.schedule(db) == []
+        db.refresh(sim)
+        assert sim.status == "QUEUED"
+        assert sim.launch_attempts == 1
+        assert sim.next_launch_at > datetime.utcnow()
+
+        # The job is not retried until its backoff has passed.
+        assert scheduler.schedule(db) == []
+        db.refresh(sim)
+        assert sim.launch_attempts == 1
+
+        # It is failed once it runs out of attempts.
+        sim.next_launch_at = datetime.utcnow() - timedelta(seconds=1)
+        db.add(sim)
+        db.commit()
+        assert scheduler.schedule(db) == []
+        db.refresh(sim)
+        assert sim.status == "FAIL"
+        assert sim.finished_at is not None
+        assert (
+            db.query(models.OutboxMessage)
+            .filter(models.OutboxMessage.job_id == sim.id)
+            .count()
+            == 1
+        )
+        assert "quota exceeded" in outbox.payload(sim)["task"]["traceback"]
+
+    def test_expired_claim(self, db, user, project, mock_job, monkeypatch):
+        monkeypatch.setattr(settings, "SCHEDULER_MAX_ACTIVE_JOBS", 1)
+        claimed = queue_job(db, user, project, "sim", submitter="test")
+        queued = queue_job(db, user, project, "sim", submitter="test", offset=1)
+        claimed.status = scheduler.ADMITTED
+        claimed.next_launch_at = datetime.utcnow() + timedelta(seconds=60)
+        db.add(claimed)
+        db.commit()
+
+        # A job that is being launched counts against the caps.
+        assert scheduler.schedule(db) == []
+        db.refresh(queued)
+        assert queued.status == "QUEUED"
+
+        # It is queued again if its launch did not finish before the lease
+        # ran out.
+        claimed.next_launch_at = datetime.utcnow() - timedelta(seconds=1)
+        db.add(claimed)
+        db.commit()
+        launched = scheduler.schedule(db)
+        assert [j.id for j in launched] == [claimed.id]
+        db.refresh(claimed)
+        assert claimed.status == "CREATED"
+        assert claimed.next_launch_at is None
+
+    def test_warm_pool(self, db, user, project, mock_job, monkeypatch):
+        monkeypatch.setattr(settings, "WARM_POOL_ENABLED", True)
+        ensured = []
+        monkeypatch.setattr(
+            pools, "ensure_pool", lambda db, project, tag: ensured.append(tag)
+        )
+
+        parse = queue_job(db, user, project, "parse")
+        sim = queue_job(db, user, project, "sim", submitter="test")
+        scheduler.schedule(db)
+
+        db.refresh(parse)
+        assert parse.status == pools.POOLED
+        assert ensured == ["v1"]
+        assert mock_job.created == [sim.id]
+
+        assert pools.claim(db, project, "v0") is None
+        claimed = pools.claim(db, project, "v1")
+        assert claimed.id == parse.id
+        assert claimed.status == "RUNNING"
+        assert pools.claim(db, project, "v1") is None
+
+    def test_pool_token(self, db, user, project, client, monkeypatch):
+        monkeypatch.setattr(settings, "WARM_POOL_ENABLED", True)
+        monkeypatch.setattr(pools, "ensure_pool", lambda db, project, tag: 1)
+        parse = queue_job(db, user, project, "parse")
+        scheduler.schedule(db)
+
+        url = f"{settings.API_PREFIX_STR}/jobs/pool/test/test-app/v1/next/"
+        assert client.get(url, params={"timeout": 0}).status_code == 401
+        other_tag = pools.pool_token(project, "v0")
+        resp = client.get(
+            url, params={"timeout": 0}, headers={"Authorization": f"Token {other_tag}"},
+        )
+        assert resp.status_code == 401
+
+        token = pools.pool_token(project, "v1")
+        resp = client.get(
+            url, params={"timeout": 0}, headers={"Authorization": f"Token {token}"}
+        )
+        assert resp.status_code == 200
+        assert resp.json()["job_id"] == str(parse.id)
+
+    def test_desired_replicas(self, monkeypatch):
+        monkeypatch.setattr(settings, "WARM_POOL_TASKS_PER_REPLICA", 10)
+        monkeypatch.setattr(settings, "WARM_POOL_MAX_REPLICAS", 3)
+        assert pools.desired_replicas(0) == 1
+        assert pools.desired_replicas(11) == 2
+        assert pools.desired_replicas(1000) == 3
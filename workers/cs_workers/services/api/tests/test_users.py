@@ -1,4 +1,4 @@
-from .. import models
+from .. import models, dependencies as deps
 
 
 class TestUsers:
@@ -66,3 +66,28 @@ class TestUsers:
 
         db.refresh(new_user)
         assert new_user.is_approved
+
+    def test_cached_user_deactivated(self, db, client, new_user):
+        resp = client.post(
+            "/api/v1/login/access-token",
+            data={"username": "test", "password": "heyhey2222"},
+        )
+        assert resp.status_code == 200, f"Got {resp.status_code}: {resp.text}"
+        access_token = resp.json()["access_token"]
+        headers = {"Authorization": f"Bearer {access_token}"}
+
+        deps.user_cache.clear()
+        resp = client.get("/api/v1/users/me/", headers=headers)
+        assert resp.status_code == 200, f"Got {resp.status_code}: {resp.text}"
+        hits = deps.user_cache.hits
+        resp = client.get("/api/v1/users/me/", headers=headers)
+        assert resp.status_code == 200, f"Got {resp.status_code}: {resp.text}"
+        assert deps.user_cache.hits == hits + 1
+
+        new_user.is_active = False
+        db.add(new_user)
+        db.commit()
+        assert len(deps.user_cache) == 0
+
+        resp = client.get("/api/v1/users/me/", headers=headers)
+        assert resp.status_code == 400, f"Got {resp.status_code}: {resp.text}"
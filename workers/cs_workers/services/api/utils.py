@@ -1,5 +1,42 @@
 import math
 
+from .settings import settings
+
+INTERACTIVE_TASKS = ("version", "defaults", "parse")
+
+# Use lower memory target for tasks that only load or validate inputs.
+INTERACTIVE_RESOURCES = {
+    "requests": {"memory": "0.25G", "cpu": 0.7},
+    "limits": {"memory": "0.7G", "cpu": 1},
+}
+
+
+def job_deadline_seconds(task_name, exp_task_time):
+    """
+    Time a job may run before it is considered stuck.
+    """
+    if task_name in INTERACTIVE_TASKS:
+        return settings.INTERACTIVE_JOB_DEADLINE_SECONDS
+    try:
+        expected = float(exp_task_time or 0)
+    except ValueError:
+        expected = 0
+    return int(
+        max(
+            settings.MIN_JOB_DEADLINE_SECONDS,
+            expected * settings.JOB_DEADLINE_MULTIPLIER,
+        )
+    )
+
+
+def api_url():
+    if settings.WORKERS_API_HOST:
+        url = f"https://{settings.WORKERS_API_HOST}"
+    else:
+        url = f"http://api.{settings.NAMESPACE}.svc.cluster.local"
+
+    return url + settings.API_PREFIX_STR
+
 
 def set_resource_requirements(project_data):
     mem = float(project_data.pop("memory"))
@@ -0,0 +1,52 @@
+import json
+
+import cs_secrets
+
+from cs_workers.models import secrets
+from cs_workers.models.secrets import ModelSecrets
+
+
+class CountingBackend(cs_secrets.LocalBackend):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reads = 0
+
+    def get(self, project, name):
+        self.reads += 1
+        return super().get(project, name)
+
+
+def test_local_backend(tmp_path):
+    path = str(tmp_path / "secrets.json")
+    backend = cs_secrets.LocalBackend(path)
+    s = cs_secrets.Secrets("cs-test", backend=backend)
+    assert s.get_or_none("hello") is None
+
+    s.set("hello", "world")
+    assert s.get("hello") == "world"
+    with open(path) as f:
+        assert json.loads(f.read()) == {"cs-test": {"hello": "world"}}
+
+    reloaded = cs_secrets.Secrets("cs-test", backend=cs_secrets.LocalBackend(path))
+    assert reloaded.get("hello") == "world"
+
+    s.delete("hello")
+    assert s.get_or_none("hello") is None
+
+
+def test_model_secrets_names_cache():
+    secrets._names_cache.clear()
+    backend = CountingBackend()
+    ms = ModelSecrets("test", "test-app", project="cs-test", backend=backend)
+    assert ms.names() == []
+
+    ms.set("API_KEY", "abc")
+    ms.set("TOKEN", "def")
+    reads = backend.reads
+    assert ms.names() == ["API_KEY", "TOKEN"]
+    assert ms.names() == ["API_KEY", "TOKEN"]
+    assert backend.reads == reads + 1
+
+    ms.delete("TOKEN")
+    assert ms.names() == ["API_KEY"]
+    assert ms.list() == {"API_KEY": "abc"}
@@ -2,6 +2,7 @@ import base64
 import os
 import re
 import subprocess
+import threading
 import time
 
 import httpx
@@ -160,3 +161,86 @@ def hash_projects(payload):
     for project in payload:
         projects[f"{project['owner']}/{project['title']}"] = project
     return projects
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache whose entries expire after ``ttl``
+    seconds. Once ``maxsize`` entries are stored, the entry closest to
+    expiring is evicted to make room for new ones.
+    """
+
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._evict()
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def delete_where(self, predicate):
+        """
+        Delete all entries whose value matches ``predicate``.
+        """
+        with self._lock:
+            keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [key for key, (exp, _) in self._data.items() if exp <= now]
+        for key in expired:
+            del self._data[key]
+        if not expired:
+            key = min(self._data, key=lambda key: self._data[key][0])
+            del self._data[key]
+        self.evictions += max(len(expired), 1)
+
+    def __len__(self):
+        return len(self._data)